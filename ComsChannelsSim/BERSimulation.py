@@ -0,0 +1,313 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  This file contains the Monte Carlo engine used to estimate the bit and symbol error rates of a modulation
+  over an AWGN channel. The symbols are processed in chunks of fixed size until a number of errors, a width
+  of the confidence interval or a budget of bits is reached, so the memory used does not depend on the
+  number of bits simulated. Very low error rates are estimated with importance sampling.
+"""
+
+import os
+import math
+import collections
+import concurrent.futures
+import numpy as np
+import ComsChannelsSim.utils as utils
+import ComsChannelsSim.Mapping as Mapping
+
+sps = utils.lazyModule("scipy.stats")
+
+# Parameters accepted by simulateBER
+simulationParameterNames = ("estimator", "scale", "targetErrors", "relativeWidth", "maxBits", "memoryBudget", "confidence", "intervalMethod", "seed", "workers")
+
+def constellationLabels(modulation):
+  """
+  Returns the constellation of a modulation element, the label (bits packed in an integer) of each point
+  and the number of ones of every label, used to count the bit errors from the xor of two labels.
+  """
+  constellation = modulation.constellation
+  labels = modulation.labelValues
+  ones = np.array([bin(label).count("1") for label in range(modulation.M)])
+  return constellation, labels, ones
+
+def countErrors(constellation, labels, ones, No, symbols, rng):
+  """
+  Transmits random symbols through an AWGN channel and counts the errors after the minimum distance decision.
+
+  Parameters:
+  * constellation, labels, ones -> Output of constellationLabels
+  * No -> Noise power spectral density, each real dimension of the noise has a variance of No/2 [W/Hz]
+  * symbols -> Number of symbols transmitted
+  * rng -> numpy Generator used
+
+  Returns:
+  * (bitErrors, symbolErrors) -> Number of bit and symbol errors
+  """
+  transmitted = rng.integers(0, constellation.size, symbols)
+
+  if np.iscomplexobj(constellation):
+    received = constellation[transmitted] + np.sqrt(No/2)*rng.standard_normal((symbols, 2)).view(np.complex128)[:, 0]
+  else:
+    received = constellation[transmitted] + np.sqrt(No/2)*rng.standard_normal(symbols)
+
+  # Minimum distance decision
+  decided = Mapping.sliceIndexes(received, Mapping.buildSlicer(constellation))
+
+  bitErrors = int(ones[labels[transmitted] ^ labels[decided]].sum())
+  symbolErrors = int(np.count_nonzero(transmitted != decided))
+  return bitErrors, symbolErrors
+
+def countErrorsImportance(constellation, labels, ones, No, symbols, rng, scale):
+  """
+  Importance sampling version of countErrors, the standard deviation of the noise is multiplied by scale so
+  errors are frequent, and each error is weighted by the likelihood ratio of its noise sample between the
+  real and the biased distributions.
+
+  Parameters:
+  * constellation, labels, ones -> Output of constellationLabels
+  * No -> Noise power spectral density of the real channel [W/Hz]
+  * symbols -> Number of symbols transmitted
+  * rng -> numpy Generator used
+  * scale -> Ratio between the standard deviations of the biased and the real noise
+
+  Returns:
+  * (bitSum, bitSquares, symbolSum, bitErrors, symbolErrors) -> Sums of the weighted bit errors, of their squares
+    and of the weighted symbol errors, and the number of bit and symbol errors of the biased simulation
+  """
+  sigma = np.sqrt(No/2)
+  transmitted = rng.integers(0, constellation.size, symbols)
+
+  if np.iscomplexobj(constellation):
+    noise = scale*sigma*rng.standard_normal((symbols, 2)).view(np.complex128)[:, 0]
+    dimensions = 2
+  else:
+    noise = scale*sigma*rng.standard_normal(symbols)
+    dimensions = 1
+
+  decided = Mapping.sliceIndexes(constellation[transmitted] + noise, Mapping.buildSlicer(constellation))
+
+  # Ratio between the real and the biased gaussian densities of each noise sample
+  weight = (scale**dimensions)*np.exp(-np.square(np.abs(noise))/(2*sigma**2)*(1 - 1/scale**2))
+
+  bitErrors = ones[labels[transmitted] ^ labels[decided]]
+  symbolErrors = transmitted != decided
+  weightedBitErrors = weight*bitErrors
+  return float(weightedBitErrors.sum()), float(np.square(weightedBitErrors).sum()), float(weight[symbolErrors].sum()), int(bitErrors.sum()), int(np.count_nonzero(symbolErrors))
+
+def countErrorsSeeded(constellation, labels, ones, No, symbols, seedSequence, scale = None):
+  """
+  Same as countErrors (or countErrorsImportance if scale is provided) but with its own stream, it is the task run by each worker.
+  """
+  if scale is None: return countErrors(constellation, labels, ones, No, symbols, np.random.default_rng(seedSequence))
+  return countErrorsImportance(constellation, labels, ones, No, symbols, np.random.default_rng(seedSequence), scale)
+
+def chunkSeed(root, point, chunk):
+  """
+  Returns the SeedSequence of a chunk of a point of the simulation, it only depends on the root seed and
+  the position of the chunk, not on the worker that simulates it.
+  """
+  return np.random.SeedSequence(root.entropy, spawn_key = root.spawn_key + (point, chunk))
+
+def importanceScale(constellation, No):
+  """
+  Returns the scale of the noise used by importance sampling, the biased noise puts the nearest decision
+  boundaries (half the minimum distance of the constellation) at 1.5 standard deviations.
+  """
+  distances = np.abs(constellation[:, np.newaxis] - constellation[np.newaxis, :])
+  minimumDistance = np.min(distances[~np.eye(constellation.size, dtype=bool)])
+  return max(1.0, minimumDistance/3/np.sqrt(No/2))
+
+def simulatePoint(modulation, EbNo, point, root, executor, **kwargs):
+  """
+  Simulates one EbNo point in chunks, the chunks are sent to the executor (if any) keeping a window of them
+  in flight, and their results are accumulated in order so the stopping point does not depend on the workers.
+  See simulateBER for the parameters.
+  """
+  estimator = kwargs.get("estimator", "direct")
+  targetErrors = kwargs.get("targetErrors", 100)
+  relativeWidth = kwargs.get("relativeWidth", 0.1 if estimator == "importance" else None)
+  maxBits = int(kwargs.get("maxBits", 10**8))
+  memoryBudget = kwargs.get("memoryBudget", 32*2**20)
+  confidence = kwargs.get("confidence", 0.95)
+  intervalMethod = kwargs.get("intervalMethod", "wilson")
+  window = kwargs.get("window", 1)
+
+  if EbNo <= 0: raise Exception("EbNo must be positive")
+  if estimator not in ("direct", "importance"): raise Exception("Estimator not supported")
+
+  constellation, labels, ones = constellationLabels(modulation)
+  bitsPerSymbol = ones.size.bit_length() - 1
+  No = modulation.model.energy_per_bit/EbNo
+  scale = None
+  if estimator == "importance": scale = kwargs.get("scale", None) or importanceScale(constellation, No)
+
+  # Around 64 bytes of temporary arrays per symbol (the nearest point search bounds its (chunk, M) arrays by itself)
+  chunkSize = max(1, int(memoryBudget // 64))
+  totalSymbols = -(-maxBits // bitsPerSymbol)
+  totalChunks = -(-totalSymbols // chunkSize)
+
+  def submit(chunk):
+    size = min(chunkSize, totalSymbols - chunk*chunkSize)
+    if executor is None: return size, countErrorsSeeded(constellation, labels, ones, No, size, chunkSeed(root, point, chunk), scale)
+    return size, executor.submit(countErrorsSeeded, constellation, labels, ones, No, size, chunkSeed(root, point, chunk), scale)
+
+  z = sps.norm.isf((1 - confidence)/2)
+  def importanceInterval(bitSum, bitSquares, symbols):
+    # Normal interval of the mean of the weighted errors per bit of each symbol
+    BER = bitSum/(symbols*bitsPerSymbol)
+    variance = max(0.0, bitSquares/(symbols*bitsPerSymbol**2) - BER**2)/symbols
+    return BER, variance, max(0.0, BER - z*math.sqrt(variance)), BER + z*math.sqrt(variance)
+
+  bitErrors = 0
+  symbolErrors = 0
+  bitSum = 0.0
+  bitSquares = 0.0
+  symbolSum = 0.0
+  symbols = 0
+  pending = collections.deque()
+  nextChunk = 0
+  while True:
+    while nextChunk < totalChunks and len(pending) < window:
+      pending.append(submit(nextChunk))
+      nextChunk += 1
+    if len(pending) == 0: break
+
+    size, result = pending.popleft()
+    if executor is not None: result = result.result()
+    symbols += size
+
+    if estimator == "direct":
+      bitErrors += result[0]
+      symbolErrors += result[1]
+      if bitErrors >= targetErrors: break
+      if relativeWidth is not None and bitErrors > 0:
+        lower, upper = utils.binomialConfidenceInterval(bitErrors, symbols*bitsPerSymbol, confidence, intervalMethod)
+        if (upper - lower)/(bitErrors/(symbols*bitsPerSymbol)) <= relativeWidth: break
+
+    else:
+      bitSum += result[0]
+      bitSquares += result[1]
+      symbolSum += result[2]
+      bitErrors += result[3]
+      symbolErrors += result[4]
+      BER, variance, lower, upper = importanceInterval(bitSum, bitSquares, symbols)
+      if BER > 0 and (upper - lower)/BER <= relativeWidth: break
+
+  # Chunks sent in advance that are not needed
+  for size, result in pending:
+    if executor is not None: result.cancel()
+
+  bits = symbols*bitsPerSymbol
+
+  if estimator == "direct":
+    lower, upper = utils.binomialConfidenceInterval(bitErrors, bits, confidence, intervalMethod)
+    return {
+      "BER": bitErrors/bits,
+      "lower": float(lower),
+      "upper": float(upper),
+      "Pe": symbolErrors/symbols,
+      "bitErrors": bitErrors,
+      "bits": bits,
+      "symbolErrors": symbolErrors,
+      "symbols": symbols
+    }
+
+  BER, variance, lower, upper = importanceInterval(bitSum, bitSquares, symbols)
+  return {
+    "BER": BER,
+    "lower": lower,
+    "upper": upper,
+    "Pe": symbolSum/symbols,
+    "bitErrors": bitErrors,
+    "bits": bits,
+    "symbolErrors": symbolErrors,
+    "symbols": symbols,
+    "scale": scale,
+    "varianceReduction": BER*(1 - BER)/bits/variance if variance > 0 else np.inf
+  }
+
+def rootSeed(seed):
+  """
+  Returns the root SeedSequence of a simulation from a seed or a SeedSequence
+  """
+  if isinstance(seed, np.random.SeedSequence): return seed
+  return np.random.SeedSequence(seed)
+
+def simulateBER(modulation, EbNo, **kwargs):
+  """
+  Estimates the BER and Pe of a modulation over an AWGN channel by Monte Carlo. The simulation stops when
+  the number of bit errors or the relative width of the confidence interval is reached, or when the
+  budget of bits runs out.
+
+  Every chunk uses its own stream spawned from the root seed, so for a given seed the result is the same
+  whatever the number of workers used.
+
+  Parameters:
+  * modulation -> The modulation element simulated
+  * EbNo -> Energy per bit to noise power spectral density ratio [bits/(s*Hz)]
+  * estimator -> How the errors are counted {direct, importance}. Importance sampling scales up the noise and
+    weights each error by its likelihood ratio, reaching very low BER (1e-10) with millions of symbols
+  * scale(?) -> Ratio between the biased and the real noise standard deviations, by default the nearest decision
+    boundaries are placed at 1.5 standard deviations of the biased noise (importance only)
+  * targetErrors -> Number of bit errors after which the simulation stops (direct only)
+  * relativeWidth(?) -> Width of the confidence interval relative to the BER after which the simulation stops,
+    0.1 by default for importance sampling, where the interval is the normal one of the weighted mean
+  * maxBits -> Maximun number of bits simulated
+  * memoryBudget -> Maximun memory used by each chunk, it fixes the number of symbols per chunk [bytes]
+  * confidence -> Confidence level of the intervals
+  * intervalMethod -> Interval used {"wilson", "clopperPearson"}
+  * seed(?) -> Seed or SeedSequence of the simulation, None for a random one
+  * workers -> Number of processes used, 1 simulates in this process, None uses all the cores
+
+  Returns:
+  * Dictionary:
+    - "BER" -> Bit error rate [bit errors/bit]
+    - "lower", "upper" -> Confidence interval of the BER
+    - "Pe" -> Symbol error rate [symbol errors/symbol]
+    - "bitErrors", "bits" -> Bit errors counted and bits simulated
+    - "symbolErrors", "symbols" -> Symbol errors counted and symbols simulated (with the biased noise for importance sampling)
+    - "scale" -> Scale of the noise used (importance only)
+    - "varianceReduction" -> Variance of a direct simulation with the same bits divided by the one obtained (importance only)
+  """
+  return simulateBERCurve(modulation, [EbNo], **kwargs)[0]
+
+def simulateBERCurve(modulation, EbNo, **kwargs):
+  """
+  Simulates several EbNo points sharing the same pool of processes, the chunks of each point are split
+  between the workers and their error counts merged exactly. Point i uses the streams spawned from the
+  root seed with key i, so simulateBER gives the same result as the first point of a curve.
+
+  Parameters:
+  * modulation -> The modulation element simulated
+  * EbNo -> Energy per bit to noise power spectral density ratios, list or array [bits/(s*Hz)]
+  * stopWithoutErrors -> If True the sweep stops after the first point without errors, so increasing EbNo
+    points beyond it do not spend the whole budget of bits each
+  * Any other parameter of simulateBER
+
+  Returns:
+  * results -> List with the dictionary of each point simulated, see simulateBER
+  """
+  workers = kwargs.get("workers", 1)
+  stopWithoutErrors = kwargs.get("stopWithoutErrors", False)
+  root = rootSeed(kwargs.get("seed", None))
+
+  if workers is None: workers = os.cpu_count() or 1
+  if workers < 1: raise Exception("The number of workers must be at least 1")
+
+  EbNo = np.atleast_1d(np.asarray(EbNo, dtype=float))
+
+  def simulateCurve(executor, **parameters):
+    results = []
+    for point, EbNo_point in enumerate(EbNo):
+      results.append(simulatePoint(modulation, EbNo_point, point, root, executor, **parameters))
+      if stopWithoutErrors and results[-1]["BER"] == 0: break
+    return results
+
+  if workers == 1: return simulateCurve(None, **kwargs)
+
+  # Two chunks per worker in flight keep every process busy while the results are consumed in order
+  parameters = {key: value for key, value in kwargs.items() if key != "window"}
+  with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as executor:
+    return simulateCurve(executor, window = 2*workers, **parameters)
@@ -0,0 +1,185 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  This file contains the lookup tables of the BER and Pe of the modulations, they are calculated once for
+  each configuration of a modulation element, stored in a compressed .npz file and evaluated with linear
+  interpolation of log10(BER) over EbNo.
+"""
+
+import os
+import hashlib
+import numpy as np
+import ComsChannelsSim.utils as utils
+import ComsChannelsSim.BERSimulation as BERSimulation
+
+# Changing it invalidates every table stored, it must be increased when the way they are built changes
+tableVersion = 4
+
+# Parameters accepted by getBERTable, besides the ones of the simulation
+tableParameterNames = ("EbNo_dB_min", "EbNo_dB_max", "step", "cacheDirectory", "simulationStep")
+
+# Tables already loaded, by key
+loadedTables = {}
+
+def defaultCacheDirectory():
+  """
+  Returns the directory where the tables are stored, the COMSCHANNELSSIM_CACHE environment variable overrides it
+  """
+  return os.environ.get("COMSCHANNELSSIM_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "ComsChannelsSim"))
+
+def tableKey(modulation, method, EbNo_dB_min, EbNo_dB_max, step, **kwargs):
+  """
+  Returns the key that identifies a table, it includes everything that changes the curve of the modulation,
+  for simulated tables also the parameters of the simulation (except the workers, that do not change it)
+  """
+  key = "v{}-{}-M{}-{}-A{!r}-P{!r}-{}-{!r}-{!r}-{!r}".format(tableVersion, modulation.modulation, modulation.M, modulation.labeling, float(modulation.amplitude), float(modulation.phase_offset), method, float(EbNo_dB_min), float(EbNo_dB_max), float(step))
+  if method == "simulated":
+    parameters = {name: kwargs[name] for name in BERSimulation.simulationParameterNames + ("simulationStep",) if name in kwargs and name != "workers"}
+    parameters.setdefault("simulationStep", 0.5)
+    key += "".join("-{}={!r}".format(name, parameters[name]) for name in sorted(parameters))
+  return key
+
+class berTable:
+  def __init__(self, EbNo_dB, logBER, logPe, key, method):
+    """
+    Lookup table of the BER and Pe of a modulation, use getBERTable to obtain them.
+
+    Parameters:
+    * EbNo_dB -> Uniform grid of EbNo of the table [dB]
+    * logBER -> log10 of the BER at each point of the grid
+    * logPe -> log10 of the Pe at each point of the grid
+    * key -> Key of the configuration of the table (See tableKey)
+    * method -> How the table was built {analytically, simulated}
+    """
+    self.EbNo_dB = EbNo_dB
+    self.logBER = logBER
+    self.logPe = logPe
+    self.key = key
+    self.method = method
+    self.step = EbNo_dB[1] - EbNo_dB[0]
+
+  def interpolate(self, values, EbNo_dB):
+    """
+    Interpolates log10 of a curve of the table, points outside of the table are returned as np.nan
+    """
+    shape = np.shape(EbNo_dB)
+    EbNo_dB = np.atleast_1d(np.asarray(EbNo_dB, dtype=float))
+
+    # The grid is uniform, so the interval of each point is obtained directly
+    position = np.clip((EbNo_dB - self.EbNo_dB[0])/self.step, 0, self.EbNo_dB.size - 1)
+    index = np.minimum(position.astype(np.intp), self.EbNo_dB.size - 2)
+    fraction = position - index
+    # Points on the grid use their own value, so a np.nan neighbour (outside of a simulated table) does not spread
+    with np.errstate(invalid="ignore"):
+      result = np.power(10.0, np.where(fraction == 0, values[index], values[index]*(1 - fraction) + values[index + 1]*fraction))
+
+    result[(EbNo_dB < self.EbNo_dB[0]) | (EbNo_dB > self.EbNo_dB[-1])] = np.nan
+    return result.reshape(shape)[()]
+
+  def BER(self, EbNo_dB):
+    """
+    Returns the interpolated BER, scalar or array [bit errors/s]
+    """
+    return self.interpolate(self.logBER, EbNo_dB)
+
+  def Pe(self, EbNo_dB):
+    """
+    Returns the interpolated Pe, scalar or array [symbol errors/s]
+    """
+    return self.interpolate(self.logPe, EbNo_dB)
+
+  def save(self, filename):
+    """
+    Stores the table in a compressed .npz file, it is written to a temporary file first so other processes never read it half written
+    """
+    temporary = "{}-{}.tmp.npz".format(filename[:-len(".npz")], os.getpid())
+    np.savez_compressed(temporary, EbNo_dB = self.EbNo_dB, logBER = self.logBER, logPe = self.logPe, key = self.key, method = self.method)
+    os.replace(temporary, filename)
+
+def loadTable(filename, key):
+  """
+  Loads a table from a .npz file, returns None if it does not exist or it was built for another configuration
+  """
+  if not os.path.exists(filename): return None
+  with np.load(filename) as data:
+    if str(data["key"]) != key: return None
+    return berTable(data["EbNo_dB"], data["logBER"], data["logPe"], str(data["key"]), str(data["method"]))
+
+def buildTable(modulation, method, EbNo_dB_min, EbNo_dB_max, step, **kwargs):
+  """
+  Calculates the table of a modulation. Simulated tables are calculated on a coarser grid (simulationStep)
+  and interpolated to the grid of the table, see BERSimulation.simulateBERCurve for the parameters of the simulation.
+  The sweep stops at the first point without errors, the points outside of the ones with errors are stored as
+  np.nan, so the table reports them as outside of it.
+  """
+  EbNo_dB = np.linspace(EbNo_dB_min, EbNo_dB_max, int(round((EbNo_dB_max - EbNo_dB_min)/step)) + 1)
+
+  if method == "analytically":
+    BER = modulation.get_BER_from_EbNo(EbNo_dB = EbNo_dB, method = "analytically")
+    Pe = modulation.get_Pe_from_BER(BER)
+
+  elif method == "simulated":
+    simulationStep = kwargs.get("simulationStep", 0.5)
+    parameters = {key: kwargs[key] for key in BERSimulation.simulationParameterNames if key in kwargs}
+    simulated_dB = np.linspace(EbNo_dB_min, EbNo_dB_max, int(round((EbNo_dB_max - EbNo_dB_min)/simulationStep)) + 1)
+    results = BERSimulation.simulateBERCurve(modulation, utils.LogarithmicToNatural(simulated_dB), stopWithoutErrors = True, **parameters)
+
+    # Points without errors between points with them are interpolated in log10, the ones outside are not known
+    simulatedBER = np.array([result["BER"] for result in results])
+    simulatedPe = np.array([result["Pe"] for result in results])
+    simulated_dB = simulated_dB[:len(results)]
+    valid = simulatedBER > 0
+    if np.count_nonzero(valid) < 2: raise Exception("Not enough errors were simulated to build the table")
+    outside = (EbNo_dB < simulated_dB[valid][0]) | (EbNo_dB > simulated_dB[valid][-1])
+    BER = np.where(outside, np.nan, np.power(10.0, np.interp(EbNo_dB, simulated_dB[valid], np.log10(simulatedBER[valid]))))
+    Pe = np.where(outside, np.nan, np.power(10.0, np.interp(EbNo_dB, simulated_dB[valid], np.log10(simulatedPe[valid]))))
+
+  else: raise Exception("Method not supported")
+
+  # The smallest positive double avoids log10(0) when the curves underflow, np.nan is kept
+  tiny = np.finfo(float).tiny
+  return berTable(EbNo_dB, np.log10(np.maximum(BER, tiny)), np.log10(np.maximum(Pe, tiny)), tableKey(modulation, method, EbNo_dB_min, EbNo_dB_max, step, **kwargs), method)
+
+def getBERTable(modulation, **kwargs):
+  """
+  Returns the table of a modulation element. It is looked up first in memory, then in the cache directory
+  and, if it is not found, it is calculated and stored.
+
+  Parameters:
+  * modulation -> The modulation element
+  * method -> How the table is built {analytically, simulated}, by default analytically if the modulation has a closed form
+  * EbNo_dB_min -> Lowest EbNo of the table [dB]
+  * EbNo_dB_max -> Highest EbNo of the table [dB]
+  * step -> Spacing between the points of the table [dB]
+  * cacheDirectory(?) -> Directory where the tables are stored, None to use defaultCacheDirectory, False to not store them
+  * Any parameter of BERSimulation.simulateBERCurve for simulated tables, and simulationStep
+
+  Returns:
+  * table -> The berTable of the modulation
+  """
+  method = kwargs.get("method", "analytically" if modulation.modulation in ("PSK", "DPSK", "FSK", "QAM", "PAM") else "simulated")
+  EbNo_dB_min = kwargs.get("EbNo_dB_min", -10.0)
+  EbNo_dB_max = kwargs.get("EbNo_dB_max", 40.0)
+  step = kwargs.get("step", 1e-3)
+  cacheDirectory = kwargs.get("cacheDirectory", None)
+
+  if EbNo_dB_min >= EbNo_dB_max: raise Exception("The minimun EbNo must be smaller than the maximun")
+
+  parameters = {key: kwargs[key] for key in BERSimulation.simulationParameterNames + ("simulationStep",) if key in kwargs}
+  key = tableKey(modulation, method, EbNo_dB_min, EbNo_dB_max, step, **parameters)
+  if key in loadedTables: return loadedTables[key]
+
+  if cacheDirectory is None: cacheDirectory = defaultCacheDirectory()
+  filename = os.path.join(cacheDirectory, "berTable-" + hashlib.sha1(key.encode()).hexdigest()[:16] + ".npz") if cacheDirectory is not False else None
+
+  table = loadTable(filename, key) if filename is not None else None
+  if table is None:
+    table = buildTable(modulation, method, EbNo_dB_min, EbNo_dB_max, step, **parameters)
+    if filename is not None:
+      os.makedirs(cacheDirectory, exist_ok = True)
+      table.save(filename)
+
+  loadedTables[key] = table
+  return table
@@ -8,12 +8,16 @@ Description:
 """
 
 import numpy as np
-import komm
 import math
-import matplotlib.pyplot as plt
-import cmath
 import ComsChannelsSim.utils as utils
 import ComsChannelsSim.Gaussian as Gaussian
+import ComsChannelsSim.Solvers as solvers
+import ComsChannelsSim.Diffraction as diffraction
+import ComsChannelsSim.LinkBudget as LinkBudget
+import ComsChannelsSim.Shadowing as shadowing
+
+komm = utils.lazyModule("komm")
+plt = utils.lazyModule("matplotlib.pyplot")
 
 class channelElement:
   def __init__(self, type, **kwargs):
@@ -23,6 +27,7 @@ class channelElement:
     * snr -> The signal to noise ratio (Natural units)
     * signal power -> The transmitted signal power
     * band -> The type of band used by the channel {BB, PB}
+    * seed -> Seed or numpy SeedSequence of the random generator of the channel, None for a random one
     """
 
     self.type = type
@@ -33,19 +38,20 @@ class channelElement:
     self.transitionMatrix = kwargs.get("transitionMatrix", None)
     self.crossoverProbability = kwargs.get("crossoverProbability", 0.0)
     self.erasureProbability = kwargs.get("erasureProbability", 0.0)
+    self.rng = np.random.default_rng(kwargs.get("seed", None))
 
     # Completing the parameters if possible
     if self.snr != np.inf and self.noisePower != 0.0:
       self.signalPower = self.snr * self.noisePower
     
-    elif self.snr != np.inf and self.signalPower != 1.0:
+    elif self.snr != np.inf:
       self.noisePower = self.signalPower / self.snr
     
     elif self.signalPower != 1.0 and self.noisePower != 0.0:
       self.snr = self.signalPower / self.noisePower
 
     # Violations
-    if self.type == "DMC" and self.transitionMatrix == None: raise Exception("Transition matrix parameter is missing")
+    if self.type == "DMC" and self.transitionMatrix is None: raise Exception("Transition matrix parameter is missing")
 
     if self.type == "AWGN": self.model = komm.AWGNChannel(self.snr, self.signalPower)
     elif self.type == "DMC": self.model = komm.DiscreteMemorylessChannel(self.transitionMatrix)
@@ -61,25 +67,113 @@ class channelElement:
   def getCapacity(self):
     return self.model.capacity()
   
-  def generateNoise(self, N):
-    if self.type == "AWGN":
-      if self.band == "BB":
-        noise = [math.sqrt(self.noisePower/2) * random.random() for it in range(N)]
-      
-      elif self.band == "PB":
-        noise_I = [math.sqrt(self.noisePower/2) * random.random() for it in range(N)]
-        noise_Q = [math.sqrt(self.noisePower/2) * random.random() for it in range(N)]
-        noise = [complex(noise_I[it], noise_Q[it]) for it in range(N)]
+  def generateNoise(self, N, **kwargs):
+    """
+    Generates gaussian noise samples for the channel, each real dimension has a variance of noisePower/2.
+    Baseband channels produce real noise, passband channels produce complex noise (I + jQ).
+
+    Parameters:
+    * N -> Number of samples to generate
+    * dtype -> Precision of the samples {np.float64, np.float32}, single precision halves the memory used
+    * rng(?) -> numpy Generator used, by default the one of the channel, so consecutive calls continue the same stream
+
+    Returns:
+    * noise -> Array of N noise samples
+    """
+    if self.type != "AWGN": raise Exception("Noise can only be generated for AWGN channels")
+
+    rng = kwargs.get("rng", self.rng)
+    realType = np.finfo(kwargs.get("dtype", np.float64)).dtype # Real type even if a complex one is provided
+    deviation = math.sqrt(self.noisePower/2)
+
+    if self.band == "BB":
+      noise = rng.standard_normal(N, dtype=realType)
+
+    elif self.band == "PB":
+      # Both components are drawn at once and read as complex numbers without copying
+      noise = rng.standard_normal((N, 2), dtype=realType).view(np.result_type(realType, np.complex64))[:, 0]
 
+    else: raise Exception("Band not supported")
+
+    noise *= deviation
     return noise
+
+  def generateNoiseBlocks(self, N = None, blockSize = 1 << 20, **kwargs):
+    """
+    Generator that yields the noise in blocks of fixed size, for sequences that do not fit in memory.
+
+    Parameters:
+    * N -> Total number of samples, None to generate blocks indefinitely
+    * blockSize -> Number of samples of each block, the last one can be smaller
+    * The rest of parameters of generateNoise
+
+    Yields:
+    * noise -> Array of at most blockSize noise samples
+    """
+    generated = 0
+    while N is None or generated < N:
+      size = blockSize if N is None else min(blockSize, N - generated)
+      yield self.generateNoise(size, **kwargs)
+      generated += size
+
+  def transmitBlock(self, block, **kwargs):
+    """
+    Passes one block of symbols or bits through the channel.
+
+    Parameters:
+    * block -> Array of symbols (AWGN) or of input symbols indexes (BSC, BEC, DMC)
+    * dtype -> Precision of the noise for AWGN channels {np.float64, np.float32}
+
+    Returns:
+    * output -> Array with the channel output, erasures in BEC channels are marked as -1
+    """
+    block = np.asarray(block)
+    rng = self.rng
+
+    if self.type == "AWGN":
+      return block + self.generateNoise(block.size, **kwargs).reshape(block.shape)
+
+    elif self.type == "BSC":
+      return np.where(rng.random(block.shape) < self.crossoverProbability, 1 - block, block)
+
+    elif self.type == "BEC":
+      # Signed type so the erasures can be marked
+      return np.where(rng.random(block.shape) < self.erasureProbability, -1, block.astype(np.result_type(block.dtype, np.int8)))
+
+    elif self.type == "DMC":
+      # Inverse transform sampling of the row of each input symbol
+      cumulative = np.cumsum(np.asarray(self.transitionMatrix, dtype=float), axis=1)
+      uniform = rng.random(block.shape)
+      return (uniform[..., np.newaxis] >= cumulative[block][..., :-1]).sum(axis=-1)
+
+    else: raise Exception("Channel type does not support transmission")
+
+  def transmit(self, blocks, **kwargs):
+    """
+    Generator that passes a stream of blocks through the channel, one block at a time, so the memory used does
+    not depend on the length of the stream. The random stream of the channel continues from block to block,
+    so splitting the input in different blocks does not change the statistics of the output.
+
+    Parameters:
+    * blocks -> Iterable of arrays of symbols (AWGN) or bits / input symbols (BSC, BEC, DMC), a single array is treated as one block
+    * The rest of parameters of transmitBlock
+
+    Yields:
+    * output -> The channel output of each block
+    """
+    if isinstance(blocks, np.ndarray): blocks = (blocks,)
+
+    for block in blocks:
+      yield self.transmitBlock(block, **kwargs)
   
-  def friisAttenuation(self, distance, **kwargs):
+  @staticmethod
+  def friisAttenuation(distance, **kwargs):
     """
     Calculates the attenuation to the transmission produced by the propagation of the signal,
     it uses the friis formula to do so.
 
     Parameters:
-    * distance -> The distance between the point of emission and the point to calculate attenuation [m]
+    * distance -> The distance between the point of emission and the point to calculate attenuation, scalar or array [m]
     * wavelength -> The wavelength of the signal being transmitted [m]
     * n -> Pathloss exponent [No units]
 
@@ -89,17 +183,22 @@ class channelElement:
     wavelength = kwargs.get("wavelength", None)
     n = kwargs.get("n", 2)
 
-    if wavelength == None or distance == None: raise Exception("Parameters missing")
+    if wavelength is None or distance is None: raise Exception("Parameters missing")
+
+    distance = np.asarray(distance, dtype=float)
+    wavelength = np.asarray(wavelength, dtype=float)
+    n = np.asarray(n, dtype=float)
 
-    return utils.NaturalToLogarithmic(math.pow((4*math.pi*distance)/(wavelength), n)) # Friis formula to obtain attenuation in dB
+    return 10*n*np.log10((4*np.pi*distance)/wavelength) # Friis formula to obtain attenuation in dB
   
-  def hataUrbanAttenuation(self, distance, **kwargs):
+  @staticmethod
+  def hataUrbanAttenuation(distance, **kwargs):
     """
     Calculates the attenuation to the transmission produced by the propagation of the signal in urban areas, 
     it uses the Okumura-Hata model to do so.
 
     Parameters:
-    * distance -> The distance between the point of emission and the point to calculate attenuation [m]
+    * distance -> The distance between the point of emission and the point to calculate attenuation, scalar or array [m]
     * baseHeight -> The height of the base estation antenna, recommended from 30 to 200m [m]
     * mobileHeight -> The height of the mobile station antenna, recommended from 1 to 10m [m]
     * frequency -> The frequency used in the transmission, recommended from 150 to 1500MHz [MHz]
@@ -116,23 +215,30 @@ class channelElement:
     mobileHeight = kwargs.get("mobileHeight", None)
     frequency = kwargs.get("frequency", None)
     correctionFactorApplied = kwargs.get("correctionFactorApplied", "Small-Medium city")
-    if baseHeight == None or mobileHeight == None or frequency == None or distance == None: raise Exception("Parameters missing")
+    if baseHeight is None or mobileHeight is None or frequency is None or distance is None: raise Exception("Parameters missing")
+
+    distance = np.asarray(distance, dtype=float)
+    baseHeight = np.asarray(baseHeight, dtype=float)
+    mobileHeight = np.asarray(mobileHeight, dtype=float)
+    frequency = np.asarray(frequency, dtype=float)
 
-    if correctionFactorApplied == "Small-Medium city": correctionFactor = 0.8 + (1.1*math.log(frequency, 10)-0.7)*mobileHeight-1.56*math.log(frequency, 10)
+    if correctionFactorApplied == "Small-Medium city": correctionFactor = 0.8 + (1.1*np.log10(frequency)-0.7)*mobileHeight-1.56*np.log10(frequency)
     elif correctionFactorApplied == "Large city":
-      if frequency <= 200: correctionFactor = 8.29*math.pow(math.log(1.54*mobileHeight, 10), 2)-1.1
-      elif frequency > 200: correctionFactor = 3.2*math.pow(math.log(11.75*mobileHeight, 10), 2)-4.97
-      else: raise Exception("Unexpected exception, too bad")
+      correctionFactor = np.where(frequency <= 200,
+                                  8.29*np.power(np.log10(1.54*mobileHeight), 2)-1.1,
+                                  3.2*np.power(np.log10(11.75*mobileHeight), 2)-4.97)
+    else: raise Exception("Correction factor not supported")
 
-    return 69.55+26.16*math.log(frequency, 10)-13.82*math.log(baseHeight, 10)-correctionFactor+(44.9-6.55*math.log(baseHeight, 10))*math.log(distance/1000.0, 10)
+    return 69.55+26.16*np.log10(frequency)-13.82*np.log10(baseHeight)-correctionFactor+(44.9-6.55*np.log10(baseHeight))*np.log10(distance/1000.0)
   
-  def hataSuburbanAttenuation(self, distance, **kwargs):
+  @staticmethod
+  def hataSuburbanAttenuation(distance, **kwargs):
     """
     Calculates the attenuation to the transmission produced by the propagation of the signal in suburban areas, 
     it uses the Okumura-Hata model to do so.
 
     Parameters:
-    * distance -> The distance between the point of emission and the point to calculate attenuation [m]
+    * distance -> The distance between the point of emission and the point to calculate attenuation, scalar or array [m]
     * baseHeight -> The height of the base estation antenna, recommended from 30 to 200m [m]
     * mobileHeight -> The height of the mobile station antenna, recommended from 1 to 10m [m]
     * frequency -> The frequency used in the transmission, recommended from 150 to 1500MHz [MHz]
@@ -145,17 +251,20 @@ class channelElement:
     mobileHeight = kwargs.get("mobileHeight", None)
     frequency = kwargs.get("frequency", None)
 
-    if baseHeight == None or mobileHeight == None or frequency == None or distance == None: raise Exception("Parameters missing")
+    if baseHeight is None or mobileHeight is None or frequency is None or distance is None: raise Exception("Parameters missing")
 
-    return self.hataUrbanAttenuation(distance, baseHeight, mobileHeight, frequency) - 2*math.pow(math.log(frequency/28, 10), 2) - 5.4
+    frequency = np.asarray(frequency, dtype=float)
+
+    return channelElement.hataUrbanAttenuation(distance, **kwargs) - 2*np.power(np.log10(frequency/28), 2) - 5.4
   
-  def hataOpenAttenuation(self, distance, **kwargs):
+  @staticmethod
+  def hataOpenAttenuation(distance, **kwargs):
     """
     Calculates the attenuation to the transmission produced by the propagation of the signal in opem areas, 
     it uses the Okumura-Hata model to do so.
 
     Parameters:
-    * distance -> The distance between the point of emission and the point to calculate attenuation [m]
+    * distance -> The distance between the point of emission and the point to calculate attenuation, scalar or array [m]
     * baseHeight -> The height of the base estation antenna, recommended from 30 to 200m [m]
     * mobileHeight -> The height of the mobile station antenna, recommended from 1 to 10m [m]
     * frequency -> The frequency used in the transmission, recommended from 150 to 1500MHz [MHz]
@@ -168,11 +277,14 @@ class channelElement:
     mobileHeight = kwargs.get("mobileHeight", None)
     frequency = kwargs.get("frequency", None)
 
-    if baseHeight == None or mobileHeight == None or frequency == None or distance == None: raise Exception("Parameters missing")
+    if baseHeight is None or mobileHeight is None or frequency is None or distance is None: raise Exception("Parameters missing")
+
+    frequency = np.asarray(frequency, dtype=float)
 
-    return self.hataUrbanAttenuation(distance, baseHeight, mobileHeight, frequency) - 4.78*math.pow(math.log(frequency, 10), 2) + 18.33*math.log(frequency, 10) - 40.94
+    return channelElement.hataUrbanAttenuation(distance, **kwargs) - 4.78*np.power(np.log10(frequency), 2) + 18.33*np.log10(frequency) - 40.94
 
-  def acusticAttenuation(self, distance, **kwargs): # NOT WORKING
+  @staticmethod
+  def acusticAttenuation(distance, **kwargs): # NOT WORKING
     """
     Calculates the attenuation to the transmission produced by an acustic channel.
 
@@ -194,32 +306,16 @@ class channelElement:
     Returns the attenuation that is related to the fresnel diffraction parameter.
 
     Parameters:
-    * v -> Fresnel difraction parameter
+    * v -> Fresnel difraction parameter, scalar or array
+    * Fbase -> Complex field used as reference, by default the unobstructed field (|F| = 1)
 
     Returns:
     * Adiff -> The attenuation by diffraction [dB]
     """
-    F = 0
-    if Fbase != None:
-      v_vector = np.arange(-5, 95, 0.01)
-      new_v_vector = []
-      for nv in range(v_vector.size):
-        new_v_vector.append(cmath.exp(complex(0, -1)*math.pi*(v_vector[nv]**2)/2))
+    F = diffraction.fresnelAttenuation(v)
+    if Fbase is not None: F = F + 20*np.log10(abs(Fbase))
 
-      F0 = (complex(1, 1)/2)*np.sum(new_v_vector)
-
-    else:
-      F0 = Fbase
-
-    v_vector = np.arange(v, v+100, 0.01)
-    new_v_vector = []
-    for nv in range(v_vector.size):
-      new_v_vector.append(cmath.exp(complex(0, -1)*math.pi*(v_vector[nv]**2)/2))
-
-    F = (complex(1, 1)/2)*np.sum(new_v_vector)
-    F = 2*utils.NaturalToLogarithmic(abs(F)/abs(F0))
-
-    return F*-1 # To convert it to attenuation
+    return F
 
   def diffractionAttenuation(self, txDistanceObject, rxDistanceObject, relativeHeight, wavelength):
     """
@@ -239,12 +335,13 @@ class channelElement:
     fresnelParameter = relativeHeight*math.sqrt((2*(txDistanceObject+rxDistanceObject))/(wavelength*txDistanceObject*rxDistanceObject))
     return self.fresnelToAttenuation(fresnelParameter)
   
-  def lossAttenuation(self, distance, **kwargs):
+  @staticmethod
+  def lossAttenuation(distance, **kwargs):
     """
     Calculates the loss attenuation at a given distance using a specific model
 
     Parameters:
-    * distance -> The distance of the receiver from the transmitter [m]
+    * distance -> The distance of the receiver from the transmitter, scalar or array [m]
     * lossModel -> The model we want to use to calculate path loss attenuation {"friis", "hataUrban", "hataSuburban", "hataOpen"}
     * If friis:
       - wavelength -> The wavelength of the signal being transmitted [m]
@@ -265,87 +362,92 @@ class channelElement:
 
     * If acusticChannel
       - 
+
+    All the numeric parameters of the models accept numpy arrays, which are broadcast against each other.
     """
     lossModel = kwargs.get("lossModel", None)
     if lossModel == None: raise Exception("Loss model parameter is missing")
 
     lossAttenuation = 0
 
-    if lossModel == "friis": lossAttenuation = self.friisAttenuation(distance, **kwargs)
-    elif lossModel == "hataUrban": lossAttenuation = self.hataUrbanAttenuation(distance, **kwargs)
-    elif lossModel == "hataSuburban": lossAttenuation = self.hataSuburbanAttenuation(distance, **kwargs)
-    elif lossModel == "hataOpen": lossAttenuation = self.hataOpenAttenuation(distance, **kwargs)
-    elif lossModel == "acusticChannel": raise Exception("Model is not working")# lossAttenuation = self.acusticAttenuation(distance, **kwargs)
+    if lossModel == "friis": lossAttenuation = channelElement.friisAttenuation(distance, **kwargs)
+    elif lossModel == "hataUrban": lossAttenuation = channelElement.hataUrbanAttenuation(distance, **kwargs)
+    elif lossModel == "hataSuburban": lossAttenuation = channelElement.hataSuburbanAttenuation(distance, **kwargs)
+    elif lossModel == "hataOpen": lossAttenuation = channelElement.hataOpenAttenuation(distance, **kwargs)
+    elif lossModel == "acusticChannel": raise Exception("Model is not working")# lossAttenuation = channelElement.acusticAttenuation(distance, **kwargs)
     else: raise Exception("Loss model not supported")
 
     return lossAttenuation
 
-  def calculateDifractionAttenuationFresnel(self, fresnelParameter):
+  def calculateDifractionAttenuationFresnel(self, fresnelParameter, **kwargs):
+    """
+    Calculates the knife edge attenuation of a fresnel parameter, using the Fresnel integrals.
 
-    v_vector = np.arange(-4, -4+100, 0.01)
-    new_v_vector = []
-    for nv in range(v_vector.size):
-      new_v_vector.append(cmath.exp(complex(0, -1)*math.pi*(v_vector[nv]**2)/2))
-    difractionAttenuationBase = (complex(1, 1)/2)*np.sum(new_v_vector)
-        
-    v_vector = np.arange(fresnelParameter, fresnelParameter+100, 0.01)
-    new_v_vector = []
-    for nv in range(v_vector.size):
-      new_v_vector.append(cmath.exp(complex(0, -1)*math.pi*(v_vector[nv]**2)/2))
+    Parameters:
+    * fresnelParameter -> Fresnel difraction parameter, scalar or array
+    * method -> How the attenuation is obtained {"exact", "table"}, the table is faster for large arrays (See Diffraction.fresnelTable)
 
-    difractionAttenuation = (complex(1, 1)/2)*np.sum(new_v_vector)
-    if fresnelParameter != -4: difractionAttenuation = -2*utils.NaturalToLogarithmic(abs(difractionAttenuation)/abs(difractionAttenuationBase))
-    else: difractionAttenuation = 2*utils.NaturalToLogarithmic(1)
+    Returns:
+    * Adiff -> The attenuation by diffraction [dB]
+    """
+    method = kwargs.get("method", "exact")
 
-    return difractionAttenuation
+    if method == "exact": return diffraction.fresnelAttenuation(fresnelParameter)
+    elif method == "table": return diffraction.fresnelAttenuationTable(fresnelParameter)
+    else: raise Exception("Method not supported")
 
   def diffractionAttenuation(self, **kwargs):
+    """
+    Calculates the attenuation produced by a knife edge obstacle in the path of the comunication.
+
+    Parameters:
+    * tx_distance -> The distance between the transmitter and the obstacle, scalar or array [m]
+    * rx_distance -> The distance between the receiver and the obstacle, scalar or array [m]
+    * distance_to_peak -> The height of the peak over the line of sight, below the peak is greater than 0, scalar or array [m]
+    * wavelength -> The wavelength of the signal being transmitted [m]
+    * method -> How the attenuation is obtained {"exact", "table"}, by default the cached table
+
+    Returns:
+    * Adiff -> The attenuation losses by diffraction [dB]
+    """
 
     rx_distance = kwargs.get("rx_distance", None)
-    if rx_distance == None: raise Exception("Rx distance parameter is missing")
+    if rx_distance is None: raise Exception("Rx distance parameter is missing")
 
     tx_distance = kwargs.get("tx_distance", None)
-    if tx_distance == None: raise Exception("Tx distance parameter is missing")
+    if tx_distance is None: raise Exception("Tx distance parameter is missing")
 
     distance_to_peak = kwargs.get("distance_to_peak", None) # Below the peak is greater than 0, above the peak is smaller than 0
-    if distance_to_peak == None: raise Exception("Distance to peak parameter is missing")
+    if distance_to_peak is None: raise Exception("Distance to peak parameter is missing")
 
     wavelength = kwargs.get("wavelength", None)
-    if wavelength == None: raise Exception("Wavelength parameter is missing")
+    if wavelength is None: raise Exception("Wavelength parameter is missing")
 
-    fresnelParameter = distance_to_peak*math.sqrt((2*(tx_distance+rx_distance))/(wavelength*tx_distance*rx_distance))
-    return self.calculateDifractionAttenuationFresnel(fresnelParameter)
+    method = kwargs.get("method", "table")
 
-  def calculateDistance_attenuation(self, **kwargs):
+    rx_distance = np.asarray(rx_distance, dtype=float)
+    tx_distance = np.asarray(tx_distance, dtype=float)
+    fresnelParameter = distance_to_peak*np.sqrt((2*(tx_distance+rx_distance))/(wavelength*tx_distance*rx_distance))
+    return self.calculateDifractionAttenuationFresnel(fresnelParameter, method = method)
 
-    attenuation_objetive = kwargs.get("attenuation_objetive", None)
-    if attenuation_objetive == None: raise Exception("Loss model parameter is missing")
-
-    ndigits = kwargs.get("ndigits", 9)
-
-    attenuation = -1
-    distance_testing = 1
-    factor = 100.0
-    prev_action = 0 # 0 stands for distance inc, 1 stands for distance dec
-    action = 0
-    while round(attenuation_objetive, ndigits) != round(attenuation, ndigits):
-      # Calculating the new loss attenuation
-      attenuation = self.lossAttenuation(distance = distance_testing, **kwargs)
-      #print("For length {}, we have attenuation {}, with received power {}".format(distance_testing, self.totalAttenuation, receivedPower))
+  def calculateDistance_attenuation(self, **kwargs):
+    """
+    Calculates the distance at which the loss model reaches the attenuation provided. Friis and Hata
+    models are inverted analytically, the rest are solved with a bracketed search.
 
-      # Calculating the new distance
-      if attenuation_objetive > attenuation:
-        action = 0
-        distance_testing += factor
+    Parameters:
+    * attenuation_objetive -> The loss attenuation to reach, scalar or array [dB]
+    * lossModel -> The model we want to use to calculate path loss attenuation {"friis", "hataUrban", "hataSuburban", "hataOpen"}
+    * The parameters of the loss model, see lossAttenuation
 
-      else:
-        action = 1
-        distance_testing -= factor
+    Returns:
+    * distance -> The distance obtained, same shape as attenuation_objetive [m]
+    """
 
-      if action == 1 and prev_action == 0: factor /= 10.0
-      prev_action = action
+    attenuation_objetive = kwargs.pop("attenuation_objetive", None)
+    if attenuation_objetive is None: raise Exception("Attenuation objetive parameter is missing")
 
-    return distance_testing
+    return solvers.invertLossAttenuation(self.lossAttenuation, attenuation_objetive, **kwargs)
   
   def addAttenuation(self, **kwargs):
     """
@@ -403,6 +505,24 @@ class channelElement:
 
     self.totalGain_dB = gain_dB
   
+  def getLinkBudget(self, **kwargs):
+    """
+    Returns an immutable snapshot of the gains and attenuations added to the channel, that can be
+    evaluated without modifying the channel (See LinkBudget.linkBudget).
+
+    Parameters:
+    * lossModel(?) -> The model used to calculate path loss attenuation {"friis", "hataUrban", "hataSuburban", "hataOpen"}
+    * The parameters of the loss model, see lossAttenuation
+
+    Returns:
+    * linkBudget -> The link budget of the channel
+    """
+    budget = LinkBudget.linkBudget(totalGain_dB = self.totalGain_dB, totalAttenuation_dB = self.totalAttenuation_dB)
+    lossModel = kwargs.get("lossModel", None)
+    if lossModel != None: budget = budget.setLossModel(**kwargs)
+
+    return budget
+
   def calculateRecivedPower(self, **kwargs):
     """
     Calculates the received power with a given transmitted power, all attenuations and gains must have been added previously
@@ -437,6 +557,31 @@ class channelElement:
 
     return receivedPower_dB - self.totalGain_dB + self.totalAttenuation_dB
   
+  @staticmethod
+  def shadowingParameters(parameters):
+    """
+    Returns the parameters that are passed to Shadowing.simulateDisponibility
+    """
+    return {key: parameters[key] for key in ("samples", "correlation", "memoryBudget", "confidence", "intervalMethod", "seed") if key in parameters}
+
+  def simulateDisponibility(self, receivedPower_dB, sensitivity_dB, standardDeviation_dB, parameters, complementary = False):
+    """
+    Estimates the disponibility of the channel by Monte Carlo (See Shadowing.simulateDisponibility)
+
+    Parameters:
+    * parameters -> The keyword parameters of the calling method, with the ones of the simulation and interval
+    * complementary -> If True the probability that the channel does not work is returned instead
+
+    Returns:
+    * probability -> The estimated probability, or (probability, lower, upper) if interval is True
+    """
+    results = shadowing.simulateDisponibility(receivedPower_dB, sensitivity_dB, standardDeviation_dB, **self.shadowingParameters(parameters))
+    probability, lower, upper = results["disponibility"][0], results["lower"][0], results["upper"][0]
+    if complementary: probability, lower, upper = 1 - probability, 1 - upper, 1 - lower
+
+    if parameters.get("interval", False): return probability, lower, upper
+    return probability
+
   def calculateDisponibility(self, **kwargs):
     """
     Calculating the disponibility of the channel. The probability that it works
@@ -445,6 +590,9 @@ class channelElement:
     * receivedPower -> The recived power at a distance from the transmitter [W] or [dB]
     * sensitivity -> The sensitivity the receptor has [W] or [dB]
     * standardDeviation -> The standard deviation of the gaussian error that is in the attenuation of the channel [dB]
+    * method -> Method to perform the calculations. Options: {simulated, analytically}, the simulated one accepts the
+      parameters of Shadowing.simulateDisponibility (samples, seed, ...)
+    * interval -> If True the simulated method also returns the lower and upper limits of the confidence interval
 
     Returns:
     * disponibility -> The disponibility of the comunication taking into account the attenuation error model
@@ -462,8 +610,14 @@ class channelElement:
     standardDeviation = kwargs.get("standardDeviation", None)
     if standardDeviation == None: raise Exception("Standard deviation parameter is missing")
 
+    method = kwargs.get("method", "analytically")
+
+    if method == "simulated": return self.simulateDisponibility(receivedPower_dB, sensitivity_dB, standardDeviation, kwargs)
+    elif method != "analytically": raise Exception("Method not supported")
+
+    # The channel works while the received power with the shadowing is above the sensitivity
     errorModel = Gaussian.Gaussian(receivedPower_dB, math.pow(standardDeviation, 2))
-    return errorModel.probabilityNormalizedRange(max = sensitivity_dB)
+    return errorModel.probabilityNormalizedRange(min = sensitivity_dB)
 
   def calculateReceivedPower_disponibility(self, **kwargs):
 
@@ -504,6 +658,9 @@ class channelElement:
     * receivedPower -> The recived power at a distance from the transmitter [W] or [dB]
     * sensitivity -> The sensitivity the receptor has [W] or [dB]
     * standardDeviation -> The standard deviation of the gaussian error that is in the attenuation of the channel [dB]
+    * method -> Method to perform the calculations. Options: {simulated, analytically}, the simulated one accepts the
+      parameters of Shadowing.simulateDisponibility (samples, seed, ...)
+    * interval -> If True the simulated method also returns the lower and upper limits of the confidence interval
 
     Returns:
     * disponibility -> The disponibility of the comunication taking into account the attenuation error model
@@ -521,8 +678,14 @@ class channelElement:
     standardDeviation = kwargs.get("standardDeviation", None)
     if standardDeviation == None: raise Exception("Standard deviation parameter is missing")
 
+    method = kwargs.get("method", "analytically")
+
+    if method == "simulated": return self.simulateDisponibility(receivedPower_dB, sensitivity_dB, standardDeviation, kwargs, complementary = True)
+    elif method != "analytically": raise Exception("Method not supported")
+
+    # The channel fails when the received power with the shadowing falls below the sensitivity
     errorModel = Gaussian.Gaussian(receivedPower_dB, math.pow(standardDeviation, 2))
-    return errorModel.probabilityNormalizedRange(min = sensitivity_dB)
+    return errorModel.probabilityNormalizedRange(max = sensitivity_dB)
   
   def calculateLinkMargin(self, **kwargs):
     """
@@ -555,6 +718,9 @@ class channelElement:
     * transmittedPower -> The transmitted power by the transmitting station [W] or [dB]
     * sensitivity -> The sensitivity the receptor has [W] or [dB]
     * standardDeviation_dB -> The standard deviation of the gaussian error that is in the attenuation of the channel [dB]
+    * method -> Method to perform the calculations. Options: {simulated, analytically}, the simulated one accepts the
+      parameters of Shadowing.simulateDisponibility (samples, seed, ...)
+    * interval -> If True the simulated method also returns the lower and upper limits of the confidence interval
 
     Returns:
     * reachProbability -> The probability that can be achieved [%]
@@ -574,19 +740,24 @@ class channelElement:
     
     # All attenuations of path loss must have been added previous to this
     receivedPower_dB = self.calculateRecivedPower(transmittedPower_dB = transmittedPower_dB)
+
+    method = kwargs.get("method", "analytically")
+    if method == "simulated": return self.simulateDisponibility(receivedPower_dB, sensitivity_dB, standardDeviation_dB, kwargs, complementary = True)
+    elif method != "analytically": raise Exception("Method not supported")
+
     errorModel = Gaussian.Gaussian(receivedPower_dB, math.pow(standardDeviation_dB, 2))
     #print("Received power {}, sensitivity {}".format(receivedPower_dB, sensitivity_dB))
-    if receivedPower_dB < sensitivity_dB: errorProbability = 0.5
-    else: errorProbability = errorModel.probabilityNormalizedRange(min = sensitivity_dB)
+    errorProbability = errorModel.probabilityNormalizedRange(max = sensitivity_dB)
     return errorProbability
   
   def calculateDistance_sensitivity(self, **kwargs):
     """
     Distance maximun taking into account only the sensitivity, the power received must be the same as the sensitivity.
+    All non path loss attenuations and gains must have been added prevous to this method.
 
     Parameters:
     * transmittedPower -> The transmitted power by the transmitting station [W] or [dB]
-    * sensitivity -> The sensitivity the receptor has [W] or [dB]
+    * sensitivity -> The sensitivity the receptor has, scalar or array [W] or [dB]
     * lossModel -> The model we want to use to calculate path loss attenuation {"friis", "hataUrban", "hataSuburban", "hataOpen"}
     * If friis:
       - wavelength -> The wavelength of the signal being transmitted [m]
@@ -606,54 +777,22 @@ class channelElement:
       - frequency -> The frequency used in the transmission, recommended from 150 to 1500MHz [MHz]
     
     Returns:
-    * distance -> The distance obtained [m]
+    * distance -> The distance obtained, same shape as the sensitivity [m]
     """
     transmittedPower = kwargs.get("transmittedPower", None)
     transmittedPower_dB = kwargs.get("transmittedPower_dB", None)
-    if transmittedPower_dB == None and transmittedPower != None: transmittedPower_dB = utils.NaturalToLogarithmic(transmittedPower)
-    elif transmittedPower_dB == None and transmittedPower == None: raise Exception("Transmitted power parameter is missing")
+    if transmittedPower_dB is None and transmittedPower is not None: transmittedPower_dB = utils.NaturalToLogarithmic(transmittedPower)
+    elif transmittedPower_dB is None and transmittedPower is None: raise Exception("Transmitted power parameter is missing")
 
     sensitivity = kwargs.get("sensitivity", None)
     sensitivity_dB = kwargs.get("sensitivity_dB", None)
-    if sensitivity_dB == None and sensitivity != None: sensitivity_dB = utils.NaturalToLogarithmic(sensitivity)
-    elif sensitivity_dB == None and sensitivity == None: raise Exception("Sensitivity parameter is missing")
+    if sensitivity_dB is None and sensitivity is not None: sensitivity_dB = utils.NaturalToLogarithmic(sensitivity)
+    elif sensitivity_dB is None and sensitivity is None: raise Exception("Sensitivity parameter is missing")
 
     lossModel = kwargs.get("lossModel", None)
     if lossModel == None: raise Exception("Loss model parameter is missing")
 
-    ndigits = kwargs.get("ndigits", 9)
-
-    standardAttenuation_dB = self.totalAttenuation_dB
-    # print("Base attenuation: {:.2f}dB".format(standardAttenuation_dB))
-
-    receivedPower_dB = -1
-    distance_testing = 1
-    factor = 1000.0
-    prev_action = 0 # 0 stands for distance inc, 1 stands for distance dec
-    action = 0
-    while round(sensitivity_dB, ndigits) != round(receivedPower_dB, ndigits):
-      # Calculating the new loss attenuation
-      self.setAttenuations(attenuation_dB = standardAttenuation_dB)
-      self.addAttenuation(attenuation_dB = self.lossAttenuation(distance = distance_testing, **kwargs))
-      receivedPower_dB = self.calculateRecivedPower(transmittedPower_dB = transmittedPower_dB)
-      # print("For length {}m, we have attenuation {}dB, with received power {}dB".format(distance_testing, self.totalAttenuation_dB, receivedPower_dB))
-
-      # Calculating the new distance
-      if receivedPower_dB > sensitivity_dB:
-        action = 0
-        distance_testing += factor
-
-      else:
-        action = 1
-        distance_testing -= factor
-
-      if action == 1 and prev_action == 0: factor /= 10.0
-      prev_action = action
-    
-    # Resetting the attenuation to the begining
-    self.setAttenuations(attenuation_dB = standardAttenuation_dB)
-
-    return distance_testing
+    return self.getLinkBudget(**kwargs).calculateDistance_sensitivity(transmittedPower_dB, sensitivity_dB)
   
   def calculateDistance_reachProbability(self, **kwargs):
     """
@@ -705,37 +844,7 @@ class channelElement:
     lossModel = kwargs.get("lossModel", None)
     if lossModel == None: raise Exception("Loss model parameter is missing")
 
-    ndigits = kwargs.get("ndigits", 9)
-
-    standardAttenuation = self.totalAttenuation_dB
-
-    probability_obatained = 0
-    distance_testing = 1
-    factor = 1000.0
-    prev_action = 0 # 0 stands for distance dec, 1 stands for distance inc
-    action = 0
-    while round(probability_obatained, ndigits) != round(reachProbability, ndigits):
-      # Calculating the new attenuation
-      self.setAttenuations(attenuation_dB = standardAttenuation)
-      self.addAttenuation(attenuation_dB = self.lossAttenuation(distance = distance_testing, **kwargs))
-      probability_obatained = self.calculateReachProbability(transmittedPower_dB = transmittedPower_dB, sensitivity_dB = sensitivity_dB, standardDeviation_dB = standardDeviation_dB)
-      #print("For length {}, we have attenuation {}, with error probability {}".format(distance_testing, self.totalAttenuation_dB, probability_obatained))
-      #time.sleep(0.1)
-      # Calculating the new distance
-      if probability_obatained > reachProbability:
-        action = 0
-        distance_testing -= factor
-      else:
-        action = 1
-        distance_testing += factor
-
-      if action == 1 and prev_action == 0: factor /= 10.0
-      prev_action = action
-    
-    # Resetting the attenuation to the begining
-    self.setAttenuations(attenuation_dB = standardAttenuation)
-
-    return distance_testing
+    return self.getLinkBudget(**kwargs).calculateDistance_reachProbability(transmittedPower_dB, reachProbability, sensitivity_dB, standardDeviation_dB)
 
   def calculatePower_reachProbability(self, **kwargs):
     """
@@ -786,37 +895,7 @@ class channelElement:
     lossModel = kwargs.get("lossModel", None)
     if lossModel == None: raise Exception("Loss model parameter is missing")
 
-    ndigits = kwargs.get("ndigits", 9)
-
-    standardAttenuation = self.totalAttenuation_dB
-
-    probability_obatained = 0
-    transmittedPower_testing = 1
-    factor = 1.0
-    prev_action = 0 # 0 stands for distance dec, 1 stands for distance inc
-    action = 0
-    while round(probability_obatained, ndigits) != round(reachProbability, ndigits):
-      # Calculating the new attenuation
-      self.setAttenuations(attenuation_dB = standardAttenuation)
-      self.addAttenuation(attenuation_dB = self.lossAttenuation(**kwargs))
-      probability_obatained = self.calculateReachProbability(transmittedPower_dB = transmittedPower_testing, sensitivity_dB = sensitivity_dB, standardDeviation_dB = standardDeviation_dB)
-      #print("For length {}, we have attenuation {}, with error probability {}".format(transmittedPower_testing, self.totalAttenuation_dB, probability_obatained))
-      #time.sleep(0.1)
-      # Calculating the new distance
-      if probability_obatained < reachProbability:
-        action = 0
-        transmittedPower_testing -= factor
-      else:
-        action = 1
-        transmittedPower_testing += factor
-
-      if action == 1 and prev_action == 0: factor /= 10.0
-      prev_action = action
-    
-    # Resetting the attenuation to the begining
-    self.setAttenuations(attenuation_dB = standardAttenuation)
-
-    return transmittedPower_testing
+    return self.getLinkBudget(**kwargs).calculatePower_reachProbability(distance, reachProbability, sensitivity_dB, standardDeviation_dB)
   
   def plotDistance_ErrorProbability(self, **kwargs):
     """
@@ -854,20 +933,11 @@ class channelElement:
 
     distances = np.arange(minDistance, maxDistance, 0.1)
 
-    standardAttenuation = self.totalAttenuation_dB
-
-    pE = []
-
-    for distance in distances:
-        self.setAttenuations(attenuation_dB = standardAttenuation)
-        self.addAttenuation(attenuation_dB = self.lossAttenuation(distance = distance, **kwargs))
-        pE.append(self.calculateReachProbability(transmittedPower_dB = transmittedPower_dB, sensitivity_dB = sensitivity_dB, standardDeviation_dB = standardDeviation_dB))
-
-    # Resetting the attenuation to the begining
-    self.setAttenuations(attenuation_dB = standardAttenuation)
+    # Whole sweep in one vectorized evaluation of the link budget
+    pE = self.getLinkBudget(**kwargs).calculateReachProbability(transmittedPower_dB, sensitivity_dB, standardDeviation_dB, distance = distances)
 
     plt.plot(distances, pE, 'b')
-    plt.axis([minDistance, maxDistance, min(pE), max(pE)])
+    plt.axis([minDistance, maxDistance, np.min(pE), np.max(pE)])
     plt.xscale('linear')
     plt.yscale('linear')
     plt.xlabel('Distance [m]')
@@ -924,28 +994,14 @@ class channelElement:
 
     distances = np.arange(minDistance, maxDistance, 0.1)
 
-    standardAttenuation = self.totalAttenuation_dB
-
-    receivedPowers = []
-    ind = 0
-    cmap = []
-    for distance in distances:
-        self.setAttenuations(attenuation_dB = standardAttenuation)
-        self.addAttenuation(attenuation_dB = self.lossAttenuation(distance = distance, **kwargs))
-        receivedPower = self.calculateRecivedPower(transmittedPower_dB = transmittedPower_dB)
-        receivedPowers.append(receivedPower)
-        if sensitivity_dB != None:
-          if receivedPower > sensitivity_dB: cmap.append('g')
-          else: cmap.append('r')
-          ind += 1
-    
-    if sensitivity_dB == None: cmap = 'b'
+    # Whole sweep in one vectorized evaluation of the link budget
+    receivedPowers = self.getLinkBudget(**kwargs).calculateReceivedPower(transmittedPower_dB, distance = distances)
 
-    # Resetting the attenuation to the begining
-    self.setAttenuations(attenuation_dB = standardAttenuation)
+    if sensitivity_dB != None: cmap = np.where(receivedPowers > sensitivity_dB, 'g', 'r')
+    else: cmap = 'b'
 
     plt.scatter(distances, receivedPowers, c=cmap, marker=",")
-    plt.axis([minDistance, maxDistance, min(receivedPowers), max(receivedPowers)])
+    plt.axis([minDistance, maxDistance, np.min(receivedPowers), np.max(receivedPowers)])
     plt.xscale('linear')
     plt.xscale('linear')
     plt.xlabel('Distance [m]')
@@ -991,13 +1047,10 @@ class channelElement:
 
     distances = np.arange(minDistance, maxDistance, 0.1)
 
-    attenuations = []
-
-    for distance in distances:
-      attenuations.append(self.lossAttenuation(distance = distance, **kwargs))
+    attenuations = self.lossAttenuation(distance = distances, **kwargs)
 
     plt.plot(distances, attenuations, 'b')
-    plt.axis([minDistance, maxDistance, min(attenuations), max(attenuations)])
+    plt.axis([minDistance, maxDistance, np.min(attenuations), np.max(attenuations)])
     plt.xscale('log')
     plt.yscale('linear')
     plt.xlabel('Distances [m]')
@@ -1015,14 +1068,10 @@ class channelElement:
     """
     v = np.arange(nMin, nMax, 0.01)
 
-    F = []
-
-    for n in range(v.size):
-        
-        F.append(self.calculateDifractionAttenuation(v[n]))
+    F = self.calculateDifractionAttenuationFresnel(v)
 
     plt.plot(v, F, 'b')
-    plt.axis([nMin, nMax, -5, max(F)+5])
+    plt.axis([nMin, nMax, -5, np.max(F)+5])
     plt.xscale('linear')
     plt.yscale('linear')
     plt.xlabel('Fresnel Diffraction Parameter')
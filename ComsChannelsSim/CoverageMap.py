@@ -0,0 +1,93 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  This file contains the functions used to calculate coverage maps, the received power, link margin or
+  reach probability over a 2-D grid of receiver positions around one or more transmitters. The grid is
+  processed in tiles so the memory used does not depend on the size of the map.
+"""
+
+import numpy as np
+import ComsChannelsSim.LinkBudget as LinkBudget
+
+coverageQuantities = ("receivedPower", "linkMargin", "reachProbability")
+
+def calculateCoverageMap(budget, transmitters, x, y, **kwargs):
+  """
+  Calculates a coverage map using the path loss model of a link budget. When several transmitters
+  are used each cell is served by the one received with the highest power.
+
+  Parameters:
+  * budget -> The link budget used, with its loss model set (See LinkBudget.linkBudget)
+  * transmitters -> Positions of the transmitters, array of shape (K, 2) with the x and y coordinates [m]
+  * x -> Coordinates of the columns of the grid, array of shape (nx,) [m]
+  * y -> Coordinates of the rows of the grid, array of shape (ny,) [m]
+  * transmittedPower_dB -> The transmitted power, scalar or one per transmitter [dB]
+  * quantity -> The quantity to calculate {"receivedPower", "linkMargin", "reachProbability"}
+  * sensitivity_dB(?) -> The sensitivity the receptor has, needed for linkMargin and reachProbability [dB]
+  * standardDeviation_dB(?) -> The standard deviation of the shadowing, needed for reachProbability [dB]
+  * minDistance -> Distances below it are clipped to it, to avoid evaluating the models at 0 [m]
+  * tileSize -> Number of rows and columns of each tile processed at once
+  * dtype -> Type of the output array, float32 halves the memory used
+  * out(?) -> Array of shape (ny, nx) where the map is written, it can be a numpy memmap
+  * filename(?) -> If provided, the map is written to a memory mapped .npy file with this name
+
+  Returns:
+  * coverageMap -> Array of shape (ny, nx) with the quantity calculated
+  """
+  transmittedPower_dB = kwargs.get("transmittedPower_dB", None)
+  if transmittedPower_dB is None: raise Exception("Transmitted power parameter is missing")
+
+  quantity = kwargs.get("quantity", "receivedPower")
+  if quantity not in coverageQuantities: raise Exception("Quantity not supported")
+
+  sensitivity_dB = kwargs.get("sensitivity_dB", None)
+  if quantity != "receivedPower" and sensitivity_dB is None: raise Exception("Sensitivity parameter is missing")
+
+  standardDeviation_dB = kwargs.get("standardDeviation_dB", None)
+  if quantity == "reachProbability" and standardDeviation_dB is None: raise Exception("Standard deviation parameter is missing")
+
+  minDistance = kwargs.get("minDistance", 1.0)
+  tileSize = kwargs.get("tileSize", 512)
+  dtype = kwargs.get("dtype", np.float64)
+  out = kwargs.get("out", None)
+  filename = kwargs.get("filename", None)
+
+  transmitters = np.atleast_2d(np.asarray(transmitters, dtype=float))
+  if transmitters.shape[1] != 2: raise Exception("Transmitters must be an array of shape (K, 2)")
+  transmittedPower_dB = np.broadcast_to(np.asarray(transmittedPower_dB, dtype=float), (transmitters.shape[0],))
+
+  x = np.asarray(x, dtype=float)
+  y = np.asarray(y, dtype=float)
+  shape = (y.size, x.size)
+
+  if out is None and filename is not None: out = np.lib.format.open_memmap(filename, mode="w+", dtype=dtype, shape=shape)
+  elif out is None: out = np.empty(shape, dtype=dtype)
+  elif out.shape != shape: raise Exception("The output array must have shape (ny, nx)")
+
+  # Budget without gains nor attenuations, to evaluate the shadowing directly over the received power
+  receivedPowerBudget = LinkBudget.linkBudget()
+
+  for row in range(0, shape[0], tileSize):
+    tileY = y[row:row+tileSize, np.newaxis]
+
+    for col in range(0, shape[1], tileSize):
+      tileX = x[np.newaxis, col:col+tileSize]
+
+      # Best server received power on the tile
+      receivedPower_dB = np.full((tileY.shape[0], tileX.shape[1]), -np.inf)
+      for transmitter in range(transmitters.shape[0]):
+        distance = np.hypot(tileX - transmitters[transmitter, 0], tileY - transmitters[transmitter, 1])
+        np.maximum(distance, minDistance, out=distance)
+        np.maximum(receivedPower_dB, budget.calculateReceivedPower(transmittedPower_dB[transmitter], distance), out=receivedPower_dB)
+
+      if quantity == "receivedPower": tile = receivedPower_dB
+      elif quantity == "linkMargin": tile = receivedPower_dB - sensitivity_dB
+      elif quantity == "reachProbability": tile = receivedPowerBudget.calculateReachProbability(receivedPower_dB, sensitivity_dB, standardDeviation_dB)
+
+      out[row:row+tileSize, col:col+tileSize] = tile
+
+  if isinstance(out, np.memmap): out.flush()
+
+  return out
@@ -0,0 +1,253 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  This file contains the functions used to calculate the attenuation by diffraction, using the Fresnel
+  integrals to evaluate the knife edge model, and a cached interpolation table for bulk evaluations.
+"""
+
+import functools
+import numpy as np
+import ComsChannelsSim.utils as utils
+
+sps = utils.lazyModule("scipy.special")
+
+def fresnelIntegral(v):
+  """
+  Calculates the complex field, relative to the free space one, behind a knife edge.
+  F(v) = (1+j)/2 * integral from v to infinity of exp(-j*pi*t^2/2) dt
+
+  Parameters:
+  * v -> Fresnel difraction parameter, scalar or array
+
+  Returns:
+  * F -> Relative complex field, same shape as v
+  """
+  S, C = sps.fresnel(np.asarray(v, dtype=float))
+  return ((1+1j)/2)*((0.5 - C) - 1j*(0.5 - S))
+
+def fresnelAttenuation(v):
+  """
+  Calculates the knife edge attenuation of a fresnel parameter, normalized to the unobstructed
+  field (v -> -infinity), where |F| = 1.
+
+  Parameters:
+  * v -> Fresnel difraction parameter, scalar or array
+
+  Returns:
+  * Adiff -> The attenuation by diffraction [dB]
+  """
+  return -20*np.log10(np.abs(fresnelIntegral(v)))
+
+class fresnelTable:
+  def __init__(self, vMin = -10.0, vMax = 40.0, step = 1e-3):
+    """
+    Lookup table of the knife edge attenuation, evaluated with linear interpolation. Values
+    outside of [vMin, vMax] are evaluated with the exact expression.
+
+    The interpolation error is bounded by step^2/8 * max|A''(v)|, the bound is estimated when
+    the table is built and stored in errorBound. With the default parameters it is around 3e-5 dB.
+
+    Parameters:
+    * vMin -> Lowest fresnel parameter of the table
+    * vMax -> Highest fresnel parameter of the table
+    * step -> Spacing between the points of the table
+    """
+    if vMin >= vMax: raise Exception("The minimun parameter must be smaller than the maximun")
+
+    self.vMin = vMin
+    self.vMax = vMax
+    self.step = step
+    self.v = np.linspace(vMin, vMax, int(round((vMax - vMin)/step)) + 1)
+    self.attenuation = fresnelAttenuation(self.v)
+
+    # Second derivative estimated on a grid 4 times finer than the table
+    fine = np.linspace(vMin, vMax, 4*(self.v.size - 1) + 1)
+    h = fine[1] - fine[0]
+    secondDerivative = np.diff(fresnelAttenuation(fine), 2)/(h**2)
+    self.errorBound = (self.step**2)/8*np.max(np.abs(secondDerivative))
+
+  def evaluate(self, v):
+    """
+    Evaluates the attenuation using the table.
+
+    Parameters:
+    * v -> Fresnel difraction parameter, scalar or array
+
+    Returns:
+    * Adiff -> The attenuation by diffraction [dB]
+    """
+    shape = np.shape(v)
+    v = np.atleast_1d(np.asarray(v, dtype=float))
+
+    # The table is uniform, so the interval of each point is obtained directly
+    position = np.clip((v - self.vMin)/self.step, 0, self.v.size - 1)
+    index = np.minimum(position.astype(np.intp), self.v.size - 2)
+    fraction = position - index
+    attenuation = self.attenuation[index]*(1 - fraction) + self.attenuation[index + 1]*fraction
+
+    outside = (v < self.vMin) | (v > self.vMax)
+    if np.any(outside): attenuation[outside] = fresnelAttenuation(v[outside])
+
+    return attenuation.reshape(shape)[()]
+
+@functools.lru_cache(maxsize=None)
+def getFresnelTable(vMin = -10.0, vMax = 40.0, step = 1e-3):
+  """
+  Returns the table for the parameters provided, it is only built the first time it is requested.
+  """
+  return fresnelTable(vMin, vMax, step)
+
+def fresnelAttenuationTable(v, **kwargs):
+  """
+  Calculates the knife edge attenuation using the cached lookup table, see fresnelTable.
+
+  Parameters:
+  * v -> Fresnel difraction parameter, scalar or array
+  * vMin, vMax, step -> Parameters of the table used
+
+  Returns:
+  * Adiff -> The attenuation by diffraction [dB]
+  """
+  return getFresnelTable(kwargs.get("vMin", -10.0), kwargs.get("vMax", 40.0), kwargs.get("step", 1e-3)).evaluate(v)
+
+def strongestEdge(profiles, distances, startIndex, endIndex, startHeight, endHeight, wavelength):
+  """
+  Finds, for every link, the point of the profile between startIndex and endIndex (both excluded) with
+  the highest fresnel parameter relative to the line joining the start and end heights.
+
+  Returns:
+  * v -> Fresnel parameter of the strongest edge of each link, -np.inf if there are no points in between
+  * index -> Index of the strongest edge in the profile
+  """
+  rows = np.arange(profiles.shape[0])
+  startDistance = distances[rows, startIndex][:, np.newaxis]
+  endDistance = distances[rows, endIndex][:, np.newaxis]
+
+  positions = np.arange(profiles.shape[1])
+  inside = (positions > startIndex[:, np.newaxis]) & (positions < endIndex[:, np.newaxis])
+
+  with np.errstate(divide="ignore", invalid="ignore"):
+    d1 = distances - startDistance
+    d2 = endDistance - distances
+    lineOfSight = startHeight[:, np.newaxis] + (endHeight - startHeight)[:, np.newaxis]*d1/(endDistance - startDistance)
+    v = (profiles - lineOfSight)*np.sqrt(2*(d1 + d2)/(wavelength*d1*d2))
+
+  v = np.where(inside, v, -np.inf)
+  index = np.argmax(v, axis=1)
+  return v[rows, index], index
+
+def multipleEdgeDiffraction(profiles, distances, txHeight, rxHeight, wavelength, **kwargs):
+  """
+  Calculates the attenuation by diffraction over terrain profiles with several obstacles, for many links at once.
+
+  Methods:
+  * deygout -> The main edge (highest fresnel parameter) is found first and its attenuation added, then the
+    process is repeated on the sub-paths transmitter-edge and edge-receiver up to the depth indicated
+  * epsteinPeterson -> The edges found by the Deygout search are sorted along the path, and each one is evaluated
+    relative to the line joining its neighbouring edges (or antennas)
+
+  Parameters:
+  * profiles -> Terrain heights of each link, array of shape (L, P) or (P,), the first sample is under the transmitter and the last one under the receiver [m]
+  * distances -> Distance of each sample from the transmitter, array of shape (P,) or (L, P) [m]
+  * txHeight -> Height of the transmitter antenna over the terrain, scalar or one per link [m]
+  * rxHeight -> Height of the receiver antenna over the terrain, scalar or one per link [m]
+  * wavelength -> The wavelength of the signal being transmitted, scalar or one per link [m]
+  * method -> Method used to combine the edges {"deygout", "epsteinPeterson"}
+  * depth -> Levels of the edge search, at most 2^depth - 1 edges are used per link
+  * threshold -> Edges with a fresnel parameter below it are ignored
+  * kFactor(?) -> Effective earth radius factor, if provided the earth bulge is added to the profiles
+  * fresnelMethod -> How the knife edge attenuation is obtained {"exact", "table"}
+  * chunkSize -> Number of links processed at once, limits the memory used
+
+  Returns:
+  * Adiff -> The attenuation by diffraction of each link [dB]
+  """
+  method = kwargs.get("method", "deygout")
+  depth = kwargs.get("depth", 2)
+  threshold = kwargs.get("threshold", -0.78)
+  kFactor = kwargs.get("kFactor", None)
+  fresnelMethod = kwargs.get("fresnelMethod", "table")
+  chunkSize = kwargs.get("chunkSize", 1024)
+
+  if method not in ("deygout", "epsteinPeterson"): raise Exception("Method not supported")
+  if depth < 1: raise Exception("Depth must be at least 1")
+
+  if fresnelMethod == "exact": knifeEdge = fresnelAttenuation
+  elif fresnelMethod == "table": knifeEdge = fresnelAttenuationTable
+  else: raise Exception("Fresnel method not supported")
+
+  profiles = np.atleast_2d(np.asarray(profiles, dtype=float))
+  L, P = profiles.shape
+  if P < 3: raise Exception("Profiles must have at least 3 samples")
+
+  distances = np.broadcast_to(np.asarray(distances, dtype=float), (L, P))
+  txHeight = np.broadcast_to(np.asarray(txHeight, dtype=float), (L,))
+  rxHeight = np.broadcast_to(np.asarray(rxHeight, dtype=float), (L,))
+  wavelength = np.broadcast_to(np.asarray(wavelength, dtype=float), (L,))
+
+  attenuation = np.empty(L)
+
+  for first in range(0, L, chunkSize):
+    chunk = slice(first, first + chunkSize)
+    profile = profiles[chunk]
+    distance = distances[chunk]
+    chunkWavelength = wavelength[chunk][:, np.newaxis]
+    n = profile.shape[0]
+
+    if kFactor is not None:
+      total = distance[:, -1:]
+      profile = profile + distance*(total - distance)/(2*kFactor*6371e3)
+
+    start = np.zeros(n, dtype=np.intp)
+    end = np.full(n, P - 1, dtype=np.intp)
+    startHeight = profile[:, 0] + txHeight[chunk]
+    endHeight = profile[:, -1] + rxHeight[chunk]
+
+    # Deygout search, every level splits each path in two at its strongest edge
+    paths = [(start, end, startHeight, endHeight)]
+    losses = np.zeros(n)
+    edges = []
+    for level in range(depth):
+      nextPaths = []
+      for pathStart, pathEnd, pathStartHeight, pathEndHeight in paths:
+        v, index = strongestEdge(profile, distance, pathStart, pathEnd, pathStartHeight, pathEndHeight, chunkWavelength)
+        valid = v > threshold
+        losses += np.where(valid, knifeEdge(np.where(valid, v, 0.0)), 0.0)
+        edges.append(np.where(valid, index, P)) # P marks that there is no edge
+
+        # Paths without a valid edge stop splitting
+        edgeHeight = profile[np.arange(n), index]
+        nextPaths.append((pathStart, np.where(valid, index, pathStart), pathStartHeight, np.where(valid, edgeHeight, pathStartHeight)))
+        nextPaths.append((np.where(valid, index, pathEnd), pathEnd, np.where(valid, edgeHeight, pathEndHeight), pathEndHeight))
+      paths = nextPaths
+
+    if method == "deygout":
+      attenuation[chunk] = losses
+      continue
+
+    # Epstein-Peterson, each edge is evaluated between its neighbours
+    edges = np.sort(np.stack(edges, axis=1), axis=1)
+    count = (edges < P).sum(axis=1)
+    rows = np.arange(n)[:, np.newaxis]
+    slot = np.arange(edges.shape[1])[np.newaxis, :]
+    valid = slot < count[:, np.newaxis]
+
+    edgeIndex = np.minimum(edges, P - 1)
+    previousIndex = np.where(slot == 0, 0, np.roll(edgeIndex, 1, axis=1))
+    nextIndex = np.where(slot + 1 >= count[:, np.newaxis], P - 1, np.roll(edgeIndex, -1, axis=1))
+
+    heights = profile.copy()
+    heights[:, 0] = startHeight
+    heights[:, -1] = endHeight
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+      d1 = distance[rows, edgeIndex] - distance[rows, previousIndex]
+      d2 = distance[rows, nextIndex] - distance[rows, edgeIndex]
+      lineOfSight = heights[rows, previousIndex] + (heights[rows, nextIndex] - heights[rows, previousIndex])*d1/(d1 + d2)
+      v = (heights[rows, edgeIndex] - lineOfSight)*np.sqrt(2*(d1 + d2)/(chunkWavelength*d1*d2))
+
+    attenuation[chunk] = np.where(valid, knifeEdge(np.where(valid, v, 0.0)), 0.0).sum(axis=1)
+
+  return attenuation
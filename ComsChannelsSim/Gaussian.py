@@ -9,8 +9,9 @@ Description:
 
 import numpy as np
 import ComsChannelsSim.utils as utils
-import scipy.stats as sps
-import matplotlib.pyplot as plt
+
+sps = utils.lazyModule("scipy.stats")
+plt = utils.lazyModule("matplotlib.pyplot")
 
 class Gaussian:
   def __init__(self, mean, variance):
@@ -26,24 +27,18 @@ class Gaussian:
   def probabilityNormalizedRange(self, min = np.inf, max = np.inf):
     """
     Calculates the probability of the gaussian defined being between the values
-    provided.
+    provided, the distance to the mean is normalized by the standard deviation.
 
     Parameters:
-    * Min -> The left most parameter. np.inf is allowed
-    * Max -> The right most parameter. np.inf is allowed
+    * Min -> The left most parameter, np.inf if there is no lower limit
+    * Max -> The right most parameter, np.inf if there is no upper limit
     """
+    standardDeviation = np.sqrt(self.variance)
 
-    if min != np.inf and max != np.inf:
-      if min <= self.mean: minProb = utils.Q(abs(min-self.mean)/self.variance)
-      elif min > self.mean: minProb = 1 - utils.Q(abs(min-self.mean)/self.variance)
-      if max <= self.mean: maxProb = utils.Q(abs(max-self.mean)/self.variance)
-      elif max > self.mean: maxProb = 1 - utils.Q(abs(max-self.mean)/self.variance)
-
-      return abs(minProb - maxProb)
-    
+    if min != np.inf and max != np.inf: return abs(utils.Q((min-self.mean)/standardDeviation) - utils.Q((max-self.mean)/standardDeviation))
     elif min == np.inf and max == np.inf: return 1
-    elif min != np.inf: return utils.Q(abs(min-self.mean)/self.variance)
-    elif max != np.inf: return 1 - utils.Q(abs(max-self.mean)/self.variance)
+    elif min != np.inf: return utils.Q((min-self.mean)/standardDeviation)
+    elif max != np.inf: return 1 - utils.Q((max-self.mean)/standardDeviation)
   
   def getMean(self):
     return self.mean
@@ -52,13 +47,13 @@ class Gaussian:
     return self.variance
   
   def getStandardDeviation(self):
-    return math.sqrt(self.variance)
+    return np.sqrt(self.variance)
   
   def plotGaussian(self, lowerBound = -10, upperBound = 10):
 
     # Calculating the Z transform
-    z1 = (lowerBound - self.mean) / self.variance
-    z2 = (upperBound - self.mean) / self.variance
+    z1 = (lowerBound - self.mean) / np.sqrt(self.variance)
+    z2 = (upperBound - self.mean) / np.sqrt(self.variance)
 
     # Calculating the probability
     x = np.arange(z1, z2, 0.001) # range of x in spec
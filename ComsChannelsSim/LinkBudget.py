@@ -0,0 +1,189 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  This file contains the link budget class, an immutable snapshot of the gains, attenuations and path loss
+  model of a channel. All its calculations are pure and vectorized, so it can be shared between threads
+  and sent to process pools without copying channel objects.
+"""
+
+import dataclasses
+import numpy as np
+import ComsChannelsSim.utils as utils
+import ComsChannelsSim.Solvers as solvers
+import ComsChannelsSim.ChannelElement as ChannelElement
+
+sps = utils.lazyModule("scipy.stats")
+
+# Parameters used by the path loss models of channelElement.lossAttenuation
+lossParameterNames = ("wavelength", "n", "baseHeight", "mobileHeight", "frequency", "correctionFactorApplied")
+
+@dataclasses.dataclass(frozen = True)
+class linkBudget:
+  """
+  Parameters:
+  * totalGain_dB -> The sum of all the gains of the link [dB]
+  * totalAttenuation_dB -> The sum of all the attenuations of the link, path loss excluded [dB]
+  * lossModel -> The model used to calculate path loss attenuation {"friis", "hataUrban", "hataSuburban", "hataOpen"}, None if not used
+  * lossParameters -> The parameters of the loss model, see channelElement.lossAttenuation (Dictionary)
+  """
+  totalGain_dB: float = 0.0
+  totalAttenuation_dB: float = 0.0
+  lossModel: str = None
+  lossParameters: tuple = ()
+
+  def __post_init__(self):
+    # Stored as a tuple of pairs so the object stays immutable and can be pickled
+    if isinstance(self.lossParameters, dict):
+      object.__setattr__(self, "lossParameters", tuple(sorted(self.lossParameters.items())))
+
+  def getLossParameters(self):
+    return dict(self.lossParameters)
+
+  def addGain(self, gain_dB):
+    """
+    Returns a new link budget with the gain added [dB]
+    """
+    return dataclasses.replace(self, totalGain_dB = self.totalGain_dB + gain_dB)
+
+  def addAttenuation(self, attenuation_dB):
+    """
+    Returns a new link budget with the attenuation added [dB]
+    """
+    return dataclasses.replace(self, totalAttenuation_dB = self.totalAttenuation_dB + attenuation_dB)
+
+  def setLossModel(self, lossModel, **kwargs):
+    """
+    Returns a new link budget using the loss model and parameters provided
+    """
+    return dataclasses.replace(self, lossModel = lossModel, lossParameters = {key: value for key, value in kwargs.items() if key in lossParameterNames})
+
+  def lossAttenuation(self, distance):
+    """
+    Calculates the path loss attenuation of the link.
+
+    Parameters:
+    * distance -> The distance of the receiver from the transmitter, scalar or array [m]
+
+    Returns:
+    * lossAttenuation -> The path loss attenuation [dB]
+    """
+    if self.lossModel == None: raise Exception("Loss model parameter is missing")
+    return ChannelElement.channelElement.lossAttenuation(distance = distance, lossModel = self.lossModel, **self.getLossParameters())
+
+  def calculateReceivedPower(self, transmittedPower_dB, distance = None):
+    """
+    Calculates the received power, including path loss if the distance is provided.
+
+    Parameters:
+    * transmittedPower_dB -> The transmitted power by the transmitting station, scalar or array [dB]
+    * distance -> The distance of the receiver from the transmitter, scalar or array [m]
+
+    Returns:
+    * receivedPower -> The received power, broadcast over the inputs [dB]
+    """
+    receivedPower_dB = np.asarray(transmittedPower_dB, dtype=float) + self.totalGain_dB - self.totalAttenuation_dB
+    if distance is not None: receivedPower_dB = receivedPower_dB - self.lossAttenuation(distance)
+    return receivedPower_dB
+
+  def calculateTransmittedPower(self, receivedPower_dB, distance = None):
+    """
+    Calculates the transmitted power needed to obtain a received power, including path loss if the distance is provided.
+
+    Parameters:
+    * receivedPower_dB -> The received power, scalar or array [dB]
+    * distance -> The distance of the receiver from the transmitter, scalar or array [m]
+
+    Returns:
+    * transmittedPower -> The transmitted power, broadcast over the inputs [dB]
+    """
+    transmittedPower_dB = np.asarray(receivedPower_dB, dtype=float) - self.totalGain_dB + self.totalAttenuation_dB
+    if distance is not None: transmittedPower_dB = transmittedPower_dB + self.lossAttenuation(distance)
+    return transmittedPower_dB
+
+  def calculateLinkMargin(self, transmittedPower_dB, sensitivity_dB, distance = None):
+    """
+    Calculates the link margin, positive when the received power is above the sensitivity.
+
+    Parameters:
+    * transmittedPower_dB -> The transmitted power by the transmitting station, scalar or array [dB]
+    * sensitivity_dB -> The sensitivity the receptor has, scalar or array [dB]
+    * distance -> The distance of the receiver from the transmitter, scalar or array [m]
+
+    Returns:
+    * linkMargin -> The received power minus the sensitivity [dB]
+    """
+    return self.calculateReceivedPower(transmittedPower_dB, distance) - sensitivity_dB
+
+  def calculateReachProbability(self, transmittedPower_dB, sensitivity_dB, standardDeviation_dB, distance = None):
+    """
+    Calculates the probability of error of the link, with the same model as channelElement.calculateReachProbability.
+
+    Parameters:
+    * transmittedPower_dB -> The transmitted power by the transmitting station, scalar or array [dB]
+    * sensitivity_dB -> The sensitivity the receptor has, scalar or array [dB]
+    * standardDeviation_dB -> The standard deviation of the gaussian error that is in the attenuation of the channel [dB]
+    * distance -> The distance of the receiver from the transmitter, scalar or array [m]
+
+    Returns:
+    * reachProbability -> The probability obtained, broadcast over the inputs [%]
+    """
+    receivedPower_dB = self.calculateReceivedPower(transmittedPower_dB, distance)
+
+    # Probability of the shadowing taking away the whole margin
+    return utils.Q((receivedPower_dB - sensitivity_dB)/standardDeviation_dB)[()]
+
+  def calculateReceivedPower_reachProbability(self, reachProbability, sensitivity_dB, standardDeviation_dB):
+    """
+    Inverse of calculateReachProbability, returns the received power that gives the probability provided,
+    probabilities above 0.5 give received powers below the sensitivity [dB]
+    """
+    reachProbability = np.asarray(reachProbability, dtype=float)
+    return (sensitivity_dB + standardDeviation_dB*sps.norm.isf(reachProbability))[()]
+
+  def calculateDistance_sensitivity(self, transmittedPower_dB, sensitivity_dB):
+    """
+    Calculates the distance at which the received power is equal to the sensitivity.
+
+    Parameters:
+    * transmittedPower_dB -> The transmitted power by the transmitting station, scalar or array [dB]
+    * sensitivity_dB -> The sensitivity the receptor has, scalar or array [dB]
+
+    Returns:
+    * distance -> The distance obtained [m]
+    """
+    lossObjective_dB = self.calculateReceivedPower(transmittedPower_dB) - sensitivity_dB
+    return solvers.invertLossAttenuation(ChannelElement.channelElement.lossAttenuation, lossObjective_dB, lossModel = self.lossModel, **self.getLossParameters())
+
+  def calculateDistance_reachProbability(self, transmittedPower_dB, reachProbability, sensitivity_dB, standardDeviation_dB):
+    """
+    Calculates the maximun distance that can be reached with the probability of error indicated as maximun.
+
+    Parameters:
+    * transmittedPower_dB -> The transmitted power by the transmitting station, scalar or array [dB]
+    * reachProbability -> The probability we want to achieve, scalar or array [%]
+    * sensitivity_dB -> The sensitivity the receptor has [dB]
+    * standardDeviation_dB -> The standard deviation of the gaussian error that is in the attenuation of the channel [dB]
+
+    Returns:
+    * distance -> The distance obtained [m]
+    """
+    receivedPower_dB = self.calculateReceivedPower_reachProbability(reachProbability, sensitivity_dB, standardDeviation_dB)
+    return self.calculateDistance_sensitivity(transmittedPower_dB, receivedPower_dB)
+
+  def calculatePower_reachProbability(self, distance, reachProbability, sensitivity_dB, standardDeviation_dB):
+    """
+    Calculates the transmitted power needed to reach a distance with the probability of error indicated.
+
+    Parameters:
+    * distance -> The distance from transmitter to receiver, scalar or array [m]
+    * reachProbability -> The probability we want to achieve, scalar or array [%]
+    * sensitivity_dB -> The sensitivity the receptor has [dB]
+    * standardDeviation_dB -> The standard deviation of the gaussian error that is in the attenuation of the channel [dB]
+
+    Returns:
+    * transmittedPower -> The transmitted power needed [dB]
+    """
+    receivedPower_dB = self.calculateReceivedPower_reachProbability(reachProbability, sensitivity_dB, standardDeviation_dB)
+    return self.calculateTransmittedPower(receivedPower_dB, distance)
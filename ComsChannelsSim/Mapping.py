@@ -0,0 +1,195 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  This file contains the functions used to map groups of bits to the symbols of a constellation and to
+  decide the symbol sent from a received sample, or the log-likelihood ratio of each of its bits. The labels
+  are precomputed as lookup tables and the decisions use closed form slicing when the geometry of the
+  constellation allows it.
+"""
+
+import math
+import numpy as np
+import ComsChannelsSim.utils as utils
+
+def labelTable(M, labeling):
+  """
+  Builds the bits of the label of each point of a constellation, the first bit of each label is the
+  least significant one, the same order used by komm.
+
+  Parameters:
+  * M -> Number of points of the constellation
+  * labeling -> Labeling used {natural, reflected, reflected_2d}, reflected_2d needs a square constellation
+    where point row*sqrt(M) + column has the real part of the column and the imaginary part of the row
+
+  Returns:
+  * labels -> Array of shape (M, log2(M)) with the bits of each point
+  """
+  m = int(math.log2(M))
+  if 1 << m != M: raise Exception("M must be a power of 2")
+
+  if labeling == "natural":
+    return ((np.arange(M)[:, np.newaxis] >> np.arange(m)) & 1).astype(np.uint8)
+
+  elif labeling == "reflected":
+    return np.array(utils.gray_code(m), dtype=np.uint8).reshape(M, m)[:, ::-1]
+
+  elif labeling == "reflected_2d":
+    if m % 2 != 0: raise Exception("The reflected_2d labeling needs a square constellation")
+    axis = np.array(utils.gray_code(m//2), dtype=np.uint8).reshape(-1, m//2)[:, ::-1]
+    L = axis.shape[0]
+    return np.concatenate([np.tile(axis, (L, 1)), np.repeat(axis, L, axis=0)], axis=1)
+
+  else: raise Exception("Labeling not supported")
+
+def buildSlicer(constellation):
+  """
+  Finds how a constellation can be sliced. Uniform real constellations (PAM) are sliced with a division,
+  square constellations (QAM) on each axis separately and constellations of equally spaced points over a
+  circle (PSK) by their angle. Any other one is sliced searching the nearest point.
+
+  Parameters:
+  * constellation -> The points of the constellation
+
+  Returns:
+  * slicer -> Dictionary with the type of slicing {"uniform", "square", "circle", "nearest"} and its parameters
+  """
+  constellation = np.asarray(constellation)
+  M = constellation.size
+
+  # Uniform points over the real line
+  if not np.iscomplexobj(constellation) or np.all(constellation.imag == 0):
+    points = constellation.real
+    step = points[1] - points[0] if M > 1 else 1.0
+    if M > 1 and step > 0 and np.allclose(points, points[0] + step*np.arange(M)):
+      return {"type": "uniform", "origin": points[0], "step": step, "M": M, "constellation": constellation}
+
+  # Square grid, point row*L + column
+  L = int(round(math.sqrt(M)))
+  if L*L == M and L > 1:
+    real = constellation[:L].real
+    imag = constellation[::L].imag
+    realStep = real[1] - real[0]
+    imagStep = imag[1] - imag[0]
+    grid = real[np.newaxis, :] + 1j*imag[:, np.newaxis]
+    if realStep > 0 and imagStep > 0 and np.allclose(real, real[0] + realStep*np.arange(L)) and np.allclose(imag, imag[0] + imagStep*np.arange(L)) and np.allclose(grid.ravel(), constellation):
+      return {"type": "square", "realOrigin": real[0], "realStep": realStep, "imagOrigin": imag[0], "imagStep": imagStep, "L": L, "constellation": constellation}
+
+  # Points over a circle, point i at angle phase + 2*pi*i/M
+  amplitude = np.abs(constellation[0])
+  phase = np.angle(constellation[0])
+  if M > 1 and amplitude > 0 and np.allclose(constellation, amplitude*np.exp(1j*(phase + 2*np.pi*np.arange(M)/M))):
+    return {"type": "circle", "phase": phase, "M": M, "constellation": constellation}
+
+  return {"type": "nearest", "constellation": constellation}
+
+def sliceIndexes(received, slicer, chunkSize = 1 << 16):
+  """
+  Decides the point of the constellation nearest to each received sample.
+
+  Parameters:
+  * received -> Received samples, array
+  * slicer -> Output of buildSlicer
+  * chunkSize -> Samples processed at once by the nearest point search, it bounds its (chunk, M) temporary arrays
+
+  Returns:
+  * indexes -> Index of the point decided for each sample, same shape as received
+  """
+  received = np.asarray(received)
+
+  if slicer["type"] == "uniform":
+    return np.clip(np.rint((received.real - slicer["origin"])/slicer["step"]), 0, slicer["M"] - 1).astype(np.intp)
+
+  elif slicer["type"] == "square":
+    column = np.clip(np.rint((received.real - slicer["realOrigin"])/slicer["realStep"]), 0, slicer["L"] - 1).astype(np.intp)
+    row = np.clip(np.rint((received.imag - slicer["imagOrigin"])/slicer["imagStep"]), 0, slicer["L"] - 1).astype(np.intp)
+    return row*slicer["L"] + column
+
+  elif slicer["type"] == "circle":
+    return np.mod(np.rint((np.angle(received) - slicer["phase"])*slicer["M"]/(2*np.pi)), slicer["M"]).astype(np.intp)
+
+  constellation = slicer["constellation"]
+  flat = received.ravel()
+  indexes = np.empty(flat.size, dtype=np.intp)
+  for first in range(0, flat.size, chunkSize):
+    chunk = flat[first:first + chunkSize]
+    indexes[first:first + chunkSize] = np.argmin(np.abs(chunk[:, np.newaxis] - constellation[np.newaxis, :]), axis=1)
+  return indexes.reshape(received.shape)
+
+def bitSubsets(labels):
+  """
+  Splits the points of a constellation by the value of each bit of their labels.
+
+  Parameters:
+  * labels -> Output of labelTable
+
+  Returns:
+  * (zeros, ones) -> Arrays of shape (log2(M), M/2), row j has the indexes of the points whose bit j is 0 (or 1)
+  """
+  zeros = np.array([np.flatnonzero(labels[:, bit] == 0) for bit in range(labels.shape[1])])
+  ones = np.array([np.flatnonzero(labels[:, bit] == 1) for bit in range(labels.shape[1])])
+  return zeros, ones
+
+def maxLogRatio(metric, zeros, ones):
+  """
+  Max-log LLR from the metrics -|y - s|^2/No of shape (samples, M), only the nearest point of each subset is used
+  """
+  # (samples, log2(M), M/2) metrics of the points of each subset
+  return np.max(metric[:, zeros], axis=2) - np.max(metric[:, ones], axis=2)
+
+def demapLLR(received, constellation, labels, No, **kwargs):
+  """
+  Calculates the log-likelihood ratio log(P(bit = 0)/P(bit = 1)) of every bit of every received sample over
+  an AWGN channel, with equally likely bits. The samples are processed in blocks, so the memory used depends
+  on the size of the block and not on the number of samples.
+
+  Parameters:
+  * received -> Received samples, array
+  * constellation -> The points of the constellation
+  * labels -> Output of labelTable
+  * No -> Noise power spectral density, each real dimension of the noise has a variance of No/2, scalar or one per sample [W/Hz]
+  * method -> How the likelihoods of each subset are combined {exact, maxLog}, exact uses log-sum-exp and maxLog only the nearest point
+  * blockSize(?) -> Samples processed at once, by default the ones that keep each temporary array around 16 MiB
+  * subsets(?) -> Output of bitSubsets, to avoid building them for every call
+
+  Returns:
+  * LLR -> Array with log2(M) ratios per sample, in the same order as the bits of the labels
+  """
+  method = kwargs.get("method", "exact")
+  blockSize = kwargs.get("blockSize", None)
+  subsets = kwargs.get("subsets", None)
+
+  if method not in ("exact", "maxLog"): raise Exception("Method not supported")
+
+  constellation = np.asarray(constellation)
+  received = np.asarray(received).ravel()
+  M, m = labels.shape
+  No = np.broadcast_to(np.asarray(No, dtype=float), received.shape)
+  zeros, ones = bitSubsets(labels) if subsets is None else subsets
+  if blockSize is None: blockSize = max(1, (1 << 21)//(m*M))
+
+  # Matrices of shape (M, log2(M)) that add the likelihoods of the points of each subset
+  indicatorZeros = (labels == 0).astype(float)
+  indicatorOnes = (labels == 1).astype(float)
+
+  LLR = np.empty((received.size, m))
+  for first in range(0, received.size, blockSize):
+    block = slice(first, first + blockSize)
+    metric = -np.square(np.abs(received[block, np.newaxis] - constellation[np.newaxis, :]))/No[block, np.newaxis]
+
+    if method == "exact":
+      # Log-sum-exp of each subset, with the same shift (the best metric of the sample) in both of them the shift cancels
+      likelihood = np.exp(metric - np.max(metric, axis=1, keepdims=True))
+      with np.errstate(divide="ignore", invalid="ignore"):
+        exact = np.log(likelihood @ indicatorZeros) - np.log(likelihood @ indicatorOnes)
+
+      # When a whole subset underflows its nearest point dominates and the max-log value is exact
+      underflow = np.flatnonzero(~np.all(np.isfinite(exact), axis=1))
+      if underflow.size > 0:
+        exact[underflow] = np.where(np.isfinite(exact[underflow]), exact[underflow], maxLogRatio(metric[underflow], zeros, ones))
+      LLR[block] = exact
+
+    else: LLR[block] = maxLogRatio(metric, zeros, ones)
+
+  return LLR.ravel()
@@ -8,10 +8,127 @@ Description:
 """
 
 import numpy as np
-import random
 import ComsChannelsSim.utils as utils
 import ComsChannelsSim.ErrorSimulations as errorSim
 import math
+import os
+import collections
+import concurrent.futures
+
+def simulateChunkTask(chain, size, start, end, seedSequence, window):
+  """
+  Simulates one chunk of markovChain.simulateModelParallel, it is the task run by each worker. Chunks
+  with a known end state are simulated as bridges (See markovChain.simulateBridge).
+  """
+  rng = np.random.default_rng(seedSequence)
+  if end is None: return chain.simulateChunk(size, start, rng)[0]
+  return chain.simulateBridge(size, start, end, rng, window)
+
+def composeSteps(steps, segment = 32):
+  """
+  Prefix composition of the state maps of consecutive steps. The steps are composed one by one inside segments
+  of fixed length, all the segments at once, and the totals of the segments are composed recursively and applied
+  to them, so it takes about two passes over the array and a number of array operations that does not depend on
+  the number of steps.
+
+  Parameters:
+  * steps -> Array of shape (n, ..., M), steps[t][..., current] is the state after step t when it starts in current
+  * segment -> Number of steps composed one by one
+
+  Returns:
+  * composed -> Array of the same shape, composed[t][..., first] is the state after step t when the first step starts in first
+  """
+  n = steps.shape[0]
+  groups = -(-n // segment)
+
+  # The last segment is completed with identity maps
+  local = np.empty((groups*segment,) + steps.shape[1:], dtype=steps.dtype)
+  local[:n] = steps
+  local[n:] = np.arange(steps.shape[-1])
+  local = local.reshape((groups, segment) + steps.shape[1:])
+
+  for step in range(1, segment):
+    local[:, step] = np.take_along_axis(local[:, step], local[:, step - 1], axis=-1)
+
+  if groups > 1:
+    # State maps from the first step to the end of each segment, applied to the steps of the next one
+    totals = composeSteps(local[:, -1], segment)
+    local[1:] = np.take_along_axis(local[1:], np.broadcast_to(totals[:-1, np.newaxis], local[1:].shape), axis=-1)
+
+  return local.reshape((groups*segment,) + steps.shape[1:])[:n]
+
+def stackChains(chains):
+  """
+  Stacks the parameters of several chains with the same number of states for simulateEnsemble.
+
+  Parameters:
+  * chains -> List of markovChain
+
+  Returns:
+  * T -> Array of shape (K, M, M) with the transition matrix of each chain
+  * Pe -> Array of shape (K, M) with the error probabilities of each chain
+  """
+  if len(set(chain.M for chain in chains)) != 1: raise Exception("All the chains must have the same number of states")
+  return np.array([np.asarray(chain.T, dtype=float) for chain in chains]), np.array([np.asarray(chain.Pe, dtype=float) for chain in chains])
+
+def simulateEnsemble(T, Pe, iterations, initialStates = 0, **kwargs):
+  """
+  Simulates K independent Markov chains at once, for example the Gilbert-Elliott models of the links of a
+  network. The transitions of a block of bits of every chain are drawn together and chained with a prefix
+  composition (See composeSteps), so there is no loop over the bits.
+
+  Parameters:
+  * T -> Array of shape (K, M, M), T[k][end][init] is the probability of going from init to end in chain k (See stackChains)
+  * Pe -> Array of shape (K, M), the probability of error of each state of each chain
+  * iterations -> Number of bits simulated per chain
+  * initialStates -> State of the first bit, one for all the chains or one per chain
+  * output -> What is returned {errors, counts}, counts only keeps the number of errors of each chain
+  * blockSize(?) -> Number of bits simulated at once, by default the ones that keep each temporary array around 4 million elements
+  * seed -> Seed or numpy SeedSequence of the random generator, None for a random one
+  * rng(?) -> numpy Generator used instead of the seed
+
+  Returns:
+  * errors -> Array of shape (K, iterations) with 1 where there is an error, or array of K error counts
+  """
+  output = kwargs.get("output", "errors")
+  blockSize = kwargs.get("blockSize", None)
+  rng = kwargs.get("rng", None)
+  if rng is None: rng = np.random.default_rng(kwargs.get("seed", None))
+
+  T = np.asarray(T, dtype=float)
+  Pe = np.asarray(Pe, dtype=float)
+  if T.ndim != 3 or T.shape[1] != T.shape[2]: raise Exception("T must have shape (K, M, M)")
+  if Pe.shape != T.shape[:2]: raise Exception("Pe must have shape (K, M)")
+  if output not in ("errors", "counts"): raise Exception("Output not supported")
+
+  K, M = Pe.shape
+  if blockSize is None: blockSize = max(1, (1 << 22)//(K*M))
+  chains = np.arange(K)
+  states = np.broadcast_to(np.asarray(initialStates, dtype=np.intp), (K,)).copy()
+
+  # cumulative[k, init] has the cumulative probabilities of the next state of chain k from init
+  cumulative = np.cumsum(np.swapaxes(T, 1, 2), axis=2)
+
+  errors = np.empty((K, iterations), dtype=np.uint8) if output == "errors" else np.zeros(K, dtype=np.int64)
+  for first in range(0, iterations, blockSize):
+    size = min(blockSize, iterations - first)
+
+    # Next state of every bit of every chain for every possible current state, shape (size, K, M)
+    uniform = rng.random((size, K))
+    steps = np.zeros((size, K, M), dtype=np.uint8 if M <= 256 else np.intp)
+    for current in range(M):
+      for end in range(M - 1): steps[:, :, current] += uniform >= cumulative[:, current, end]
+
+    # Row t maps the state of the first bit of the block to the one of bit t + 1
+    steps = composeSteps(steps)[:, chains, states].astype(np.intp)
+    blockStates = np.concatenate([states[np.newaxis, :], steps[:-1]]).T
+    states = steps[-1]
+
+    blockErrors = rng.random((K, size)) < Pe[chains[:, np.newaxis], blockStates]
+    if output == "errors": errors[:, first:first + size] = blockErrors
+    else: errors += np.count_nonzero(blockErrors, axis=1)
+
+  return errors
 
 class markovChain:
   def __init__(self, M, T = None, Π = None, U = None, SNR_average = None, Pe = None, F = None, P = None, averagePe = None):
@@ -58,20 +175,22 @@ class markovChain:
       self.Pe = np.zeros(M)
 
     if F == None:
-      if M == 2 and Pe != None: # Markov auto calculations
+      if Pe != None: # Markov auto calculations
         self.F = [] # F[bit][row][col]
-        self.F.append([[1-self.Pe[0], 0], [0, 1-self.Pe[1]]])
-        self.F.append([[self.Pe[0], 0], [0, self.Pe[1]]])
+        self.F.append(np.diag(1-np.asarray(self.Pe, dtype=float)))
+        self.F.append(np.diag(np.asarray(self.Pe, dtype=float)))
         self.F = np.array(self.F)
+      else:
+        self.F = np.zeros((2, M, M))
     else:
       self.F = np.zeros((2, M, M))
 
     if P == None: # Markov auto calculations
-      if M == 2 and self.F.any() and T != None:
-        self.P = [] #P[bit][row][col]
-        self.P.append(np.matmul(self.F[0], self.T))
-        self.P.append(np.matmul(self.F[1], self.T))
-        self.P = np.array(self.P)
+      if self.F.any() and T != None:
+        # Kept as F·T, the pattern calculations use stepMatrices, that takes into account that T is stored as T[end][init]
+        self.P = np.array([np.matmul(self.F[0], self.T), np.matmul(self.F[1], self.T)]) #P[bit][row][col]
+      else:
+        self.P = np.zeros((2, M, M))
     else:
       self.P = np.zeros((2, M, M))
 
@@ -143,41 +262,153 @@ class markovChain:
       self.T[ind] = np"""
     pass
   
-  def calculateErrorPattern(self, bitVector):
+  def stepMatrices(self):
     """
-    The bit vector is defined as a set of zeros and ones that we want to
-    calculate how much can appear.
+    Builds the matrices P[bit] = F[bit]·T' of the chain, P[bit][init][end] is the probability of having the bit
+    as error pattern in state init and then going to state end. T is stored as T[end][init], so it is transposed.
+
+    Returns:
+    * P -> Array of shape (2, M, M)
     """
+    Pe = np.asarray(self.Pe, dtype=float)
+    T = np.asarray(self.T, dtype=float)
+    return np.array([np.diag(1 - Pe) @ T.T, np.diag(Pe) @ T.T])
 
-    F0 = np.eye(M)
-    F0[0][0] = 1-self.Pe[0]
-    F0[1][1] = 1-self.Pe[1]
+  def calculateErrorPattern(self, bitVector, logarithmic = False):
+    """
+    Calculates the probability of error patterns, Π·P[b1]·...·P[bn]·1, starting in the stationary state.
+    The patterns are sorted and the ones that share a prefix reuse its partial product, as in a prefix trie
+    that is walked one level (bit) at a time for all of its nodes at once. The partial products are normalized
+    at every bit and their scale is kept as a logarithm, so long patterns do not underflow.
 
-    F1 = np.eye(M)
-    F1[0][0] = self.Pe[0]
-    F1[1][1] = self.Pe[1]
+    Parameters:
+    * bitVector -> Pattern of zeros and ones, or 2-D array with one pattern of the same length per row
+    * logarithmic -> If True the natural logarithm of the probabilities is returned
 
-    P0 = F0 * self.T
-    P1 = F1 * self.T
+    Returns:
+    * probability -> Probability of the pattern, or array with the probability of each pattern
+    """
+    patterns = np.asarray(bitVector, dtype=np.int8)
+    single = patterns.ndim == 1
+    patterns = np.atleast_2d(patterns)
+    count, length = patterns.shape
+    if not np.any(self.Π): raise Exception("The state probabilities are missing")
+
+    # The empty pattern has the probability of any state
+    if length == 0:
+      logProbability = np.full(count, np.log(np.sum(self.Π)))
+      result = logProbability if logarithmic else np.exp(logProbability)
+      return result[0] if single else result
+
+    P = self.stepMatrices()
+
+    # Sorting puts the patterns with a common prefix together, prefix[i] is the one shared with the previous pattern
+    order = np.lexsort(patterns.T[::-1])
+    patterns = patterns[order]
+    prefix = np.zeros(count, dtype=np.intp)
+    prefix[1:] = np.cumprod(patterns[1:] == patterns[:-1], axis=1).sum(axis=1)
+
+    # Nodes of the current level of the trie, node[i] is the one of pattern i
+    vectors = np.asarray(self.Π, dtype=float)[np.newaxis, :]
+    logScale = np.zeros(1)
+    node = np.zeros(count, dtype=np.intp)
+    for depth in range(length):
+      # A pattern starts a new node when it does not share this bit with the previous one
+      new = prefix <= depth
+      parents = node[new]
+      bits = patterns[new, depth]
+      node = np.cumsum(new) - 1
+
+      children = np.empty((parents.size, self.M))
+      for bit in (0, 1):
+        selected = bits == bit
+        children[selected] = vectors[parents[selected]] @ P[bit]
+
+      total = children.sum(axis=1)
+      with np.errstate(divide="ignore", invalid="ignore"):
+        vectors = np.where(total[:, np.newaxis] > 0, children/total[:, np.newaxis], 0)
+        logScale = logScale[parents] + np.log(total)
+
+    logProbability = np.empty(count)
+    logProbability[order] = logScale[node] + np.log(np.sum(vectors[node], axis=1))
+
+    result = logProbability if logarithmic else np.exp(logProbability)
+    return result[0] if single else result
+  
+  def calculateErrorDistribution(self, totalBits, maxErrors = None):
+    """
+    Calculates the probability of every number of errors in blocks of bits, starting in the stationary state.
+    It uses the forward recursion alpha[m] <- alpha[m]·P[0] + alpha[m-1]·P[1] over the bits, where alpha[m]
+    has the probability of each state after having m errors, so it costs O(n·m·M²) instead of enumerating
+    the 2^n patterns. The distributions of all the shorter blocks are obtained on the way.
 
-    for i in bitVector:
-      if i == 0:
-        P = P * P0
-      elif i == 1:
-        P = P * P1
+    Parameters:
+    * totalBits -> Number of bits of the block, or array of block lengths
+    * maxErrors(?) -> Largest number of errors calculated, only maxErrors + 1 classes are carried, None for all of them
 
-    return self.Π * P * np.ones(M, 1)
-  
-  def calculateErrorNumber(self, totalBits, errorBits):
+    Returns:
+    * distribution -> Array with the probability of 0 to maxErrors (or max(totalBits)) errors, or array of shape (lengths, maxErrors + 1)
     """
-    totalBits = Number of bits that we have to search
-    errorBits = Number of error bits that we want to calculate the probability
-    over
+    lengths = np.asarray(totalBits, dtype=np.intp)
+    if np.any(lengths < 0): raise Exception("The number of bits can not be negative")
+    if not np.any(self.Π): raise Exception("The state probabilities are missing")
+
+    P = self.stepMatrices()
+    n = int(np.max(lengths)) if lengths.size > 0 else 0
+
+    # alpha[m, state], only the first bits + 1 rows can be non zero, the errors above maxErrors are dropped
+    classes = n + 1 if maxErrors is None else min(n, int(maxErrors)) + 1
+    alpha = np.zeros((classes, self.M))
+    alpha[0] = np.asarray(self.Π, dtype=float)
+    # Only the distributions of the lengths requested are kept
+    flat = lengths.ravel()
+    distributions = np.zeros((flat.size, classes))
+    requested = {}
+    for index, length in enumerate(flat): requested.setdefault(int(length), []).append(index)
+
+    for bits in range(n + 1):
+      if bits > 0:
+        top = min(bits, classes - 1)
+        following = alpha[:top + 1] @ P[0]
+        following[1:] += alpha[:top] @ P[1]
+        alpha[:top + 1] = following
+      if bits in requested: distributions[requested[bits]] = alpha.sum(axis=1)
+
+    return distributions.reshape(lengths.shape + (classes,))
+
+  def calculateErrorNumber(self, totalBits, errorBits = None):
+    """
+    Calculates the probability of having a number of errors in a block of bits (See calculateErrorDistribution)
+
+    Parameters:
+    * totalBits -> Number of bits that we have to search, or array of block lengths
+    * errorBits -> Number of error bits that we want to calculate the probability over, scalar or array, None for all of them
+
+    Returns:
+    * probability -> Probability of errorBits errors in totalBits bits, with the shape of the broadcast of both, or the full distribution if errorBits is None
     """
-    allErrorPatterns = utils.obtainBitCombinations(totalBits, errorBits)
+    if errorBits is None: return self.calculateErrorDistribution(totalBits)
+
+    lengths, errors = np.broadcast_arrays(np.asarray(totalBits, dtype=np.intp), np.asarray(errorBits, dtype=np.intp))
+    if np.any(errors < 0) or np.any(errors > lengths): raise Exception("The number of errors must be between 0 and the number of bits")
+
+    distributions = self.calculateErrorDistribution(lengths.ravel(), int(np.max(errors)) if errors.size > 0 else 0)
+    return distributions[np.arange(lengths.size), errors.ravel()].reshape(lengths.shape)[()]
 
-    for errorPattern in allErrorPatterns:
-      utils.calculateErrorPattern(errorPattern)
+  def calculateBlockErrorProbability(self, totalBits, correctableBits = 0):
+    """
+    Calculates the probability that a block has more errors than the ones a code can correct, the packet error
+    probability for correctableBits = 0.
+
+    Parameters:
+    * totalBits -> Number of bits of the block, or array of block lengths
+    * correctableBits -> Number of errors that can be corrected in each block
+
+    Returns:
+    * probability -> Probability of more than correctableBits errors, scalar or one per length
+    """
+    distribution = self.calculateErrorDistribution(totalBits, correctableBits)
+    return np.clip(1 - np.sum(distribution[..., :correctableBits + 1], axis=-1), 0, 1)[()]
   
   def estimateParametersGilbert(self, errorSequence):
     """
@@ -233,26 +464,294 @@ class markovChain:
       self.Pe[0] = 0
       self.Pe[1] = 1-h
   
-  def simulateModel(self, iterations, initialState):
+  def runLengthTables(self):
     """
-    Makes use of a Markov model with all the parameter determined to simulate
-    n iterations using the model.
+    Builds the tables used to simulate the chain by runs of the same state. The time spent in state i is
+    geometric with probability 1 - T[i][i] of leaving it each bit, and when it leaves the next state j is
+    chosen with probability T[j][i]/(1 - T[i][i]).
+
+    Returns:
+    * leave -> Array with the probability of leaving each state
+    * cumulativeJumps -> Array of shape (M, M), row i has the cumulative probabilities of the next state when leaving state i
+    """
+    T = np.asarray(self.T, dtype=float)
+    leave = 1 - np.diag(T)
+
+    jumps = T.T.copy()
+    np.fill_diagonal(jumps, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+      jumps = np.where(leave[:, np.newaxis] > 0, jumps/leave[:, np.newaxis], 0)
+
+    # Absorbing states never leave, they jump to themselves so the tables stay valid
+    jumps[leave <= 0, :] = 0
+    jumps[leave <= 0, np.flatnonzero(leave <= 0)] = 1
+
+    return leave, np.cumsum(jumps, axis=1)
+
+  def simulateRuns(self, count, state, rng, leave, cumulativeJumps):
+    """
+    Samples consecutive runs of the chain, the first one in the state provided.
+
+    Returns:
+    * states -> Array with the state of each run
+    * lengths -> Array with the number of bits of each run
+    """
+    jumps = np.diff(cumulativeJumps, axis=1, prepend=0)
+    if np.all(np.isclose(np.max(jumps, axis=1), 1)):
+      # Each state always jumps to the same one (Gilbert models), the path reaches a cycle in at most M runs
+      target = np.argmax(jumps, axis=1)
+      path = [state]
+      while target[path[-1]] not in path: path.append(target[path[-1]])
+      start = path.index(target[path[-1]])
+      index = np.arange(count)
+      states = np.where(index < start, np.array(path)[np.minimum(index, len(path) - 1)], np.array(path[start:])[(index - start) % (len(path) - start)])
+
+    else:
+      # Next state of every step for every possible current state, shape (count - 1, M)
+      uniform = rng.random(count - 1)
+      steps = np.empty((count - 1, self.M), dtype=np.intp)
+      for current in range(self.M):
+        steps[:, current] = np.minimum(np.searchsorted(cumulativeJumps[current], uniform, side="right"), self.M - 1)
+
+      # Row k maps the first state to the one after k + 1 steps
+      steps = composeSteps(steps)
+      states = np.concatenate([[state], steps[:, state]]).astype(np.intp)
+
+    # Absorbing states last forever, their runs are given the largest length that can be added without overflowing
+    probability = leave[states]
+    lengths = np.full(count, np.iinfo(np.int64).max//(count + 1), dtype=np.int64)
+    lengths[probability > 0] = rng.geometric(probability[probability > 0])
+
+    return states, lengths
+
+  def simulateChunk(self, size, state, rng, tables = None):
+    """
+    Simulates the errors of a number of consecutive bits, the first one in the state provided.
 
     Parameters:
-    * initialState in 0 or 1
+    * size -> Number of bits
+    * state -> State of the first bit
+    * rng -> numpy Generator used
+    * tables(?) -> Output of runLengthTables, to avoid building them for every chunk
+
+    Returns:
+    * errors -> Array of size bits, 1 where there is an error
+    * state -> State of the bit that follows the chunk
+    """
+    leave, cumulativeJumps = self.runLengthTables() if tables is None else tables
+    Pe = np.asarray(self.Pe, dtype=float)
+
+    # Runs are drawn until they cover the chunk and the bit that follows it, each run has at least one bit
+    count = min(int(math.ceil(size*np.max(leave)*1.1)) + 64, size + 1)
+    allStates, allLengths = [], []
+    covered = 0
+    while True:
+      states, lengths = self.simulateRuns(count, state, rng, leave, cumulativeJumps)
+      lengths = np.minimum(lengths, size + 1)
+      total = covered + int(np.sum(lengths))
+      if total > size:
+        allStates.append(states)
+        allLengths.append(lengths)
+        break
+
+      # The time left in a state does not depend on the time spent in it, so the last run is drawn again in the next batch
+      allStates.append(states[:-1])
+      allLengths.append(lengths[:-1])
+      covered = total - int(lengths[-1])
+      state = int(states[-1])
+
+    # Only the runs until the one that contains the bit that follows the chunk are expanded
+    lengths = np.concatenate(allLengths)
+    last = np.searchsorted(np.cumsum(lengths), size, side="right")
+    stateSequence = np.repeat(np.concatenate(allStates)[:last + 1], lengths[:last + 1])[:size + 1]
+
+    errors = (rng.random(size) < Pe[stateSequence[:size]]).astype(np.uint8)
+    return errors, int(stateSequence[size])
+
+  def simulateModelBlocks(self, iterations = None, initialState = 0, **kwargs):
     """
+    Generator that yields the simulated error sequence in blocks of fixed size, for sequences that do not fit in memory.
+
+    Parameters:
+    * iterations -> Total number of bits, None to generate blocks indefinitely
+    * initialState -> State of the first bit
+    * chunkSize -> Number of bits of each block, the last one can be smaller
+    * seed -> Seed or numpy SeedSequence of the random generator, None for a random one
+    * rng(?) -> numpy Generator used instead of the seed
+
+    Yields:
+    * errors -> Array of at most chunkSize bits, 1 where there is an error
+    """
+    chunkSize = kwargs.get("chunkSize", 1 << 20)
+    rng = kwargs.get("rng", None)
+    if rng is None: rng = np.random.default_rng(kwargs.get("seed", None))
+
+    tables = self.runLengthTables()
     state = initialState
-    outputErrorTape = np.zeros(iterations)
-    for it in range(iterations):
+    generated = 0
+    while iterations is None or generated < iterations:
+      size = chunkSize if iterations is None else min(chunkSize, iterations - generated)
+      errors, state = self.simulateChunk(size, state, rng, tables)
+      yield errors
+      generated += size
+
+  def bridgeWindow(self, maxWindow = 1 << 14, ratio = 0.9):
+    """
+    Returns the number of bits at the end of a chunk that simulateBridge conditions on its end state, the first
+    power of 2 where the probability of reaching any state does not depend much on the starting one.
 
-      # Probability of error
-      if random.random() < self.Pe[state]:
-        outputErrorTape[it] = 1
-      
-      # Probability of changing state
-      if random.random() > self.T[state][state]:
-        if state == 1: state = 0
-        else: state = 1
+    Parameters:
+    * maxWindow -> Largest window returned, chains that mix slower are still exact but reject more chunks
+    * ratio -> Smallest ratio between the lowest and the highest probability of reaching each state
+    """
+    T = np.asarray(self.T, dtype=float)
+    window = 1
+    power = T
+    while window < maxWindow:
+      reached = power[np.max(power, axis=1) > 0]
+      if np.all(np.min(reached, axis=1)/np.max(reached, axis=1) >= ratio): break
+      power = power @ power
+      window *= 2
+    return window
+
+  def simulateBridge(self, size, start, end, rng, window = None):
+    """
+    Simulates the errors of a number of consecutive bits conditioned on the state of the first bit and on the
+    state of the bit that follows them. The first size - window bits are simulated freely and accepted with a
+    probability proportional to the one of reaching the end state from their last state, the last window bits
+    are sampled backwards from the end state. The result is exact for any window.
+
+    Parameters:
+    * size -> Number of bits
+    * start -> State of the first bit
+    * end -> State of the bit that follows them
+    * rng -> numpy Generator used
+    * window(?) -> Number of bits sampled backwards, by default bridgeWindow()
+
+    Returns:
+    * errors -> Array of size bits, 1 where there is an error
+    """
+    T = np.asarray(self.T, dtype=float)
+    Pe = np.asarray(self.Pe, dtype=float)
+    if window is None: window = self.bridgeWindow()
+    window = min(window, size)
+
+    # Row r has the probability of reaching the end state in r bits from each state, (T^r)[end]
+    reach = np.empty((window + 1, self.M))
+    reach[0] = np.eye(self.M)[end]
+    for r in range(1, window + 1): reach[r] = reach[r - 1] @ T
+    if reach[window, start] == 0 and window == size: raise Exception("The end state can not be reached from the start state")
+
+    if window < size:
+      tables = self.runLengthTables()
+      acceptance = reach[window]/np.max(reach[window])
+      while True:
+        errors, state = self.simulateChunk(size - window, start, rng, tables)
+        if rng.random() < acceptance[state]: break
+    else: errors, state = np.empty(0, dtype=np.uint8), start
+
+    # Each state of the window is chosen knowing the previous one and the end state
+    states = np.empty(window, dtype=np.intp)
+    states[0] = state
+    uniform = rng.random(window)
+    for t in range(1, window):
+      cumulative = np.cumsum(T[:, states[t - 1]]*reach[window - t])
+      states[t] = min(np.searchsorted(cumulative, uniform[t]*cumulative[-1], side="right"), self.M - 1)
+
+    return np.concatenate([errors, (rng.random(window) < Pe[states]).astype(np.uint8)])
+
+  def simulateModelParallel(self, iterations, initialState, **kwargs):
+    """
+    Simulates a long error sequence in chunks using several processes. The state at the start of each chunk
+    is sampled first, jumping from the previous one with T^chunkSize, and then every chunk is simulated
+    independently as a bridge between its start state and the one of the next chunk (See simulateBridge),
+    so the sequence has the same statistics as one simulated bit by bit. Every chunk uses its own stream
+    spawned from the root seed, so for a given seed the result does not depend on the number of workers.
+
+    Parameters:
+    * iterations -> Number of bits simulated
+    * initialState -> State of the first bit, from 0 to M - 1
+    * chunkSize -> Number of bits of each chunk
+    * workers -> Number of processes used, 1 simulates the chunks in this process, None uses all the cores
+    * seed -> Seed or numpy SeedSequence of the simulation, None for a random one
+    * sink(?) -> Where the chunks are written in order, an array (or numpy.memmap) of iterations elements or a
+      function called as sink(first, errors), by default a new uint8 array
+    * window(?) -> Number of bits of each chunk sampled backwards, by default bridgeWindow()
+
+    Returns:
+    * sink -> The sink, or the new array with the errors if it was not provided
+    """
+    chunkSize = int(kwargs.get("chunkSize", 1 << 24))
+    workers = kwargs.get("workers", None)
+    seed = kwargs.get("seed", None)
+    sink = kwargs.get("sink", None)
+    window = kwargs.get("window", None)
+
+    if workers is None: workers = os.cpu_count() or 1
+    if workers < 1: raise Exception("The number of workers must be at least 1")
+    if sink is None: sink = np.empty(iterations, dtype=np.uint8)
+    if window is None: window = self.bridgeWindow()
+
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    def chunkSeed(*position):
+      return np.random.SeedSequence(root.entropy, spawn_key = root.spawn_key + position)
+
+    # States at the start of each chunk, a chain with transition matrix T^chunkSize
+    totalChunks = -(-iterations // chunkSize)
+    jump = np.cumsum(np.linalg.matrix_power(np.asarray(self.T, dtype=float), chunkSize), axis=0)
+    boundaryRng = np.random.default_rng(chunkSeed(0))
+    boundaries = [initialState]
+    for chunk in range(1, totalChunks):
+      column = jump[:, boundaries[-1]]
+      boundaries.append(min(int(np.searchsorted(column, boundaryRng.random()*column[-1], side="right")), self.M - 1))
+    boundaries.append(None)
+
+    def write(chunk, errors):
+      if callable(sink): sink(chunk*chunkSize, errors)
+      else: sink[chunk*chunkSize:chunk*chunkSize + errors.size] = errors
+
+    def arguments(chunk):
+      return self, min(chunkSize, iterations - chunk*chunkSize), boundaries[chunk], boundaries[chunk + 1], chunkSeed(1, chunk), window
+
+    if workers == 1:
+      for chunk in range(totalChunks): write(chunk, simulateChunkTask(*arguments(chunk)))
+      return sink
+
+    # A window of chunks in flight, they are written in order as they finish
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as executor:
+      pending = collections.deque()
+      nextChunk = 0
+      for chunk in range(totalChunks):
+        while nextChunk < totalChunks and len(pending) < 2*workers:
+          pending.append(executor.submit(simulateChunkTask, *arguments(nextChunk)))
+          nextChunk += 1
+        write(chunk, pending.popleft().result())
+
+    return sink
+
+  def simulateModel(self, iterations, initialState, **kwargs):
+    """
+    Makes use of a Markov model with all the parameter determined to simulate
+    n iterations using the model. The chain is simulated by runs of the same state
+    (See runLengthTables) in chunks of bits, so it supports any number of states.
+
+    Parameters:
+    * iterations -> Number of bits simulated
+    * initialState -> State of the first bit, from 0 to M - 1
+    * chunkSize -> Number of bits simulated at once, it bounds the temporary arrays used
+    * seed -> Seed or numpy SeedSequence of the random generator, None for a random one
+    * dtype -> Type of the output {np.uint8, np.float64}, float64 uses 8 times more memory (800 MB for 10^8 bits)
+
+    Returns:
+    * outputErrorTape -> Array of iterations bits, 1 where there is an error
+    """
+    chunkSize = kwargs.get("chunkSize", 1 << 20)
+    outputErrorTape = np.empty(iterations, dtype=kwargs.get("dtype", np.uint8))
+
+    first = 0
+    for errors in self.simulateModelBlocks(iterations, initialState, **kwargs):
+      outputErrorTape[first:first + errors.size] = errors
+      first += errors.size
 
     return outputErrorTape
   
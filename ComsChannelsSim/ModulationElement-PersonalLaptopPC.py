@@ -12,10 +12,16 @@ Acclarations:
 """
 
 import numpy as np
-import komm
 import math
 import ComsChannelsSim.utils as utils
-import matplotlib.pyplot as plt
+import ComsChannelsSim.BERSimulation as BERSimulation
+import ComsChannelsSim.BERTables as BERTables
+import ComsChannelsSim.Solvers as solvers
+import ComsChannelsSim.Mapping as Mapping
+import ComsChannelsSim.PulseShaping as PulseShaping
+
+komm = utils.lazyModule("komm")
+plt = utils.lazyModule("matplotlib.pyplot")
 
 class modulationElement:
   def __init__(self, modulation, M = 0, **kwargs):
@@ -69,32 +75,143 @@ class modulationElement:
     else:
       self.labeling = kwargs.get("labeling", "reflected")
     
-    if self.modulation == "PSK": self.model = komm.PSKModulation(self.M)
-    elif self.modulation == "QAM": self.model = komm.QAModulation(self.M)
-    elif self.modulation == "PAM": self.model = komm.PAModulation(self.M)
+    # The komm model uses the same labels as the mapper, so the simulations and the analysis see the same constellation
+    self.labels = Mapping.labelTable(self.M, self.labeling)
+    if self.modulation == "PSK": self.model = komm.PSKModulation(self.M, amplitude = self.amplitude, phase_offset = self.phase_offset, labeling = self.labels)
+    elif self.modulation == "QAM": self.model = komm.QAModulation(self.M, base_amplitudes = self.amplitude, phase_offset = self.phase_offset, labeling = self.labels)
+    elif self.modulation == "PAM": self.model = komm.PAModulation(self.M, base_amplitude = self.amplitude, labeling = self.labels)
     else: raise Exception("Modulation is not supported")
 
     self.m = math.log(self.M, 2)
+
+    # Lookup tables of the mapper (label of each point and point of each label) and the slicer
+    self.constellation = np.asarray(self.model.constellation)
+    self.labelValues = self.labels @ (1 << np.arange(self.labels.shape[1]))
+    self.inverseLabels = np.argsort(self.labelValues)
+    self.slicer = Mapping.buildSlicer(self.constellation)
+    self.bitSubsets = Mapping.bitSubsets(self.labels)
   
   def codify(self, bits, **kwargs):
     """
-    Converts a sequence of bits to a sequence of symbols
+    Converts a sequence of bits to a sequence of symbols, each group of log2(M) bits is mapped to the point with that label
 
     Parameters:
-    * bits -> An array of bits
-    * 
+    * bits -> An array of bits, its size must be a multiple of log2(M)
+    * chunkSize -> Number of symbols mapped at once, it bounds the temporary arrays used
+
+    Returns:
+    * symbols -> Array with the points of the constellation
     """
-    if self.modulation == "PAM":
-      # Use gray_code() HERE
-      pass
+    chunkSize = kwargs.get("chunkSize", 1 << 20)
 
+    m = self.labels.shape[1]
+    bits = np.asarray(bits)
+    if bits.size % m != 0: raise Exception("The number of bits must be a multiple of log2(M)")
+
+    groups = bits.reshape(-1, m)
+    weights = 1 << np.arange(m)
+    symbols = np.empty(groups.shape[0], dtype=self.constellation.dtype)
+    for first in range(0, groups.shape[0], chunkSize):
+      symbols[first:first+chunkSize] = self.constellation[self.inverseLabels[groups[first:first+chunkSize] @ weights]]
+
+    return symbols
+
+  def decideIndexes(self, sequence, chunkSize = 1 << 20):
+    """
+    Returns the index of the point of the constellation nearest to each sample, see Mapping.sliceIndexes
+    """
+    sequence = np.asarray(sequence).ravel()
+    indexes = np.empty(sequence.size, dtype=np.intp)
+    for first in range(0, sequence.size, chunkSize):
+      indexes[first:first+chunkSize] = Mapping.sliceIndexes(sequence[first:first+chunkSize], self.slicer)
+    return indexes
   
-  def decodify(self, symbols):
-    pass
-  
-  def decisor(self, sequenece):
-    pass
+  def decodify(self, symbols, **kwargs):
+    """
+    Converts a sequence of symbols to a sequence of bits, the symbols do not need to be points of the
+    constellation, each one is decided first (See decisor)
+
+    Parameters:
+    * symbols -> An array of symbols
+    * chunkSize -> Number of symbols processed at once, it bounds the temporary arrays used
+
+    Returns:
+    * bits -> Array of bits, log2(M) for each symbol
+    """
+    return self.labels[self.decideIndexes(symbols, kwargs.get("chunkSize", 1 << 20))].ravel()
   
+  def decodifyLLR(self, symbols, **kwargs):
+    """
+    Soft output demapper, calculates the log-likelihood ratio log(P(bit = 0)/P(bit = 1)) of each bit of
+    each received symbol over an AWGN channel (See Mapping.demapLLR).
+
+    Parameters:
+    * symbols -> An array of received symbols
+    * No(?) -> Noise power spectral density, scalar or one per symbol [W/Hz]
+    * EbNo(?) -> Energy per bit to noise power spectral density ratio, used to obtain No if it is not provided [bits/(s*Hz)]
+    * EbNo_dB(?) -> Energy per bit to noise power spectral density ratio, used to obtain No if it is not provided [dB]
+    * method -> How the LLR is calculated {exact, maxLog}
+    * blockSize(?) -> Number of symbols processed at once
+
+    Returns:
+    * LLR -> Array with log2(M) ratios per symbol, in the same order as the bits of codify
+    """
+    No = kwargs.get("No", None)
+    if No is None: No = self.get_No_from_EbNo(**kwargs)
+
+    return Mapping.demapLLR(symbols, self.constellation, self.labels, No, method = kwargs.get("method", "exact"), blockSize = kwargs.get("blockSize", None), subsets = self.bitSubsets)
+
+  def decisor(self, sequence, **kwargs):
+    """
+    Minimum distance decision, each sample is replaced by the nearest point of the constellation. Square QAM
+    and PAM are sliced on each axis, PSK by the angle of the sample.
+
+    Parameters:
+    * sequence -> An array of received samples
+    * chunkSize -> Number of samples processed at once, it bounds the temporary arrays used
+
+    Returns:
+    * symbols -> Array with the points decided
+    """
+    return self.constellation[self.decideIndexes(sequence, kwargs.get("chunkSize", 1 << 20))]
+
+  def getPulseShaper(self, **kwargs):
+    """
+    Returns a root-raised-cosine pulse shaper for this modulation, see PulseShaping.pulseShaper for the parameters
+    """
+    return PulseShaping.pulseShaper(**kwargs)
+
+  def codifyWaveform(self, bits, shaper, **kwargs):
+    """
+    Converts a sequence of bits to the oversampled baseband waveform, the symbols of codify are shaped
+    by the transmit filter of the shaper. It can be called block by block, the shaper keeps the state.
+
+    Parameters:
+    * bits -> An array of bits, its size must be a multiple of log2(M)
+    * shaper -> The pulse shaper used (See getPulseShaper)
+    * flush -> If it is the last block, the tail of the last pulses is added
+    * chunkSize -> Number of symbols mapped at once
+
+    Returns:
+    * waveform -> Array with samplesPerSymbol samples per symbol
+    """
+    return shaper.transmit(self.codify(bits, **kwargs), kwargs.get("flush", False))
+
+  def decodifyWaveform(self, waveform, shaper, **kwargs):
+    """
+    Converts a received oversampled waveform to a sequence of bits, the output of the matched filter of the
+    shaper is sampled once per symbol and decided (See decodify).
+
+    Parameters:
+    * waveform -> An array of received samples
+    * shaper -> The pulse shaper used, the same one as the transmitter or one with its configuration
+    * chunkSize -> Number of symbols processed at once
+
+    Returns:
+    * bits -> Array of bits of the symbols whose center is in this block
+    """
+    return self.decodify(shaper.receive(waveform), **kwargs)
+
   def calculateTimeRatePack(self, **kwargs):
     """
     Calculates the bit and symbol, times and rates
@@ -185,6 +302,7 @@ class modulationElement:
     * bitTime(?) -> Time that a bit takes to be transmitted [s]
     * symbolRate(?) -> Frequency that symbols are sent at [Bd]
     * bitRate(?) -> Frequency that bits are sent at [bits/s]
+    * rolloff(?) -> Roll-off factor of the root-raised-cosine pulses, the bandwith is (1 + rolloff)/Ts, by default 0 (Nyquist pulses)
 
     Returns:
     * Dictionary:
@@ -193,7 +311,7 @@ class modulationElement:
     """
 
     timeRatePack = self.calculateTimeRatePack(**kwargs)
-    B = 1/timeRatePack["Ts"]
+    B = (1 + kwargs.get("rolloff", 0.0))/timeRatePack["Ts"]
     return self.calculateBandwithPack(B = B)
   
   def get_No_from_EbNo(self, **kwargs):
@@ -211,8 +329,8 @@ class modulationElement:
     EbNo = kwargs.get("EbNo", None)
     EbNo_dB = kwargs.get("EbNo_dB", None)
     
-    if EbNo == None and EbNo_dB != None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
-    elif EbNo_dB == None and EbNo != None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
+    if EbNo is None and EbNo_dB is not None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
+    elif EbNo_dB is None and EbNo is not None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
     else: raise Exception("Parameters EbNo or EbNo_dB missing")
 
     return self.model.energy_per_bit / utils.LogarithmicToNatural(EbNo_dB)
@@ -233,8 +351,8 @@ class modulationElement:
     SNR = kwargs.get("SNR", None)
     SNR_dB = kwargs.get("SNR_dB", None)
     
-    if SNR == None and SNR_dB != None: SNR = utils.LogarithmicToNatural(SNR_dB)
-    elif SNR_dB == None and SNR != None: SNR_dB = utils.NaturalToLogarithmic(SNR)
+    if SNR is None and SNR_dB is not None: SNR = utils.LogarithmicToNatural(SNR_dB)
+    elif SNR_dB is None and SNR is not None: SNR_dB = utils.NaturalToLogarithmic(SNR)
     else: raise Exception("Parameters SNR or SNR_dB missing")
 
     # Obtaining the other parameters
@@ -259,8 +377,8 @@ class modulationElement:
     EbNo = kwargs.get("EbNo", None)
     EbNo_dB = kwargs.get("EbNo_dB", None)
     
-    if EbNo == None and EbNo_dB != None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
-    elif EbNo_dB == None and EbNo != None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
+    if EbNo is None and EbNo_dB is not None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
+    elif EbNo_dB is None and EbNo is not None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
     else: raise Exception("Parameters EbNo or EbNo_dB missing")
 
     # Obtaining the other parameters
@@ -285,8 +403,8 @@ class modulationElement:
     EbNo = kwargs.get("EbNo", None)
     EbNo_dB = kwargs.get("EbNo_dB", None)
     
-    if EbNo == None and EbNo_dB != None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
-    elif EbNo_dB == None and EbNo != None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
+    if EbNo is None and EbNo_dB is not None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
+    elif EbNo_dB is None and EbNo is not None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
     else: raise Exception("Parameters EbNo or EbNo_dB missing")
 
     return utils.LogarithmicToNatural(EbNo_dB)*self.m
@@ -320,66 +438,73 @@ class modulationElement:
     Calculates BER from EbNo. Analytical method supposes that AWGN channels are being used.
 
     Parameters:
-    * EbNo(?) -> Energy per bit to noise power spectral density ratio [bits/(s*Hz)]
-    * EbNo_dB(?) -> Energy per bit to noise power spectral density ratio [dB]
-    * method -> Method to perform the calculations. Options: {simulated, analytically}
+    * EbNo(?) -> Energy per bit to noise power spectral density ratio, scalar or array [bits/(s*Hz)]
+    * EbNo_dB(?) -> Energy per bit to noise power spectral density ratio, scalar or array [dB]
+    * method -> Method to perform the calculations. Options: {simulated, analytically, table}, the simulated one accepts
+      the parameters of BERSimulation.simulateBER (targetErrors, relativeWidth, maxBits, seed, workers, ...), which also
+      returns the confidence interval of the estimation. The table one accepts the parameters of BERTables.getBERTable,
+      with tableMethod as the method used to build the table, EbNo outside of the table gives np.nan
 
     Returns:
-    * BER -> Bit error rate [bit errors/s]
+    * BER -> Bit error rate, same shape as EbNo [bit errors/s]
     """
 
     # Obtaining EbNo
     EbNo = kwargs.get("EbNo", None)
     EbNo_dB = kwargs.get("EbNo_dB", None)
     
-    if EbNo == None and EbNo_dB != None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
-    elif EbNo_dB == None and EbNo != None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
+    if EbNo is None and EbNo_dB is not None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
+    elif EbNo_dB is None and EbNo is not None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
     else: raise Exception("Parameters EbNo or EbNo_dB missing")
 
     method = kwargs.get("method", "analytically")
 
-    # Simulated method (Process N samples though a channel and calculate the number of errors obtained)
+    # Simulated method (Symbols processed in chunks through an AWGN channel until enough errors are counted)
     if method == "simulated":
-      N = 1000000
-
-      B = utils.generateSequenceBits(0.5, int(N*self.m))
-      A = self.model.modulate(B)
-      print("Noise power: {}".format(self.get_No_from_EbNo(EbNo_dB)))
-      if self.modulation == "PSK" or self.modulation == "QAM":
-        AWGN_channel = ChannelElement.channelElement("AWGN", noisePower = self.get_No_from_EbNo(EbNo_dB), band = "PB")
-      
-      elif self.modulation == "PAM" or self.modulation == "ASK":
-        AWGN_channel = ChannelElement.channelElement("AWGN", noisePower = self.get_No_from_EbNo(EbNo_dB), band = "BB")
-
-      z = AWGN_channel.generateNoise(N)
-      q = A + z
-      B_r = self.model.demodulate(q)
-      errors = (B != B_r).sum()
-      BER = (1.0 * errors / N*self.m)
-      print("Errors detected {}".format(errors))
+      parameters = {key: kwargs[key] for key in BERSimulation.simulationParameterNames if key in kwargs}
+      EbNo = np.asarray(EbNo, dtype=float)
+      BER = np.array([result["BER"] for result in BERSimulation.simulateBERCurve(self, EbNo.ravel(), **parameters)]).reshape(EbNo.shape)[()]
     
-    # Using analytical formulas (Only for AWGN channels)
+    # Interpolated from the lookup table of the modulation, built and stored the first time it is used
+    elif method == "table":
+      BER = self.getBERTable(**kwargs).BER(EbNo_dB)
+
+    # Using analytical formulas (Only for AWGN channels), evaluated over the whole array at once
     elif method == "analytically":
+      EbNo = np.asarray(EbNo, dtype=float)
+      EsNo = EbNo*self.m
+
       if self.modulation == "PSK":
-        Pe = 2*utils.Q(math.sqrt(2*self.get_EsNo_from_EbNo(EbNo_dB = EbNo_dB))*math.sin(math.pi/self.M)) # 4.105 from Sklar
+        # The two neighbours of a BPSK symbol are the same point, so the factor 2 of 4.105 is not applied
+        Pe = (1 if self.M == 2 else 2)*utils.Q(np.sqrt(2*EsNo)*math.sin(math.pi/self.M)) # 4.105 from Sklar
       
       elif self.modulation == "DPSK":
-        Pe = 2*utils.Q(math.sqrt(2*self.get_EsNo_from_EbNo(EbNo_dB = EbNo_dB))*math.sin(math.pi/(math.sqrt(2)*self.M))) # 4.106 from Sklar
+        Pe = 2*utils.Q(np.sqrt(2*EsNo)*math.sin(math.pi/(math.sqrt(2)*self.M))) # 4.106 from Sklar
       
       elif self.modulation == "FSK":
-        Pe = (self.M-1)*utils.Q(math.sqrt(self.get_EsNo_from_EbNo(EbNo_dB = EbNo_dB))) # 4.107 from Sklar
+        Pe = (self.M-1)*utils.Q(np.sqrt(EsNo)) # 4.107 from Sklar
       
       elif self.modulation == "QAM":
-        Pe = 4*(1-1/math.sqrt(self.M))*utils.Q(math.sqrt((3*self.get_EsNo_from_EbNo(EbNo_dB = EbNo_dB))/(self.M-1)))-4*math.pow((1-1/math.sqrt(self.M)), 2)*math.pow(utils.Q(math.sqrt((3*self.get_EsNo_from_EbNo(EbNo_dB = EbNo_dB))/(self.M-1))), 2) # 3 from ISIT
+        QValue = utils.Q(np.sqrt((3*EsNo)/(self.M-1)))
+        Pe = 4*(1-1/math.sqrt(self.M))*QValue-4*math.pow((1-1/math.sqrt(self.M)), 2)*np.square(QValue) # 3 from ISIT
       
       elif self.modulation == "PAM":
-        Pe = (2*(self.M-1)/self.M)*utils.Q(math.sqrt((6*self.m/(math.pow(self.M, 2)-1))*EbNo)) # 8 from BER
+        Pe = (2*(self.M-1)/self.M)*utils.Q(np.sqrt((6*self.m/(math.pow(self.M, 2)-1))*EbNo)) # 8 from BER
 
       else: raise Exception("Modulation does not support this action")
-      BER = self.get_BER_from_Pe(Pe)
+      BER = self.get_BER_from_Pe(Pe)[()]
     
     return BER
   
+  def getBERTable(self, **kwargs):
+    """
+    Returns the lookup table of the modulation, kwargs accepts the parameters of BERTables.getBERTable, with
+    tableMethod as the method used to build the table
+    """
+    parameters = {key: kwargs[key] for key in BERTables.tableParameterNames + BERSimulation.simulationParameterNames if key in kwargs}
+    if "tableMethod" in kwargs: parameters["method"] = kwargs["tableMethod"]
+    return BERTables.getBERTable(self, **parameters)
+
   def get_Pe_from_EbNo(self, **kwargs):
     """
     Calculates Pe from EbNo. Analytical method supposes that AWGN channels are being used.
@@ -387,11 +512,18 @@ class modulationElement:
     Parameters:
     * EbNo(?) -> Energy per bit to noise power spectral density ratio [bits/(s*Hz)]
     * EbNo_dB(?) -> Energy per bit to noise power spectral density ratio [dB]
-    * method -> Method to perform the calculations. Options: {simulated, analytically}
+    * method -> Method to perform the calculations. Options: {simulated, analytically, table}, the table one
+      uses the Pe stored in the table, for simulated tables it is the simulated SER and not BER*log2(M)
 
     Returns:
     * Pe -> Symbol error rate aka SER [symbol errors/s]
     """
+    if kwargs.get("method", "analytically") == "table":
+      EbNo_dB = kwargs.get("EbNo_dB", None)
+      if EbNo_dB is None and kwargs.get("EbNo", None) is not None: EbNo_dB = utils.NaturalToLogarithmic(kwargs["EbNo"])
+      elif EbNo_dB is None: raise Exception("Parameters EbNo or EbNo_dB missing")
+      return self.getBERTable(**kwargs).Pe(EbNo_dB)
+
     return self.get_Pe_from_BER(self.get_BER_from_EbNo(**kwargs))
   
   def get_BER_from_SNR(self, **kwargs):
@@ -401,7 +533,7 @@ class modulationElement:
     Parameters:
     * SNR(?) -> Signal to noise ratio [No units]
     * SNR_dB(?) -> Signal to noise ratio [dB]
-    * method -> Method to perform the calculations. Options: {simulated, analytically}
+    * method -> Method to perform the calculations. Options: {simulated, analytically, table}
 
     Returns:
     * BER -> Bit error rate [bit errors/s]
@@ -415,61 +547,96 @@ class modulationElement:
     Parameters:
     * SNR(?) -> Signal to noise ratio [No units]
     * SNR_dB(?) -> Signal to noise ratio [dB]
-    * method -> Method to perform the calculations. Options: {simulated, analytically}
+    * method -> Method to perform the calculations. Options: {simulated, analytically, table}
 
     Returns:
     * Pe -> Symbol error rate aka SER [symbol errors/s]
     """
-    return self.get_Pe_from_BER(self.get_BER_from_EbNo(EbNo = self.get_EbNo_from_SNR(**kwargs), **kwargs))
+    return self.get_Pe_from_EbNo(EbNo = self.get_EbNo_from_SNR(**kwargs), **kwargs)
 
-  def get_SNR_from_Pe(self, **kwargs):
+  def get_EbNo_from_Pe_closedForm(self, Pe):
+    """
+    Inverts the analytical Pe of the modulation using the inverse of the Q function.
+
+    Parameters:
+    * Pe -> Symbol error rate aka SER, array [symbol errors/s]
+
+    Returns:
+    * EbNo -> Energy per bit to noise power spectral density ratio, np.nan where the Pe can not be reached,
+      None if the modulation does not have a closed form [bits/(s*Hz)]
+    """
+    with np.errstate(invalid = "ignore"):
+      if self.modulation == "PSK":
+        argument = utils.Qinv(Pe/(1 if self.M == 2 else 2))/math.sin(math.pi/self.M) # 4.105 from Sklar
+        EsNo = np.square(argument)/2
+      
+      elif self.modulation == "DPSK":
+        argument = utils.Qinv(Pe/2)/math.sin(math.pi/(math.sqrt(2)*self.M)) # 4.106 from Sklar
+        EsNo = np.square(argument)/2
+      
+      elif self.modulation == "FSK":
+        argument = utils.Qinv(Pe/(self.M-1)) # 4.107 from Sklar
+        EsNo = np.square(argument)
+      
+      elif self.modulation == "QAM":
+        # Pe is a quadratic polynomial of Q, the root that goes to 0 with Pe is taken
+        # (1-sqrt(1-Pe) written as Pe/(1+sqrt(1-Pe)) to keep the precision at low Pe)
+        factor = 1-1/math.sqrt(self.M)
+        argument = utils.Qinv(Pe/(1+np.sqrt(1-Pe))/(2*factor)) # 3 from ISIT
+        EsNo = np.square(argument)*(self.M-1)/3
+      
+      elif self.modulation == "PAM":
+        argument = utils.Qinv(Pe*self.M/(2*(self.M-1))) # 8 from BER
+        EsNo = np.square(argument)*(math.pow(self.M, 2)-1)/6
+
+      else: return None
+
+      # Only positive arguments of Q are reachable with a positive EbNo
+      return np.where(argument >= 0, EsNo/self.m, np.nan)
 
-    Pe = kwargs.get("Pe", None)
-    ndigits = kwargs.get("ndigits", 9)
-    Pe_obatained = 0
-    SNR_testing = 0
-    factor = 1.0
-    prev_action = 0 # 0 stands for EbNo inc, 1 stands for EbNo dec
-    action = 0
-    while round(Pe_obatained, ndigits) != round(Pe, ndigits):
-      Pe_obatained = self.get_Pe_from_SNR(SNR_dB = SNR_testing, method = "analytically", **kwargs)
-
-      if Pe_obatained > Pe:
-        action = 0
-        SNR_testing += factor
-      else:
-        action = 1
-        SNR_testing -= factor
-
-      if action == 1 and prev_action == 0: factor /= 10.0
-      prev_action = action
-
-    return SNR_testing
-  
   def get_EbNo_from_Pe(self, **kwargs):
     """
+    Calculates the EbNo needed to obtain a Pe, inverting the analytical expressions. Modulations without
+    a closed form are inverted with a bracketed root search.
+
+    Parameters:
+    * Pe -> Symbol error rate aka SER, scalar or array [symbol errors/s]
+    * solver -> How the expression is inverted {closedForm, bracketed}, closedForm falls back to bracketed if there is no closed form
+    * EbNo_dB_min -> Lower limit of the bracketed search [dB]
+    * EbNo_dB_max -> Upper limit of the bracketed search [dB]
+
+    Returns:
+    * EbNo_dB -> Energy per bit to noise power spectral density ratio, np.nan where the Pe can not be reached [dB]
     """
     Pe = kwargs.get("Pe", None)
-    ndigits = kwargs.get("ndigits", 9)
-    Pe_obatained = 0
-    EbNo_testing = 0
-    factor = 1.0
-    prev_action = 0 # 0 stands for EbNo inc, 1 stands for EbNo dec
-    action = 0
-    while round(Pe_obatained, ndigits) != round(Pe, ndigits):
-      Pe_obatained = self.get_Pe_from_EbNo(EbNo_dB = EbNo_testing)
-
-      if Pe_obatained > Pe:
-        action = 0
-        EbNo_testing += factor
-      else:
-        action = 1
-        EbNo_testing -= factor
-
-      if action == 1 and prev_action == 0: factor /= 10.0
-      prev_action = action
-
-    return EbNo_testing
+    if Pe is None: raise Exception("Pe parameter is missing")
+    Pe = np.asarray(Pe, dtype=float)
+
+    solver = kwargs.get("solver", "closedForm")
+    EbNo_dB_min = kwargs.get("EbNo_dB_min", -30.0)
+    EbNo_dB_max = kwargs.get("EbNo_dB_max", 60.0)
+
+    EbNo = self.get_EbNo_from_Pe_closedForm(Pe) if solver == "closedForm" else None
+    if EbNo is not None:
+      with np.errstate(divide = "ignore"):
+        return utils.NaturalToLogarithmic(EbNo)[()]
+
+    # Pe decreases monotonically with EbNo
+    return solvers.bracketedRoot(lambda EbNo_dB: self.get_Pe_from_EbNo(EbNo_dB = EbNo_dB, method = "analytically"), Pe, EbNo_dB_min, EbNo_dB_max)
+
+  def get_SNR_from_Pe(self, **kwargs):
+    """
+    Calculates the SNR needed to obtain a Pe, see get_EbNo_from_Pe.
+
+    Parameters:
+    * Pe -> Symbol error rate aka SER, scalar or array [symbol errors/s]
+    * solver -> How the expression is inverted {closedForm, bracketed}
+
+    Returns:
+    * SNR_dB -> Signal to noise ratio, np.nan where the Pe can not be reached [dB]
+    """
+    # Inverse of the conversion used by get_EbNo_from_SNR
+    return self.get_EbNo_from_Pe(**kwargs) + math.log(self.m, 10)
   
   def drawConstellation(self, annotate = True):
     """
@@ -505,6 +672,16 @@ class modulationElement:
     # x-y axis plotting
     utils.plotAxis(ax)
   
+  @staticmethod
+  def truncateCurve(values):
+    """
+    Returns the values of a curve up to the first one that drops to 0 (included), as the curves are not drawn further
+    """
+    values = np.atleast_1d(values)
+    zeros = np.flatnonzero(values <= 0.0)
+    if zeros.size > 0: values = values[:zeros[0]+1]
+    return values
+
   def draw_BER_EbNo_curve(self, **kwargs):
     """
     Draws the curve that relates the BER and EbNo for this modulation. It will stop drawing
@@ -526,15 +703,9 @@ class modulationElement:
     color = kwargs.get("color", 'k')
     titleEnabled = kwargs.get("titleEnabled", True)
 
-    EbNo_dB = EbNo_dB_min
-    ber_range = [1]
-    i = 0
-    while EbNo_dB >= EbNo_dB_min and EbNo_dB < EbNo_dB_max+1 and ber_range[i] > 0.0:
-      ber_range.append(self.get_BER_from_EbNo(EbNo_dB = EbNo_dB, method = "analytically"))
-      i += 1
-      EbNo_dB += 1
-    ber_range.pop(0)
-    EbNo_dB_range = list(range(EbNo_dB_min, EbNo_dB))
+    EbNo_dB_range = np.arange(EbNo_dB_min, EbNo_dB_max+1)
+    ber_range = self.truncateCurve(self.get_BER_from_EbNo(EbNo_dB = EbNo_dB_range, method = "analytically"))
+    EbNo_dB_range = EbNo_dB_range[:ber_range.size]
     #print("BER: {}, EbNo: {}".format(ber_range, EbNo_dB_range))
     plt.plot(EbNo_dB_range, ber_range, color + 'o', EbNo_dB_range, ber_range, color)
     plt.axis([EbNo_dB_range[0], EbNo_dB_range[-1],  BER_min, 1])
@@ -555,15 +726,9 @@ class modulationElement:
     titleEnabled = kwargs.get("titleEnabled", True)
     plot = kwargs.get("plt", plt)
 
-    EbNo_dB = EbNo_dB_min
-    pe_range = [1]
-    i = 0
-    while EbNo_dB >= EbNo_dB_min and EbNo_dB < EbNo_dB_max+1 and pe_range[i] > 0.0:
-      pe_range.append(self.get_Pe_from_EbNo(EbNo_dB = EbNo_dB, method = "analytically"))
-      i += 1
-      EbNo_dB += 1
-    pe_range.pop(0)
-    EbNo_dB_range = list(range(EbNo_dB_min, EbNo_dB))
+    EbNo_dB_range = np.arange(EbNo_dB_min, EbNo_dB_max+1)
+    pe_range = self.truncateCurve(self.get_Pe_from_EbNo(EbNo_dB = EbNo_dB_range, method = "analytically"))
+    EbNo_dB_range = EbNo_dB_range[:pe_range.size]
     #print("Pe: {}, EbNo: {}".format(pe_range, EbNo_dB_range))
     plot.plot(EbNo_dB_range, pe_range, color + 'o', EbNo_dB_range, pe_range, color)
     plot.axis([EbNo_dB_range[0], EbNo_dB_range[-1],  Pe_min, 1])
@@ -587,15 +752,9 @@ class modulationElement:
     color = kwargs.get("color", 'k')
     titleEnabled = kwargs.get("titleEnabled", True)
 
-    SNR_dB = SNR_dB_min
-    pe_range = [1]
-    i = 0
-    while SNR_dB >= SNR_dB_min and SNR_dB < SNR_dB_max+1 and pe_range[i] > 0.0:
-      pe_range.append(self.get_Pe_from_SNR(SNR_dB = SNR_dB, method = "analytically", **kwargs))
-      i += 1
-      SNR_dB += 1
-    pe_range.pop(0)
-    SNR_dB_range = list(range(SNR_dB_min, SNR_dB))
+    SNR_dB_range = np.arange(SNR_dB_min, SNR_dB_max+1)
+    pe_range = self.truncateCurve(self.get_Pe_from_SNR(SNR_dB = SNR_dB_range, method = "analytically"))
+    SNR_dB_range = SNR_dB_range[:pe_range.size]
     #print("Pe: {}, EbNo: {}".format(pe_range, SNR_dB_range))
     plt.plot(SNR_dB_range, pe_range, color + 'o', SNR_dB_range, pe_range, color)
     plt.axis([SNR_dB_range[0], SNR_dB_range[-1],  Pe_min, 1])
@@ -0,0 +1,183 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  This file contains the pulse shaping of the modulations, it converts the symbols to an oversampled baseband
+  waveform with a root-raised-cosine filter and recovers them with its matched filter. The filters are applied
+  with overlap-save FFT convolution over fixed-size blocks and keep their state between calls, so sequences
+  longer than the memory can be processed block by block.
+"""
+
+import math
+import numpy as np
+
+def rrcTaps(rolloff, span, samplesPerSymbol):
+  """
+  Calculates the impulse response of a root-raised-cosine filter, normalized to unit energy so the cascade of
+  the transmit and the matched filter has a peak of 1 and keeps the energy of the symbols and the power of the noise.
+
+  Parameters:
+  * rolloff -> Roll-off factor, between 0 and 1
+  * span -> Length of the filter [symbols]
+  * samplesPerSymbol -> Oversampling factor
+
+  Returns:
+  * taps -> Array of span*samplesPerSymbol + 1 coefficients
+  """
+  if rolloff < 0 or rolloff > 1: raise Exception("The roll-off factor must be between 0 and 1")
+  if span < 1 or samplesPerSymbol < 1: raise Exception("The span and the samples per symbol must be at least 1")
+
+  # Time in symbols of each tap
+  t = np.arange(-span*samplesPerSymbol/2, span*samplesPerSymbol/2 + 1)/samplesPerSymbol
+
+  with np.errstate(divide="ignore", invalid="ignore"):
+    taps = (np.sin(np.pi*t*(1 - rolloff)) + 4*rolloff*t*np.cos(np.pi*t*(1 + rolloff)))/(np.pi*t*(1 - np.square(4*rolloff*t)))
+
+  # Limits of the expression at t = 0 and t = +-1/(4*rolloff)
+  taps[t == 0] = 1 - rolloff + 4*rolloff/np.pi
+  if rolloff > 0:
+    singular = np.isclose(np.abs(t), 1/(4*rolloff))
+    taps[singular] = rolloff/math.sqrt(2)*((1 + 2/np.pi)*math.sin(np.pi/(4*rolloff)) + (1 - 2/np.pi)*math.cos(np.pi/(4*rolloff)))
+
+  return taps/np.sqrt(np.sum(np.square(taps)))
+
+class overlapSaveFilter:
+  def __init__(self, taps, fftSize = None, batchSize = 1 << 22):
+    """
+    FIR filter applied with overlap-save FFT convolution. Consecutive calls to filter continue the same
+    sequence, the last samples of each block are kept to convolve the beginning of the next one.
+
+    Parameters:
+    * taps -> Coefficients of the filter
+    * fftSize(?) -> Size of the FFT of each frame, a power of 2, by default the first one above 8 times the number of taps (at least 4096)
+    * batchSize -> Samples transformed at once, it bounds the temporary arrays used
+    """
+    self.taps = np.asarray(taps)
+    L = self.taps.size
+    if fftSize is None: fftSize = max(1 << 12, 1 << int(math.ceil(math.log2(8*L))))
+    if fftSize < 2*L: raise Exception("The size of the FFT must be at least twice the number of taps")
+
+    self.fftSize = fftSize
+    self.hop = fftSize - L + 1
+    self.framesPerBatch = max(1, batchSize//fftSize)
+    self.realTaps = not np.iscomplexobj(self.taps)
+    self.spectrum = np.fft.fft(self.taps, fftSize)
+    self.realSpectrum = np.fft.rfft(self.taps, fftSize) if self.realTaps else None
+    self.reset()
+
+  def reset(self):
+    """
+    Clears the state of the filter, the next block is filtered as the beginning of a new sequence
+    """
+    self.history = np.zeros(self.taps.size - 1, dtype=self.taps.dtype)
+
+  def filter(self, block):
+    """
+    Filters the next block of the sequence.
+
+    Parameters:
+    * block -> Array with the next samples
+
+    Returns:
+    * output -> Array with the same number of samples, the output is causal so it is delayed (taps - 1)/2 samples
+    """
+    block = np.asarray(block).ravel()
+    count = block.size
+    L = self.taps.size
+    dtype = np.result_type(block.dtype, self.taps.dtype)
+    real = self.realTaps and not np.iscomplexobj(block)
+
+    # Previous samples, the block and the zeros that complete the last frame
+    frames = -(-count // self.hop)
+    data = np.zeros(frames*self.hop + L - 1, dtype=dtype)
+    data[:L - 1] = self.history
+    data[L - 1:L - 1 + count] = block
+    self.history = data[count:count + L - 1].copy()
+
+    # Frame i starts at sample i*hop and produces its last hop samples
+    windows = np.lib.stride_tricks.sliding_window_view(data, self.fftSize)[::self.hop]
+    output = np.empty(frames*self.hop, dtype=dtype)
+    for first in range(0, frames, self.framesPerBatch):
+      batch = windows[first:first + self.framesPerBatch]
+      if real: filtered = np.fft.irfft(np.fft.rfft(batch, axis=1)*self.realSpectrum, self.fftSize, axis=1)
+      else: filtered = np.fft.ifft(np.fft.fft(batch, axis=1)*self.spectrum, axis=1)
+      output[first*self.hop:(first + batch.shape[0])*self.hop] = filtered[:, L - 1:].ravel()
+
+    return output[:count]
+
+class pulseShaper:
+  def __init__(self, **kwargs):
+    """
+    Root-raised-cosine transmit filter and its matched filter. The transmitter converts symbols to an
+    oversampled waveform and the receiver filters it and samples it once per symbol. The waveform can
+    go through an AWGN channel element between them, as the filters have unit energy the noise power of
+    the channel is the one of the model of one sample per symbol and the matched filter keeps the EsNo.
+
+    Parameters:
+    * rolloff -> Roll-off factor, the bandwith is (1 + rolloff)*symbolRate
+    * span -> Length of each filter [symbols], an even number
+    * samplesPerSymbol -> Oversampling factor
+    * fftSize(?) -> Size of the FFT of the filters, see overlapSaveFilter
+    * dtype -> Precision of the filters {np.float64, np.float32}
+    """
+    self.rolloff = kwargs.get("rolloff", 0.35)
+    self.span = kwargs.get("span", 10)
+    self.samplesPerSymbol = kwargs.get("samplesPerSymbol", 8)
+    fftSize = kwargs.get("fftSize", None)
+    dtype = kwargs.get("dtype", np.float64)
+
+    if self.span % 2 != 0: raise Exception("The span must be an even number of symbols")
+
+    self.taps = rrcTaps(self.rolloff, self.span, self.samplesPerSymbol).astype(dtype)
+
+    # Delay of the cascade of both filters, the first symbol is at this sample of the received sequence
+    self.delay = self.taps.size - 1
+    self.transmitFilter = overlapSaveFilter(self.taps, fftSize)
+    self.receiveFilter = overlapSaveFilter(self.taps, fftSize)
+    self.reset()
+
+  def reset(self):
+    """
+    Clears the state of both filters, to start a new sequence
+    """
+    self.transmitFilter.reset()
+    self.receiveFilter.reset()
+    self.receivedSamples = 0
+
+  def transmit(self, symbols, flush = False):
+    """
+    Converts the next block of symbols to the waveform.
+
+    Parameters:
+    * symbols -> Array of symbols
+    * flush -> If it is the last block, the tail of the pulses of the last symbols (span symbols) is added
+
+    Returns:
+    * waveform -> Array with samplesPerSymbol samples per symbol, plus the tail if flush
+    """
+    symbols = np.asarray(symbols).ravel()
+    if flush: symbols = np.concatenate([symbols, np.zeros(self.span, dtype=symbols.dtype)])
+
+    upsampled = np.zeros(symbols.size*self.samplesPerSymbol, dtype=symbols.dtype)
+    upsampled[::self.samplesPerSymbol] = symbols
+    return self.transmitFilter.filter(upsampled)
+
+  def receive(self, waveform):
+    """
+    Applies the matched filter to the next block of the waveform and samples it at the center of each symbol.
+
+    Parameters:
+    * waveform -> Array with the received samples
+
+    Returns:
+    * symbols -> Array with the symbols whose center falls inside this block
+    """
+    filtered = self.receiveFilter.filter(waveform)
+
+    # Index inside this block of the first sample that is the center of a symbol
+    position = self.receivedSamples - self.delay
+    first = -position if position <= 0 else (-position) % self.samplesPerSymbol
+    self.receivedSamples += filtered.size
+
+    return filtered[first::self.samplesPerSymbol]
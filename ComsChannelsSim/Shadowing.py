@@ -0,0 +1,109 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  This file contains the Monte Carlo engine for log-normal shadowing, it estimates the disponibility of many
+  links at once drawing the shadowing of all of them in the same array operation, optionally correlated
+  between links, and processing the samples in chunks so the memory used is fixed.
+"""
+
+import numpy as np
+import ComsChannelsSim.utils as utils
+
+def shadowingSamples(standardDeviation_dB, samples, correlation = None, rng = None):
+  """
+  Draws log-normal shadowing samples (gaussian in dB) for K links.
+
+  Parameters:
+  * standardDeviation_dB -> Standard deviation of the shadowing of each link, array of shape (K,) [dB]
+  * samples -> Number of samples per link
+  * correlation(?) -> Correlation between links, either a scalar (same correlation for all pairs) or a (K, K) matrix
+  * rng(?) -> numpy Generator used
+
+  Returns:
+  * shadowing -> Array of shape (samples, K) [dB]
+  """
+  standardDeviation_dB = np.atleast_1d(np.asarray(standardDeviation_dB, dtype=float))
+  K = standardDeviation_dB.size
+  if rng is None: rng = np.random.default_rng()
+
+  if correlation is None:
+    normal = rng.standard_normal((samples, K))
+
+  elif np.ndim(correlation) == 0:
+    # Equicorrelated links, a common component shared by all of them
+    if correlation < 0 or correlation > 1: raise Exception("Correlation must be between 0 and 1")
+    normal = np.sqrt(correlation)*rng.standard_normal((samples, 1)) + np.sqrt(1 - correlation)*rng.standard_normal((samples, K))
+
+  else:
+    correlation = np.asarray(correlation, dtype=float)
+    if correlation.shape != (K, K): raise Exception("Correlation matrix must have shape (K, K)")
+    normal = rng.standard_normal((samples, K)) @ np.linalg.cholesky(correlation).T
+
+  normal *= standardDeviation_dB
+  return normal
+
+def simulateDisponibility(receivedPower_dB, sensitivity_dB, standardDeviation_dB, **kwargs):
+  """
+  Estimates by Monte Carlo the disponibility of K links, the probability that the received power plus
+  the shadowing is above the sensitivity.
+
+  Parameters:
+  * receivedPower_dB -> The mean received power of each link, scalar or array of shape (K,) [dB]
+  * sensitivity_dB -> The sensitivity of each receptor, scalar or array of shape (K,) [dB]
+  * standardDeviation_dB -> The standard deviation of the shadowing, scalar or array of shape (K,) [dB]
+  * samples -> Number of samples per link
+  * correlation(?) -> Correlation of the shadowing between links, scalar or (K, K) matrix
+  * memoryBudget -> Maximun memory used by each chunk of samples [bytes]
+  * confidence -> Confidence level of the intervals
+  * intervalMethod -> Interval used {"wilson", "clopperPearson"}
+  * seed(?) -> Seed, SeedSequence or numpy Generator of the simulation
+
+  Returns:
+  * Dictionary:
+    - "disponibility" -> Estimated disponibility of each link
+    - "lower" -> Lower limit of the confidence interval of each link
+    - "upper" -> Upper limit of the confidence interval of each link
+    - "jointDisponibility" -> Estimated probability of all links working at the same time
+    - "jointLower", "jointUpper" -> Confidence interval of the joint disponibility
+    - "samples" -> Number of samples used per link
+  """
+  samples = kwargs.get("samples", 1000000)
+  correlation = kwargs.get("correlation", None)
+  memoryBudget = kwargs.get("memoryBudget", 64*2**20)
+  confidence = kwargs.get("confidence", 0.95)
+  intervalMethod = kwargs.get("intervalMethod", "wilson")
+  rng = np.random.default_rng(kwargs.get("seed", None))
+
+  receivedPower_dB, sensitivity_dB, standardDeviation_dB = np.broadcast_arrays(np.atleast_1d(np.asarray(receivedPower_dB, dtype=float)), np.asarray(sensitivity_dB, dtype=float), np.asarray(standardDeviation_dB, dtype=float))
+  K = receivedPower_dB.size
+
+  # Margin of each link, the link works while the shadowing does not take it away
+  margin_dB = receivedPower_dB - sensitivity_dB
+
+  # Samples per chunk, three arrays of (chunk, K) are alive at the same time
+  chunk = max(1, int(memoryBudget // (3*8*K)))
+
+  working = np.zeros(K, dtype=np.int64)
+  jointWorking = 0
+  done = 0
+  while done < samples:
+    size = min(chunk, samples - done)
+    works = shadowingSamples(standardDeviation_dB, size, correlation, rng) < margin_dB
+    working += works.sum(axis=0)
+    jointWorking += int(works.all(axis=1).sum())
+    done += size
+
+  lower, upper = utils.binomialConfidenceInterval(working, samples, confidence, intervalMethod)
+  jointLower, jointUpper = utils.binomialConfidenceInterval(jointWorking, samples, confidence, intervalMethod)
+
+  return {
+    "disponibility": working/samples,
+    "lower": lower,
+    "upper": upper,
+    "jointDisponibility": jointWorking/samples,
+    "jointLower": jointLower,
+    "jointUpper": jointUpper,
+    "samples": samples
+  }
@@ -0,0 +1,116 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  This file contains the solvers used to invert the models of the library, it uses closed forms when
+  the model allows it and falls back to bracketed root finding, with a bounded number of iterations, otherwise.
+"""
+
+import numpy as np
+import ComsChannelsSim.utils as utils
+
+spo = utils.lazyModule("scipy.optimize")
+
+# Path loss models that are linear with log10(distance), so they can be inverted analytically
+logLinearModels = ("friis", "hataUrban", "hataSuburban", "hataOpen")
+
+def invertLogLinear(function, target, referenceDistance = 1000.0):
+  """
+  Inverts a function that is linear with log10(x), like most path loss models. The slope and
+  offset are obtained from two evaluations of the function, one decade apart.
+
+  Parameters:
+  * function -> Function to invert, receives x and returns the value (Must accept numpy arrays)
+  * target -> The value or values of the function we want to obtain
+  * referenceDistance -> The x used as reference for the first evaluation
+
+  Returns:
+  * x -> The x where the function reaches the target, same shape as target
+  """
+  target = np.asarray(target, dtype=float)
+
+  reference = function(referenceDistance)
+  slope = function(10*referenceDistance) - reference # Per decade
+  if np.any(slope == 0): raise Exception("Function does not depend on the distance")
+
+  return referenceDistance*np.power(10.0, (target - reference)/slope)
+
+def bracketedRoot(function, target, lower, upper, **kwargs):
+  """
+  Finds x in [lower, upper] such that function(x) = target, for a monotone function. Scalar targets
+  are solved with Brent's method, arrays of targets are solved all at once by bisection. In both cases
+  the number of iterations is bounded.
+
+  Parameters:
+  * function -> Monotone function, receives x and returns the value (Must accept numpy arrays for batches)
+  * target -> The value or values of the function we want to obtain
+  * lower -> Lower limit of the bracket
+  * upper -> Upper limit of the bracket
+  * logarithmic -> If the bisection is performed over log10(x), recommended for distances [Boolean]
+  * tolerance -> Relative tolerance of x
+  * maxIterations -> Maximun number of iterations performed
+
+  Returns:
+  * x -> The solution, targets outside of the bracket are returned as np.nan
+  """
+  logarithmic = kwargs.get("logarithmic", False)
+  tolerance = kwargs.get("tolerance", 1e-12)
+  maxIterations = kwargs.get("maxIterations", 200)
+
+  if lower >= upper: raise Exception("The lower limit must be smaller than the upper limit")
+  if logarithmic and lower <= 0: raise Exception("The lower limit must be higher than 0 for logarithmic searches")
+
+  target = np.asarray(target, dtype=float)
+  fLower = function(lower)
+  fUpper = function(upper)
+  increasing = fUpper > fLower
+
+  # Scalar target, Brent's method
+  if target.ndim == 0:
+    if (target - fLower)*(target - fUpper) > 0: return np.nan
+    return spo.brentq(lambda x: function(x) - target, lower, upper, xtol = 1e-300, rtol = max(tolerance, 4*np.finfo(float).eps), maxiter = maxIterations)
+
+  # Array of targets, vectorized bisection
+  a = np.full(target.shape, np.log10(lower) if logarithmic else lower, dtype=float)
+  b = np.full(target.shape, np.log10(upper) if logarithmic else upper, dtype=float)
+  outside = (target - fLower)*(target - fUpper) > 0
+
+  for it in range(maxIterations):
+    middle = (a + b)/2
+    value = function(np.power(10.0, middle) if logarithmic else middle)
+    below = (value < target) if increasing else (value > target)
+    a = np.where(below, middle, a)
+    b = np.where(below, b, middle)
+    if logarithmic and np.all(b - a < tolerance/np.log(10)): break
+    elif not logarithmic and np.all(b - a <= tolerance*np.maximum(np.abs(a), np.abs(b))): break
+
+  x = (a + b)/2
+  if logarithmic: x = np.power(10.0, x)
+  return np.where(outside, np.nan, x)
+
+def invertLossAttenuation(lossFunction, attenuation_dB, **kwargs):
+  """
+  Calculates the distance at which a path loss model reaches the given attenuation.
+
+  Parameters:
+  * lossFunction -> Function that receives the distance and the model parameters and returns the attenuation, such as channelElement.lossAttenuation
+  * attenuation_dB -> The attenuation or attenuations to reach [dB]
+  * lossModel -> The model we want to use to calculate path loss attenuation
+  * minDistance -> Lower limit of the search for models without closed form [m]
+  * maxDistance -> Upper limit of the search for models without closed form [m]
+  * The rest of parameters of the loss model used
+
+  Returns:
+  * distance -> The distance obtained, same shape as attenuation_dB [m]
+  """
+  lossModel = kwargs.get("lossModel", None)
+  if lossModel == None: raise Exception("Loss model parameter is missing")
+
+  minDistance = kwargs.pop("minDistance", 1e-3)
+  maxDistance = kwargs.pop("maxDistance", 1e9)
+
+  function = lambda distance: lossFunction(distance = distance, **kwargs)
+
+  if lossModel in logLinearModels: return invertLogLinear(function, attenuation_dB)
+  else: return bracketedRoot(function, attenuation_dB, minDistance, maxDistance, logarithmic = True)
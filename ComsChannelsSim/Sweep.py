@@ -0,0 +1,120 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  This file contains the parameter sweep executor, it evaluates a function over every combination of a
+  grid of parameters, splitting the grid in chunks that are sent to a pool of processes, and collects
+  the results in a table in the same order as the grid.
+"""
+
+import os
+import itertools
+import numpy as np
+import concurrent.futures
+
+def parameterGrid(grid):
+  """
+  Builds the table with every combination of the parameters of a grid, the last parameter changes the fastest.
+
+  Parameters:
+  * grid -> Dictionary with the name of each parameter and the values it takes
+
+  Returns:
+  * table -> Structured array with one field per parameter and one row per combination
+  """
+  if len(grid) == 0: raise Exception("The grid must have at least one parameter")
+
+  names = list(grid.keys())
+  values = [np.asarray(grid[name]) for name in names]
+  for name, value in zip(names, values):
+    if value.ndim != 1 or value.size == 0: raise Exception("The values of " + name + " must be a non empty list")
+
+  table = np.empty(int(np.prod([value.size for value in values])), dtype=[(name, value.dtype) for name, value in zip(names, values)])
+  for name, column in zip(names, np.meshgrid(*values, indexing="ij")):
+    table[name] = column.ravel()
+
+  return table
+
+def evaluateChunk(function, fixed, points):
+  """
+  Evaluates the function over a chunk of the grid, it is the task run by each worker.
+  """
+  names = points.dtype.names
+  return [function(**fixed, **{name: point[name].item() for name in names}) for point in points]
+
+def sweep(function, grid, **kwargs):
+  """
+  Evaluates a function over every combination of a grid of parameters. The function is called with
+  the fixed parameters and one value of each parameter of the grid as keyword arguments, it must be
+  picklable (a module level function, a bound method of a picklable object or a functools.partial).
+  As the same function is evaluated over the same points the results do not depend on the number of workers.
+
+  Parameters:
+  * function -> The function evaluated, it must return a scalar
+  * grid -> Dictionary with the name of each parameter and the values it takes
+  * fixed -> Dictionary of parameters passed to every call
+  * workers -> Number of processes used, 1 evaluates the grid in this process, None uses all the cores
+  * chunkSize(?) -> Number of points of each task, by default the grid is split in 4 tasks per worker
+  * progress(?) -> Function called as progress(done, total) each time a chunk finishes
+  * dtype -> Type of the result column
+
+  Returns:
+  * table -> Structured array with one field per parameter and the field "result", in the order of the grid
+  """
+  fixed = kwargs.get("fixed", {})
+  workers = kwargs.get("workers", None)
+  chunkSize = kwargs.get("chunkSize", None)
+  progress = kwargs.get("progress", None)
+  dtype = kwargs.get("dtype", float)
+
+  points = parameterGrid(grid)
+  total = points.size
+
+  if workers is None: workers = os.cpu_count() or 1
+  if workers < 1: raise Exception("The number of workers must be at least 1")
+  if chunkSize is None: chunkSize = max(1, -(-total // (4*workers)))
+
+  chunks = [points[first:first + chunkSize] for first in range(0, total, chunkSize)]
+  results = [None]*len(chunks)
+  done = 0
+
+  if workers == 1:
+    for index, chunk in enumerate(chunks):
+      results[index] = evaluateChunk(function, fixed, chunk)
+      done += chunk.size
+      if progress is not None: progress(done, total)
+
+  else:
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as executor:
+      futures = {executor.submit(evaluateChunk, function, fixed, chunk): index for index, chunk in enumerate(chunks)}
+      for future in concurrent.futures.as_completed(futures):
+        index = futures[future]
+        results[index] = future.result()
+        done += chunks[index].size
+        if progress is not None: progress(done, total)
+
+  table = np.empty(total, dtype=points.dtype.descr + [("result", dtype)])
+  for name in points.dtype.names:
+    table[name] = points[name]
+  table["result"] = list(itertools.chain.from_iterable(results))
+
+  return table
+
+def channelSweep(channel, methodName, grid, **kwargs):
+  """
+  Sweeps a method of a channel element, for example calculateDistance_reachProbability or
+  calculatePower_reachProbability, over a grid of its keyword parameters. The channel is sent
+  to the workers with each task, so its gains and attenuations are the ones it has when called.
+
+  Parameters:
+  * channel -> The channel element used
+  * methodName -> Name of the method of the channel evaluated
+  * grid -> Dictionary with the name of each parameter and the values it takes
+  * Any other parameter of sweep (fixed, workers, chunkSize, progress, dtype)
+
+  Returns:
+  * table -> Structured array with one field per parameter and the field "result", in the order of the grid
+  """
+  if not hasattr(channel, methodName): raise Exception("The channel does not have the method " + methodName)
+  return sweep(getattr(channel, methodName), grid, **kwargs)
@@ -8,28 +8,45 @@ Description:
 """
 
 import numpy as np
-import random
-import matplotlib.pyplot as plt
-import scipy as sp
+import importlib
 import math
 
+class lazyModule:
+  def __init__(self, name):
+    """
+    Module that is only imported the first time one of its attributes is used, so the heavy libraries
+    (matplotlib, komm, scipy) are not loaded by the processes that never use them.
+
+    Parameters:
+    * name -> Full name of the module, for example "matplotlib.pyplot"
+    """
+    self.name = name
+    self.module = None
+
+  def __getattr__(self, attribute):
+    # Only called for the attributes that are not name or module, so they belong to the real module
+    if self.module is None: self.module = importlib.import_module(self.name)
+    return getattr(self.module, attribute)
+
+  def __repr__(self):
+    return "<lazy module '{}' ({})>".format(self.name, "loaded" if self.module is not None else "not loaded")
+
+sp = lazyModule("scipy")
+
 k = 1.3803e-23 # Boltzman constant
 
-def generateSequenceBits(probabilityOnes, samples):
+def generateSequenceBits(probabilityOnes, samples, rng = None):
   """
   Generates a random sequenece of n samples with a probability of generating
   a 1 provided.
-  """
-
-  arr = []
 
-  for i in range(samples):
-    if random.random() < probabilityOnes:
-      arr.append(1)
-    else:
-      arr.append(0)
-  
-  return np.array(arr)
+  Parameters:
+  * probabilityOnes -> Probability of each sample being a 1
+  * samples -> Number of samples
+  * rng(?) -> numpy Generator used, pass one spawned from a SeedSequence to get independent reproducible streams
+  """
+  if rng is None: rng = np.random.default_rng()
+  return (rng.random(samples) < probabilityOnes).astype(int)
 
 def changeZerosByNegatives(sequence):
   newSequence = np.zeros(sequence.size)
@@ -52,16 +69,54 @@ def obtainBitCombinations(total, ones):
   return np.array(onesCombinations)
 
 def Q(input):
-  return 0.5 - 0.5*sp.special.erf(input/np.sqrt(2))
+  return 0.5*sp.special.erfc(input/np.sqrt(2))
+
+def Qinv(probability):
+  """
+  Inverse of the Q function, Q(Qinv(p)) = p for p in (0, 1)
+  """
+  return np.sqrt(2)*sp.special.erfcinv(2*np.asarray(probability, dtype=float))
 
 def F(input):
   return 1-Q(input)
 
+def binomialConfidenceInterval(successes, trials, confidence = 0.95, method = "wilson"):
+  """
+  Calculates the confidence interval of a probability estimated from successes/trials.
+
+  Parameters:
+  * successes -> Number of successes (or errors) counted, scalar or array
+  * trials -> Number of trials performed, scalar or array
+  * confidence -> Confidence level of the interval
+  * method -> Interval used {"wilson", "clopperPearson"}, Clopper-Pearson is exact and more conservative
+
+  Returns:
+  * (lower, upper) -> Limits of the interval
+  """
+  successes = np.asarray(successes, dtype=float)
+  trials = np.asarray(trials, dtype=float)
+  alpha = 1 - confidence
+
+  if method == "wilson":
+    z = sp.stats.norm.isf(alpha/2)
+    p = successes/trials
+    center = (p + z**2/(2*trials))/(1 + z**2/trials)
+    halfWidth = z*np.sqrt(p*(1 - p)/trials + z**2/(4*trials**2))/(1 + z**2/trials)
+    return np.clip(center - halfWidth, 0, 1), np.clip(center + halfWidth, 0, 1)
+
+  elif method == "clopperPearson":
+    with np.errstate(invalid="ignore"):
+      lower = np.where(successes == 0, 0.0, sp.stats.beta.ppf(alpha/2, successes, trials - successes + 1))
+      upper = np.where(successes == trials, 1.0, sp.stats.beta.ppf(1 - alpha/2, successes + 1, trials - successes))
+    return lower, upper
+
+  else: raise Exception("Method not supported")
+
 def NaturalToLogarithmic(natural):
-  return 10 * math.log(natural, 10)
+  return 10 * np.log10(natural)
 
 def LogarithmicToNatural(logarithmic):
-  return math.pow(10, logarithmic/10.0)
+  return np.power(10.0, np.divide(logarithmic, 10.0))
 
 def FrequencyToWavelength(frequency, speed = 299792458):
   return speed / frequency
@@ -0,0 +1,82 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Import time guard of the library. Every module is imported in a fresh interpreter, the import must not
+  load the heavy libraries (matplotlib, komm, scipy), that are only loaded the first time they are used,
+  and it must take less than the limit provided. The exit code is 1 if any module fails, so it can be run
+  by the CI or before starting a pool of workers.
+
+  Usage: python ImportBenchmark.py [limit in seconds, 1.0 by default] [repetitions, 5 by default]
+"""
+
+import os
+import sys
+import subprocess
+
+modules = [
+  "ComsChannelsSim",
+  "ComsChannelsSim.utils",
+  "ComsChannelsSim.Gaussian",
+  "ComsChannelsSim.ChannelElement",
+  "ComsChannelsSim.LinkBudget",
+  "ComsChannelsSim.CoverageMap",
+  "ComsChannelsSim.Diffraction",
+  "ComsChannelsSim.Solvers",
+  "ComsChannelsSim.Shadowing",
+  "ComsChannelsSim.Sweep",
+  "ComsChannelsSim.Mapping",
+  "ComsChannelsSim.PulseShaping",
+  "ComsChannelsSim.BERSimulation",
+  "ComsChannelsSim.BERTables",
+  "ComsChannelsSim.MarkovChain",
+  "ComsChannelsSim.PowerElement",
+  "ComsChannelsSim.ErrorSimulations",
+  "ComsChannelsSim/ModulationElement-PersonalLaptopPC.py"
+]
+
+heavyLibraries = ("matplotlib", "komm", "scipy")
+
+# Run in the child interpreter, prints the import time and the heavy libraries loaded
+probe = """
+import sys, time, importlib, importlib.util
+name = sys.argv[1]
+start = time.perf_counter()
+if name.endswith(".py"):
+  spec = importlib.util.spec_from_file_location("modulationElementModule", name)
+  spec.loader.exec_module(importlib.util.module_from_spec(spec))
+else: importlib.import_module(name)
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(library for library in {} if library in sys.modules))
+""".format(heavyLibraries)
+
+def measureImport(module, repetitions):
+  """
+  Returns the best import time of a module over several fresh interpreters, and the heavy libraries it loaded
+  """
+  root = os.path.dirname(os.path.abspath(__file__))
+  environment = dict(os.environ, PYTHONPATH = root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+
+  best = float("inf")
+  loaded = ""
+  for repetition in range(repetitions):
+    output = subprocess.run([sys.executable, "-c", probe, module], cwd = root, env = environment, capture_output = True, text = True, check = True).stdout.split()
+    best = min(best, float(output[0]))
+    loaded = output[1] if len(output) > 1 else ""
+
+  return best, loaded
+
+if __name__ == "__main__":
+  limit = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+  repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+  failed = False
+  for module in modules:
+    elapsed, loaded = measureImport(module, repetitions)
+    status = "OK"
+    if loaded != "": status, failed = "FAIL (loads " + loaded + ")", True
+    elif elapsed > limit: status, failed = "FAIL (slower than {} s)".format(limit), True
+    print("{:<55} {:8.3f} s  {}".format(module, elapsed, status))
+
+  sys.exit(1 if failed else 0)
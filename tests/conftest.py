@@ -0,0 +1,22 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Shared fixtures of the tests. The modulation element is loaded from its file, as ModulationElement.py is empty.
+"""
+
+import os
+import sys
+import importlib.util
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root not in sys.path: sys.path.insert(0, root)
+
+@pytest.fixture(scope = "session")
+def modulationElement():
+  spec = importlib.util.spec_from_file_location("modulationElementModule", os.path.join(root, "ComsChannelsSim", "ModulationElement-PersonalLaptopPC.py"))
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  return module.modulationElement
@@ -0,0 +1,41 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests of the Monte Carlo BER engine, direct and importance sampling, and of its process pool.
+"""
+
+import pytest
+import ComsChannelsSim.utils as utils
+import ComsChannelsSim.BERSimulation as BERSimulation
+
+@pytest.mark.parametrize("modulation, M, EbNo_dB", [("PSK", 2, 4), ("PSK", 4, 4), ("PSK", 8, 8), ("QAM", 16, 8), ("PAM", 4, 8)])
+def test_directMatchesAnalytical(modulationElement, modulation, M, EbNo_dB):
+  element = modulationElement(modulation, M)
+  result = BERSimulation.simulateBER(element, utils.LogarithmicToNatural(EbNo_dB), targetErrors = 2000, maxBits = 10**7, seed = 1)
+  expected = element.get_BER_from_EbNo(EbNo_dB = EbNo_dB, method = "analytically")
+
+  # Wide enough for the confidence interval and the nearest neighbour approximation of the analytical formulas
+  assert result["lower"] <= result["BER"] <= result["upper"]
+  assert result["BER"] == pytest.approx(expected, rel = 0.1)
+
+def test_sameResultForAnyNumberOfWorkers(modulationElement):
+  element = modulationElement("QAM", 16)
+  EbNo = utils.LogarithmicToNatural([4, 6])
+  single = BERSimulation.simulateBERCurve(element, EbNo, targetErrors = 500, maxBits = 10**6, memoryBudget = 2**20, seed = 3, workers = 1)
+  parallel = BERSimulation.simulateBERCurve(element, EbNo, targetErrors = 500, maxBits = 10**6, memoryBudget = 2**20, seed = 3, workers = 4)
+  assert single == parallel
+
+@pytest.mark.parametrize("modulation, M, EbNo_dB", [("PSK", 2, 12.6), ("PSK", 4, 12), ("QAM", 16, 12)])
+def test_importanceSamplingReachesLowBER(modulationElement, modulation, M, EbNo_dB):
+  element = modulationElement(modulation, M)
+  result = BERSimulation.simulateBER(element, utils.LogarithmicToNatural(EbNo_dB), estimator = "importance", seed = 5)
+  assert result["BER"] == pytest.approx(element.get_BER_from_EbNo(EbNo_dB = EbNo_dB, method = "analytically"), rel = 0.2)
+  assert result["varianceReduction"] > 10
+
+def test_stopWithoutErrors(modulationElement):
+  element = modulationElement("PSK", 4)
+  results = BERSimulation.simulateBERCurve(element, utils.LogarithmicToNatural([0, 20, 30]), maxBits = 10**4, seed = 1, stopWithoutErrors = True)
+  assert len(results) == 2
+  assert results[-1]["BER"] == 0
@@ -0,0 +1,72 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests of the BER lookup tables, their range, their keys and the simulated build.
+"""
+
+import numpy as np
+import pytest
+import ComsChannelsSim.BERTables as BERTables
+
+def test_analyticalTableMatchesClosedForm(modulationElement):
+  element = modulationElement("QAM", 16)
+  table = BERTables.getBERTable(element, EbNo_dB_min = -5.0, EbNo_dB_max = 20.0, step = 0.01, cacheDirectory = False)
+  EbNo_dB = np.linspace(-4.9937, 19.9871, 101)
+  expected = element.get_BER_from_EbNo(EbNo_dB = EbNo_dB, method = "analytically")
+  assert np.allclose(table.BER(EbNo_dB), expected, rtol = 1e-3, atol = 0)
+
+def test_outsideOfTheTableIsNan(modulationElement):
+  element = modulationElement("PSK", 4)
+  table = BERTables.getBERTable(element, EbNo_dB_min = 0.0, EbNo_dB_max = 10.0, step = 0.1, cacheDirectory = False)
+  BER = table.BER([-1.0, 0.0, 10.0, 10.5])
+  assert np.isnan(BER[0]) and np.isnan(BER[3])
+  assert np.all(np.isfinite(BER[1:3]))
+  assert np.isnan(table.Pe(11.0))
+
+def test_tableMethodUsesTheTablePe(modulationElement):
+  element = modulationElement("PSK", 8)
+  parameters = dict(EbNo_dB_min = 0.0, EbNo_dB_max = 15.0, step = 0.01, cacheDirectory = False)
+  table = element.getBERTable(**parameters)
+  EbNo_dB = np.array([3.337, 9.5])
+  assert np.allclose(element.get_Pe_from_EbNo(EbNo_dB = EbNo_dB, method = "table", **parameters), table.Pe(EbNo_dB))
+
+def test_keyOfSimulatedTables(modulationElement):
+  element = modulationElement("PSK", 4)
+  key = BERTables.tableKey(element, "simulated", 0, 10, 0.1, seed = 1, targetErrors = 100)
+  assert key != BERTables.tableKey(element, "simulated", 0, 10, 0.1, seed = 2, targetErrors = 100)
+  assert key != BERTables.tableKey(element, "simulated", 0, 10, 0.1, seed = 1, targetErrors = 100, simulationStep = 1.0)
+  assert key == BERTables.tableKey(element, "simulated", 0, 10, 0.1, targetErrors = 100, seed = 1, workers = 4)
+  assert BERTables.tableKey(element, "analytically", 0, 10, 0.1) == BERTables.tableKey(element, "analytically", 0, 10, 0.1, seed = 1)
+
+def test_simulatedTableStopsWithoutErrors(modulationElement, tmp_path):
+  element = modulationElement("PSK", 4)
+  table = BERTables.getBERTable(element, method = "simulated", EbNo_dB_min = 0.0, EbNo_dB_max = 40.0, step = 0.1, simulationStep = 1.0,
+                                targetErrors = 200, maxBits = 10**5, seed = 1, cacheDirectory = str(tmp_path))
+  assert np.isfinite(table.BER(2.0)) and table.BER(2.0) == pytest.approx(element.get_BER_from_EbNo(EbNo_dB = 2.0, method = "analytically"), rel = 0.3)
+  assert np.isnan(table.BER(30.0))
+
+  # The second request is read from the cache directory
+  BERTables.loadedTables.clear()
+  cached = BERTables.getBERTable(element, method = "simulated", EbNo_dB_min = 0.0, EbNo_dB_max = 40.0, step = 0.1, simulationStep = 1.0,
+                                 targetErrors = 200, maxBits = 10**5, seed = 1, cacheDirectory = str(tmp_path))
+  assert len(list(tmp_path.iterdir())) == 1
+  assert np.array_equal(cached.logBER, table.logBER, equal_nan = True)
+
+def test_simulatedTablesFollowTheLabeling(modulationElement):
+  parameters = dict(method = "simulated", EbNo_dB_min = 0.0, EbNo_dB_max = 6.0, step = 0.1, simulationStep = 1.0, targetErrors = 2000, maxBits = 10**6, seed = 1, cacheDirectory = False)
+  gray = BERTables.getBERTable(modulationElement("PSK", 8, labeling = "reflected"), **parameters)
+  natural = BERTables.getBERTable(modulationElement("PSK", 8, labeling = "natural"), **parameters)
+  assert gray.key != natural.key
+
+  # An error to a neighbour flips one bit with Gray labels, and up to three with natural ones
+  assert np.all(natural.BER([2.0, 4.0]) > 1.2*gray.BER([2.0, 4.0]))
+  assert gray.BER(4.0) == pytest.approx(modulationElement("PSK", 8).get_BER_from_EbNo(EbNo_dB = 4.0, method = "analytically"), rel = 0.15)
+
+def test_simulatedTablesDoNotDependOnTheAmplitude(modulationElement):
+  parameters = dict(method = "simulated", EbNo_dB_min = 0.0, EbNo_dB_max = 4.0, step = 0.1, simulationStep = 1.0, targetErrors = 2000, maxBits = 10**6, seed = 1, cacheDirectory = False)
+  unit = BERTables.getBERTable(modulationElement("QAM", 16), **parameters)
+  scaled = BERTables.getBERTable(modulationElement("QAM", 16, amplitude = 3.0, phase_offset = 0.3), **parameters)
+  assert unit.key != scaled.key
+  assert np.allclose(scaled.BER([1.0, 3.0]), unit.BER([1.0, 3.0]), rtol = 0.1)
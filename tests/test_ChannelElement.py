@@ -0,0 +1,103 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests of the disponibility and reach probability of the channel element, analytical and simulated.
+"""
+
+import numpy as np
+import pytest
+import ComsChannelsSim.Gaussian as Gaussian
+import ComsChannelsSim.LinkBudget as LinkBudget
+import ComsChannelsSim.Solvers as solvers
+from ComsChannelsSim.ChannelElement import channelElement
+
+@pytest.mark.parametrize("receivedPower_dB", [-99.0, -100.5, -103.0])
+@pytest.mark.parametrize("standardDeviation", [1.0, 3.0])
+def test_bothMethodsOnTheSameSide(receivedPower_dB, standardDeviation):
+  channel = channelElement('AWGN', snr = 10)
+  parameters = dict(sensitivity_dB = -100.0, samples = 10**5, seed = 1)
+  above = receivedPower_dB >= parameters["sensitivity_dB"]
+
+  for method in ("analytically", "simulated"):
+    disponibility = channel.calculateDisponibility(receivedPower_dB = receivedPower_dB, standardDeviation = standardDeviation, method = method, **parameters)
+    indisponibility = channel.calculateIndisponibility(receivedPower_dB = receivedPower_dB, standardDeviation = standardDeviation, method = method, **parameters)
+    reachProbability = channel.calculateReachProbability(transmittedPower_dB = receivedPower_dB, standardDeviation_dB = standardDeviation, method = method, **parameters)
+
+    assert (disponibility > 0.5) == above
+    assert disponibility + indisponibility == pytest.approx(1)
+    assert reachProbability == pytest.approx(indisponibility)
+
+@pytest.mark.parametrize("standardDeviation", [1.0, 6.0])
+@pytest.mark.parametrize("receivedPower_dB", [-90.0, -99.5, -100.5, -108.0])
+def test_methodsAgree(receivedPower_dB, standardDeviation):
+  channel = channelElement('AWGN', snr = 10)
+  parameters = dict(receivedPower_dB = receivedPower_dB, sensitivity_dB = -100.0, standardDeviation = standardDeviation)
+  analytical = channel.calculateDisponibility(**parameters)
+  simulated, lower, upper = channel.calculateDisponibility(method = "simulated", samples = 10**6, seed = 2, interval = True, **parameters)
+  assert lower <= analytical <= upper
+  assert simulated == pytest.approx(analytical, abs = 3e-3)
+
+  indisponibility, lower, upper = channel.calculateIndisponibility(method = "simulated", samples = 10**6, seed = 2, interval = True, **parameters)
+  assert indisponibility == pytest.approx(1 - simulated)
+  assert lower <= channel.calculateIndisponibility(**parameters) <= upper
+
+def test_gaussianRange():
+  errorModel = Gaussian.Gaussian(2.0, 9.0)
+  assert errorModel.probabilityNormalizedRange(min = 5.0) == pytest.approx(0.158655, rel = 1e-5)
+  assert errorModel.probabilityNormalizedRange(min = -1.0) == pytest.approx(0.841345, rel = 1e-5)
+  assert errorModel.probabilityNormalizedRange(max = -1.0) == pytest.approx(0.158655, rel = 1e-5)
+  assert errorModel.probabilityNormalizedRange(-1.0, 5.0) == pytest.approx(0.682689, rel = 1e-5)
+
+@pytest.mark.parametrize("receivedPower_dB", [-98.0, -102.0, -110.0])
+def test_linkBudgetMatchesChannelElement(receivedPower_dB):
+  expected = channelElement('AWGN', snr = 10).calculateReachProbability(transmittedPower_dB = receivedPower_dB, sensitivity_dB = -100.0, standardDeviation_dB = 6.0)
+  budget = LinkBudget.linkBudget()
+  assert budget.calculateReachProbability(receivedPower_dB, -100.0, 6.0) == pytest.approx(expected)
+  assert budget.calculateReceivedPower_reachProbability(expected, -100.0, 6.0) == pytest.approx(receivedPower_dB)
+
+lossModels = [
+  ("friis", dict(wavelength = 0.125, n = 2)),
+  ("hataUrban", dict(baseHeight = 30.0, mobileHeight = 1.5, frequency = 900.0)),
+  ("hataUrban", dict(baseHeight = 50.0, mobileHeight = 3.0, frequency = 150.0, correctionFactorApplied = "Large city")),
+  ("hataSuburban", dict(baseHeight = 30.0, mobileHeight = 1.5, frequency = 900.0)),
+  ("hataOpen", dict(baseHeight = 30.0, mobileHeight = 1.5, frequency = 900.0))
+]
+
+@pytest.mark.parametrize("lossModel, parameters", lossModels)
+def test_vectorizedLossMatchesScalarLoop(lossModel, parameters):
+  distances = np.geomspace(100, 20000, 57)
+  vectorized = channelElement.lossAttenuation(distances, lossModel = lossModel, **parameters)
+  assert vectorized.shape == distances.shape
+  assert np.allclose(vectorized, [float(channelElement.lossAttenuation(float(distance), lossModel = lossModel, **parameters)) for distance in distances])
+
+def test_lossBroadcastsOverParameters():
+  distances = np.array([1000.0, 5000.0])[:, np.newaxis]
+  frequencies = np.array([150.0, 450.0, 900.0])
+  loss = channelElement.lossAttenuation(distances, lossModel = "hataUrban", baseHeight = 30.0, mobileHeight = 1.5, frequency = frequencies)
+  assert loss.shape == (2, 3)
+  assert loss[0, 2] == pytest.approx(126.40, abs = 0.01)
+  assert channelElement.lossAttenuation(1000.0, lossModel = "friis", wavelength = 0.125) == pytest.approx(20*np.log10(4*np.pi*1000/0.125))
+
+@pytest.mark.parametrize("lossModel, parameters", lossModels)
+def test_distanceSearchRoundTrip(lossModel, parameters):
+  channel = channelElement('AWGN', snr = 10)
+  targets = np.array([90.0, 110.0, 130.0, 150.0])
+  distances = channel.calculateDistance_attenuation(attenuation_objetive = targets, lossModel = lossModel, **parameters)
+  assert distances.shape == targets.shape
+  assert np.allclose(channelElement.lossAttenuation(distances, lossModel = lossModel, **parameters), targets, atol = 1e-8)
+
+def test_sensitivityDistanceRoundTrip():
+  channel = channelElement('AWGN', snr = 10)
+  channel.addGain(gain_dB = 15.0)
+  channel.addAttenuation(attenuation_dB = 3.0)
+  parameters = dict(lossModel = "hataSuburban", baseHeight = 40.0, mobileHeight = 2.0, frequency = 800.0)
+  distance = channel.calculateDistance_sensitivity(transmittedPower_dB = 40.0, sensitivity_dB = -100.0, **parameters)
+  assert 40.0 + 15.0 - 3.0 - channelElement.lossAttenuation(distance, **parameters) == pytest.approx(-100.0)
+
+def test_bracketedRoot():
+  function = lambda x: np.power(x, 3) + x
+  assert solvers.bracketedRoot(function, 10.0, 0.0, 5.0) == pytest.approx(2.0)
+  roots = solvers.bracketedRoot(function, np.array([2.0, 10.0, 1e6]), 0.0, 5.0)
+  assert np.allclose(roots[:2], [1.0, 2.0]) and np.isnan(roots[2])
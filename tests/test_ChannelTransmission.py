@@ -0,0 +1,69 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests of the noise generator and of the streaming transmission of the channel element.
+"""
+
+import numpy as np
+import pytest
+from ComsChannelsSim.ChannelElement import channelElement
+
+@pytest.mark.parametrize("band", ["BB", "PB"])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_noiseVarianceAndType(band, dtype):
+  channel = channelElement('AWGN', snr = 4.0, signalPower = 2.0, band = band, seed = 1)
+  noise = channel.generateNoise(10**6, dtype = dtype)
+  assert noise.shape == (10**6,)
+  if band == "BB":
+    assert noise.dtype == dtype
+    assert np.var(noise) == pytest.approx(0.25, rel = 0.01)
+  else:
+    assert noise.dtype == np.result_type(dtype, np.complex64)
+    assert np.var(noise.real) == pytest.approx(0.25, rel = 0.01)
+    assert np.var(noise.imag) == pytest.approx(0.25, rel = 0.01)
+    assert abs(np.mean(noise.real*noise.imag)) < 0.005
+  assert abs(np.mean(noise)) < 0.005
+
+def test_noiseIsReproducible():
+  first = channelElement('AWGN', snr = 10, band = "PB", seed = 7)
+  second = channelElement('AWGN', snr = 10, band = "PB", seed = 7)
+  assert np.array_equal(first.generateNoise(1000), second.generateNoise(1000))
+  assert not np.array_equal(first.generateNoise(1000), channelElement('AWGN', snr = 10, band = "PB", seed = 8).generateNoise(1000))
+
+def test_noiseBlocksContinueTheStream():
+  single = channelElement('AWGN', snr = 10, seed = 3).generateNoise(10000)
+  blocks = list(channelElement('AWGN', snr = 10, seed = 3).generateNoiseBlocks(10000, blockSize = 3000))
+  assert [block.size for block in blocks] == [3000, 3000, 3000, 1000]
+  assert np.array_equal(np.concatenate(blocks), single)
+
+def test_bscErrorRate():
+  channel = channelElement('BSC', crossoverProbability = 0.07, seed = 1)
+  bits = np.random.default_rng(2).integers(0, 2, 10**6)
+  output = np.concatenate(list(channel.transmit(np.array_split(bits, 7))))
+  assert set(np.unique(output)) <= {0, 1}
+  assert np.mean(output != bits) == pytest.approx(0.07, rel = 0.02)
+
+def test_becErasureRate():
+  channel = channelElement('BEC', erasureProbability = 0.2, seed = 1)
+  bits = np.random.default_rng(2).integers(0, 2, 10**6).astype(np.uint8)
+  output = next(channel.transmit(bits))
+  erased = output == -1
+  assert np.mean(erased) == pytest.approx(0.2, rel = 0.01)
+  assert np.array_equal(output[~erased], bits[~erased])
+
+def test_dmcTransitions():
+  transitionMatrix = [[0.8, 0.15, 0.05], [0.1, 0.7, 0.2], [0.0, 0.3, 0.7]]
+  channel = channelElement('DMC', transitionMatrix = transitionMatrix, seed = 1)
+  inputs = np.repeat(np.arange(3), 200000)
+  output = channel.transmitBlock(inputs)
+  frequencies = [np.bincount(output[inputs == symbol], minlength = 3)/200000 for symbol in range(3)]
+  assert np.allclose(frequencies, transitionMatrix, atol = 0.005)
+
+def test_streamDoesNotDependOnTheBlocks():
+  symbols = np.exp(2j*np.pi*np.random.default_rng(4).integers(0, 4, 100000)/4)
+  single = next(channelElement('AWGN', snr = 5, band = "PB", seed = 9).transmit(symbols))
+  streamed = channelElement('AWGN', snr = 5, band = "PB", seed = 9).transmit(block for block in np.array_split(symbols, 13))
+  assert np.array_equal(np.concatenate(list(streamed)), single)
+  assert np.var(single - symbols) == pytest.approx(0.2, rel = 0.02)
@@ -0,0 +1,47 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests of the tiled coverage maps against a direct evaluation of the whole grid.
+"""
+
+import numpy as np
+import pytest
+import ComsChannelsSim.LinkBudget as LinkBudget
+import ComsChannelsSim.CoverageMap as CoverageMap
+
+budget = LinkBudget.linkBudget(totalGain_dB = 10.0).setLossModel(lossModel = "hataUrban", baseHeight = 30.0, mobileHeight = 1.5, frequency = 900.0)
+transmitters = np.array([[0.0, 0.0], [3000.0, 1500.0]])
+x = np.linspace(-2000, 5000, 83)
+y = np.linspace(-1000, 4000, 61)
+
+def directMap(transmittedPower_dB):
+  distances = [np.maximum(np.hypot(x[np.newaxis, :] - tx, y[:, np.newaxis] - ty), 1.0) for tx, ty in transmitters]
+  return np.max([budget.calculateReceivedPower(power, distance) for power, distance in zip(transmittedPower_dB, distances)], axis=0)
+
+@pytest.mark.parametrize("tileSize", [7, 32, 512])
+def test_tilesMatchTheDirectMap(tileSize):
+  coverage = CoverageMap.calculateCoverageMap(budget, transmitters, x, y, transmittedPower_dB = [40.0, 37.0], tileSize = tileSize)
+  assert coverage.shape == (y.size, x.size)
+  assert np.allclose(coverage, directMap([40.0, 37.0]))
+
+def test_quantities():
+  receivedPower = directMap([40.0, 40.0])
+  margin = CoverageMap.calculateCoverageMap(budget, transmitters, x, y, transmittedPower_dB = 40.0, quantity = "linkMargin", sensitivity_dB = -100.0, tileSize = 16)
+  assert np.allclose(margin, receivedPower + 100.0)
+
+  probability = CoverageMap.calculateCoverageMap(budget, transmitters, x, y, transmittedPower_dB = 40.0, quantity = "reachProbability", sensitivity_dB = -100.0, standardDeviation_dB = 6.0, tileSize = 16)
+  assert np.allclose(probability, LinkBudget.linkBudget().calculateReachProbability(receivedPower, -100.0, 6.0))
+
+def test_memoryMappedOutput(tmp_path):
+  filename = str(tmp_path / "coverage.npy")
+  coverage = CoverageMap.calculateCoverageMap(budget, transmitters, x, y, transmittedPower_dB = 40.0, tileSize = 20, dtype = np.float32, filename = filename)
+  assert isinstance(coverage, np.memmap)
+  stored = np.load(filename)
+  assert stored.dtype == np.float32
+  assert np.allclose(stored, directMap([40.0, 40.0]), atol = 1e-4)
+
+  out = np.zeros((y.size, x.size))
+  assert CoverageMap.calculateCoverageMap(budget, transmitters, x, y, transmittedPower_dB = 40.0, tileSize = 9, out = out) is out
+  assert np.allclose(out, directMap([40.0, 40.0]))
@@ -0,0 +1,87 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests of the multiple edge terrain diffraction against the single knife edge model.
+"""
+
+import numpy as np
+import pytest
+import ComsChannelsSim.Diffraction as Diffraction
+from ComsChannelsSim.ChannelElement import channelElement
+
+wavelength = 0.3
+distances = np.linspace(0, 10000, 101)
+
+def singleEdgeProfile(index, height):
+  profile = np.zeros(distances.size)
+  profile[index] = height
+  return profile
+
+@pytest.mark.parametrize("method", ["deygout", "epsteinPeterson"])
+@pytest.mark.parametrize("index, height", [(50, 40.0), (20, 25.0), (80, 60.0), (35, 8.0)])
+def test_singleEdgeMatchesKnifeEdge(method, index, height):
+  txHeight, rxHeight = 10.0, 20.0
+  lineOfSight = txHeight + (rxHeight - txHeight)*distances[index]/distances[-1]
+  expected = channelElement('AWGN', snr = 10).diffractionAttenuation(tx_distance = distances[index], rx_distance = distances[-1] - distances[index],
+                                                                     distance_to_peak = height - lineOfSight, wavelength = wavelength, method = "exact")
+
+  Adiff = Diffraction.multipleEdgeDiffraction(singleEdgeProfile(index, height), distances, txHeight, rxHeight, wavelength,
+                                              method = method, fresnelMethod = "exact")
+  assert Adiff.shape == (1,)
+  assert Adiff[0] == pytest.approx(expected, rel = 1e-9)
+
+def test_twoEdges():
+  profile = np.zeros(distances.size)
+  profile[30], profile[70] = 30.0, 20.0
+  heights = {0: 10.0, 30: 30.0, 70: 20.0, 100: 10.0}
+
+  def v(previous, edge, following):
+    d1, d2 = distances[edge] - distances[previous], distances[following] - distances[edge]
+    lineOfSight = heights[previous] + (heights[following] - heights[previous])*d1/(d1 + d2)
+    return (heights[edge] - lineOfSight)*np.sqrt(2*(d1 + d2)/(wavelength*d1*d2))
+
+  # The main edge is the one at 30, the secondary one is evaluated from it to the receiver
+  deygout = Diffraction.fresnelAttenuation(v(0, 30, 100)) + Diffraction.fresnelAttenuation(v(30, 70, 100))
+  epsteinPeterson = Diffraction.fresnelAttenuation(v(0, 30, 70)) + Diffraction.fresnelAttenuation(v(30, 70, 100))
+
+  arguments = dict(fresnelMethod = "exact")
+  assert Diffraction.multipleEdgeDiffraction(profile, distances, 10.0, 10.0, wavelength, method = "deygout", **arguments)[0] == pytest.approx(deygout)
+  assert Diffraction.multipleEdgeDiffraction(profile, distances, 10.0, 10.0, wavelength, method = "epsteinPeterson", **arguments)[0] == pytest.approx(epsteinPeterson)
+
+@pytest.mark.parametrize("method", ["deygout", "epsteinPeterson"])
+def test_batchMatchesEachLink(method):
+  rng = np.random.default_rng(1)
+  profiles = np.cumsum(rng.normal(0, 3, (50, distances.size)), axis=1)
+  txHeight = rng.uniform(5, 40, 50)
+
+  batch = Diffraction.multipleEdgeDiffraction(profiles, distances, txHeight, 15.0, wavelength, method = method, depth = 3, chunkSize = 16)
+  single = [Diffraction.multipleEdgeDiffraction(profiles[link], distances, txHeight[link], 15.0, wavelength, method = method, depth = 3)[0] for link in range(50)]
+  assert np.allclose(batch, single)
+
+def test_tableMatchesExact():
+  v = np.linspace(-5, 30, 2001)
+  assert np.allclose(Diffraction.fresnelAttenuationTable(v), Diffraction.fresnelAttenuation(v), atol = 1e-3)
+
+def test_knifeEdgeReferenceValues():
+  assert Diffraction.fresnelAttenuation(0.0) == pytest.approx(20*np.log10(2))
+  assert abs(Diffraction.fresnelAttenuation(-50.0)) < 0.1
+
+  # ITU-R P.526 approximation, valid above -0.78 to a fraction of a dB
+  v = np.linspace(0, 20, 81)
+  approximation = 6.9 + 20*np.log10(np.sqrt(np.square(v - 0.1) + 1) + v - 0.1)
+  assert np.allclose(Diffraction.fresnelAttenuation(v), approximation, atol = 0.6)
+
+def test_tableErrorBound():
+  table = Diffraction.fresnelTable(-5.0, 10.0, 1e-2)
+  v = np.random.default_rng(1).uniform(-5.0, 10.0, 10000)
+  assert np.max(np.abs(table.evaluate(v) - Diffraction.fresnelAttenuation(v))) <= table.errorBound
+  assert table.evaluate(25.0) == pytest.approx(Diffraction.fresnelAttenuation(25.0))
+  assert np.ndim(table.evaluate(1.0)) == 0 and table.evaluate(np.ones((2, 3))).shape == (2, 3)
+
+def test_channelElementMethods():
+  channel = channelElement('AWGN', snr = 10)
+  v = np.array([-1.0, 0.0, 2.5])
+  assert np.allclose(channel.calculateDifractionAttenuationFresnel(v), Diffraction.fresnelAttenuation(v))
+  assert np.allclose(channel.calculateDifractionAttenuationFresnel(v, method = "table"), Diffraction.fresnelAttenuation(v), atol = 1e-3)
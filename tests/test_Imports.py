@@ -0,0 +1,20 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests that importing the modules of the library does not load the heavy libraries, each module is
+  imported in a fresh interpreter by the probe of ImportBenchmark.
+"""
+
+import pytest
+import ImportBenchmark
+
+@pytest.mark.parametrize("module", ImportBenchmark.modules)
+def test_importDoesNotLoadHeavyLibraries(module):
+  elapsed, loaded = ImportBenchmark.measureImport(module, 1)
+  assert loaded == "", "{} loads {}".format(module, loaded)
+
+def test_probeDetectsHeavyLibraries():
+  elapsed, loaded = ImportBenchmark.measureImport("scipy.special", 1)
+  assert "scipy" in loaded.split(",")
@@ -0,0 +1,60 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests of the immutable link budget and of its use from several threads.
+"""
+
+import pickle
+import dataclasses
+import concurrent.futures
+import numpy as np
+import pytest
+import ComsChannelsSim.LinkBudget as LinkBudget
+from ComsChannelsSim.ChannelElement import channelElement
+
+def hataBudget():
+  return LinkBudget.linkBudget().addGain(12.0).addAttenuation(4.0).setLossModel(lossModel = "hataUrban", baseHeight = 30.0, mobileHeight = 1.5, frequency = 900.0, seed = 3)
+
+def test_budgetIsImmutable():
+  budget = LinkBudget.linkBudget(totalGain_dB = 10.0)
+  with pytest.raises(dataclasses.FrozenInstanceError): budget.totalGain_dB = 5.0
+
+  changed = budget.addGain(3.0).addAttenuation(2.0)
+  assert budget.totalGain_dB == 10.0 and budget.totalAttenuation_dB == 0.0
+  assert changed.totalGain_dB == 13.0 and changed.totalAttenuation_dB == 2.0
+
+def test_budgetKeepsOnlyTheLossParameters():
+  budget = hataBudget()
+  assert budget.getLossParameters() == dict(baseHeight = 30.0, mobileHeight = 1.5, frequency = 900.0)
+  assert pickle.loads(pickle.dumps(budget)) == budget
+  assert hash(budget) == hash(hataBudget())
+
+def test_budgetMatchesChannelElement():
+  channel = channelElement('AWGN', snr = 10)
+  channel.addGain(gain_dB = 12.0)
+  channel.addAttenuation(attenuation_dB = 4.0)
+  budget = channel.getLinkBudget(lossModel = "hataUrban", baseHeight = 30.0, mobileHeight = 1.5, frequency = 900.0)
+  assert budget == hataBudget()
+  assert budget.calculateReceivedPower(30.0) == pytest.approx(channel.calculateRecivedPower(transmittedPower_dB = 30.0))
+
+  # Evaluating the budget does not change the channel
+  budget.calculateReceivedPower(30.0, distance = np.array([1000.0, 2000.0]))
+  assert channel.totalAttenuation_dB == 4.0
+
+def test_reachProbabilityRoundTrips():
+  budget = hataBudget()
+  distance = budget.calculateDistance_reachProbability(40.0, np.array([0.01, 0.1, 0.5]), -100.0, 6.0)
+  assert np.allclose(budget.calculateReachProbability(40.0, -100.0, 6.0, distance = distance), [0.01, 0.1, 0.5])
+
+  power = budget.calculatePower_reachProbability(np.array([2000.0, 5000.0]), 0.05, -100.0, 6.0)
+  assert np.allclose(budget.calculateReachProbability(power, -100.0, 6.0, distance = np.array([2000.0, 5000.0])), 0.05)
+
+def test_sharedBetweenThreads():
+  budget = hataBudget()
+  distances = [np.geomspace(100, 10000, 1000) + offset for offset in range(16)]
+  expected = [budget.calculateLinkMargin(30.0, -100.0, distance) for distance in distances]
+  with concurrent.futures.ThreadPoolExecutor(4) as executor:
+    results = list(executor.map(lambda distance: budget.calculateLinkMargin(30.0, -100.0, distance), distances))
+  assert all(np.array_equal(result, reference) for result, reference in zip(results, expected))
@@ -0,0 +1,104 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests of the mapper, the slicer and the LLR demapper against komm.
+"""
+
+import numpy as np
+import pytest
+import komm
+import ComsChannelsSim.Mapping as Mapping
+
+configurations = [("PSK", M) for M in (2, 4, 8, 16)] + [("QAM", M) for M in (4, 16, 64)] + [("PAM", M) for M in (2, 4, 8)]
+
+def kommModel(modulation, M):
+  if modulation == "PSK": return komm.PSKModulation(M)
+  if modulation == "QAM": return komm.QAModulation(M)
+  return komm.PAModulation(M)
+
+@pytest.mark.parametrize("modulation, M", configurations)
+def test_labelsMatchKomm(modulationElement, modulation, M):
+  element = modulationElement(modulation, M)
+  assert np.array_equal(element.labels, np.asarray(kommModel(modulation, M).labeling))
+
+@pytest.mark.parametrize("modulation, M", configurations)
+def test_codifyAndDecodifyMatchKomm(modulationElement, modulation, M):
+  element = modulationElement(modulation, M)
+  model = kommModel(modulation, M)
+  rng = np.random.default_rng(1)
+  bits = rng.integers(0, 2, 3000*int(np.log2(M)))
+
+  symbols = element.codify(bits, chunkSize = 1000)
+  assert np.allclose(symbols, model.modulate(bits))
+
+  noise = rng.standard_normal(symbols.size) + 1j*rng.standard_normal(symbols.size)
+  received = symbols + 0.3*(noise if modulation != "PAM" else noise.real)
+  assert np.array_equal(element.decodify(received), model.demodulate_hard(received))
+  assert np.array_equal(element.decodify(symbols), bits)
+
+@pytest.mark.parametrize("modulation, M", [("PSK", 8), ("QAM", 16), ("PAM", 4)])
+def test_exactLLRMatchesKomm(modulationElement, modulation, M):
+  element = modulationElement(modulation, M)
+  model = kommModel(modulation, M)
+  rng = np.random.default_rng(2)
+  symbols = element.codify(rng.integers(0, 2, 2000*int(np.log2(M))))
+  noise = rng.standard_normal(symbols.size) + 1j*rng.standard_normal(symbols.size)
+  received = symbols + 0.4*(noise if modulation != "PAM" else noise.real)
+
+  # komm uses the SNR Es/No with No the total noise power
+  Es = np.mean(np.abs(model.constellation)**2)
+  No = 2*0.4**2 if modulation != "PAM" else 0.4**2
+  expected = model.demodulate_soft(received, snr = Es/No)
+  LLR = element.decodifyLLR(received, No = No, blockSize = 333)
+
+  finite = np.isfinite(expected)
+  assert np.allclose(LLR[finite], expected[finite], atol = 1e-9)
+
+def test_maxLogIsCloseToExactAtHighSNR(modulationElement):
+  element = modulationElement("QAM", 64)
+  rng = np.random.default_rng(3)
+  symbols = element.codify(rng.integers(0, 2, 6000))
+  received = symbols + 0.05*(rng.standard_normal(symbols.size) + 1j*rng.standard_normal(symbols.size))
+  exact = element.decodifyLLR(received, No = 0.005)
+  maxLog = element.decodifyLLR(received, No = 0.005, method = "maxLog")
+  assert np.all(np.isfinite(exact))
+  assert np.array_equal(np.sign(exact), np.sign(maxLog))
+
+def test_nearestSlicerMatchesArgmin():
+  rng = np.random.default_rng(4)
+  constellation = rng.standard_normal(12) + 1j*rng.standard_normal(12)
+  slicer = Mapping.buildSlicer(constellation)
+  received = rng.standard_normal(5000) + 1j*rng.standard_normal(5000)
+  assert slicer["type"] == "nearest"
+  assert np.array_equal(Mapping.sliceIndexes(received, slicer, chunkSize = 700), np.argmin(np.abs(received[:, None] - constellation[None, :]), axis = 1))
+
+def noisySymbols(element, modulation, M, EbNo_dB, rng):
+  # AWGN with the No of the modulation element, No/2 per real dimension
+  symbols = element.codify(rng.integers(0, 2, 20000*int(np.log2(M))))
+  noise = rng.standard_normal(symbols.size) + 1j*rng.standard_normal(symbols.size)
+  return symbols + np.sqrt(element.get_No_from_EbNo(EbNo_dB = EbNo_dB)/2)*(noise if modulation != "PAM" else noise.real)
+
+@pytest.mark.parametrize("modulation, M", [("PSK", 2), ("PSK", 8), ("QAM", 16), ("QAM", 64), ("PAM", 4)])
+def test_maxLogSignMatchesExact(modulationElement, modulation, M):
+  element = modulationElement(modulation, M)
+  received = noisySymbols(element, modulation, M, 12, np.random.default_rng(5))
+  exact = element.decodifyLLR(received, EbNo_dB = 12)
+  maxLog = element.decodifyLLR(received, EbNo_dB = 12, method = "maxLog")
+  assert np.array_equal(np.sign(exact), np.sign(maxLog))
+
+  # The sign of the max-log LLR is the hard decision at any EbNo (LLR > 0 is a 0)
+  received = noisySymbols(element, modulation, M, 2, np.random.default_rng(6))
+  maxLog = element.decodifyLLR(received, EbNo_dB = 2, method = "maxLog")
+  assert np.array_equal(maxLog < 0, element.decodify(received).astype(bool))
+
+@pytest.mark.parametrize("method", ["exact", "maxLog"])
+def test_LLRByBlocksMatchesOneShot(modulationElement, method):
+  element = modulationElement("QAM", 16)
+  received = noisySymbols(element, "QAM", 16, 6, np.random.default_rng(7))
+  No = element.get_No_from_EbNo(EbNo_dB = 6)
+  oneShot = element.decodifyLLR(received, No = No, method = method)
+  # The sums of the likelihoods are matrix products, their rounding can change with the size of the block
+  assert np.allclose(element.decodifyLLR(received, EbNo_dB = 6, method = method, blockSize = 777), oneShot, rtol = 1e-12, atol = 1e-12)
+  assert oneShot.shape == (received.size*4,)
@@ -0,0 +1,176 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests of the Markov chain simulators and of the exact pattern and error number probabilities.
+"""
+
+import random
+import itertools
+import numpy as np
+import pytest
+import ComsChannelsSim.MarkovChain as MarkovChain
+
+def gilbertChain():
+  return MarkovChain.markovChain(M = 2, T = [[0.99, 0.12], [0.01, 0.88]], Pe = [0, 0.3])
+
+def threeStateChain():
+  T = np.array([[0.9, 0.2, 0.05], [0.07, 0.7, 0.15], [0.03, 0.1, 0.8]])
+  chain = MarkovChain.markovChain(M = 3, T = T.tolist(), Pe = [0.001, 0.1, 0.4])
+  values, vectors = np.linalg.eig(T)
+  stationary = np.real(vectors[:, np.argmin(np.abs(values - 1))])
+  chain.Π = stationary/stationary.sum()
+  return chain
+
+def referenceLoop(chain, iterations, state, seed):
+  """
+  Bit by bit simulation, the previous simulateModel extended to M states
+  """
+  generator = random.Random(seed)
+  T = np.asarray(chain.T)
+  errors = np.zeros(iterations, dtype=np.uint8)
+  for bit in range(iterations):
+    if generator.random() < chain.Pe[state]: errors[bit] = 1
+    uniform = generator.random()
+    state = min(int(np.searchsorted(np.cumsum(T[:, state]), uniform, side="right")), chain.M - 1)
+  return errors
+
+def patternFrequencies(errors):
+  errors = errors.astype(np.int8)
+  return np.array([np.mean(errors), np.mean(errors[1:] & errors[:-1]), np.mean(errors[2:] & (1 - errors[1:-1]) & errors[:-2])])
+
+def exactFrequencies(chain):
+  return chain.calculateErrorPattern([1]), chain.calculateErrorPattern([1, 1]), chain.calculateErrorPattern([1, 0, 1])
+
+chains = [gilbertChain, threeStateChain]
+
+@pytest.mark.parametrize("build", chains)
+def test_referenceLoopMatchesExactPatterns(build):
+  chain = build()
+  assert patternFrequencies(referenceLoop(chain, 300000, 0, 1)) == pytest.approx(exactFrequencies(chain), rel = 0.2)
+
+@pytest.mark.parametrize("build", chains)
+def test_simulateModelMatchesExactPatterns(build):
+  chain = build()
+  errors = chain.simulateModel(2*10**6, 0, seed = 1, chunkSize = 100000)
+  assert errors.dtype == np.uint8
+  assert patternFrequencies(errors) == pytest.approx(exactFrequencies(chain), rel = 0.1)
+
+def test_simulateModelWithFastSwitchingChain():
+  chain = MarkovChain.markovChain(M = 3, T = [[0, 0.5, 0.5], [0.5, 0, 0.5], [0.5, 0.5, 0]], Pe = [0, 0.5, 1])
+  chain.Π = np.full(3, 1/3)
+  errors = chain.simulateModel(10**6, 0, seed = 2, chunkSize = 1000)
+  assert patternFrequencies(errors) == pytest.approx(exactFrequencies(chain), rel = 0.05)
+
+def test_simulateModelWithAbsorbingState():
+  chain = MarkovChain.markovChain(M = 2, T = [[1.0, 0.5], [0.0, 0.5]], Pe = [0.01, 0.5])
+  errors = chain.simulateModel(10**6, 1, seed = 3)
+  assert np.mean(errors) == pytest.approx(0.01, rel = 0.1)
+
+@pytest.mark.parametrize("build, chunkSize", [(gilbertChain, 370), (threeStateChain, 500)])
+def test_parallelBridgesMatchExactPatterns(build, chunkSize):
+  chain = build()
+  errors = chain.simulateModelParallel(10**6, 0, seed = 1, chunkSize = chunkSize, workers = 1)
+  assert patternFrequencies(errors) == pytest.approx(exactFrequencies(chain), rel = 0.1)
+
+def test_parallelIsIndependentOfTheWorkers():
+  chain = threeStateChain()
+  single = chain.simulateModelParallel(200000, 0, seed = 5, chunkSize = 20000, workers = 1)
+  parallel = chain.simulateModelParallel(200000, 0, seed = 5, chunkSize = 20000, workers = 4)
+  assert np.array_equal(single, parallel)
+
+def test_parallelSinks(tmp_path):
+  chain = gilbertChain()
+  expected = chain.simulateModelParallel(100000, 0, seed = 6, chunkSize = 30000, workers = 1)
+
+  memoryMap = np.lib.format.open_memmap(tmp_path / "trace.npy", mode = "w+", dtype = np.uint8, shape = (100000,))
+  chain.simulateModelParallel(100000, 0, seed = 6, chunkSize = 30000, workers = 1, sink = memoryMap)
+  assert np.array_equal(memoryMap, expected)
+
+  chunks = []
+  chain.simulateModelParallel(100000, 0, seed = 6, chunkSize = 30000, workers = 1, sink = lambda first, errors: chunks.append((first, errors)))
+  assert [first for first, errors in chunks] == [0, 30000, 60000, 90000]
+  assert np.array_equal(np.concatenate([errors for first, errors in chunks]), expected)
+
+def test_ensembleMatchesEachChain():
+  good = gilbertChain()
+  bad = MarkovChain.markovChain(M = 2, T = [[0.95, 0.3], [0.05, 0.7]], Pe = [0.001, 0.2])
+  T, Pe = MarkovChain.stackChains([good, bad]*200)
+  errors = MarkovChain.simulateEnsemble(T, Pe, 10000, seed = 1)
+  assert errors.shape == (400, 10000)
+  assert patternFrequencies(errors[0::2].ravel()) == pytest.approx(exactFrequencies(good), rel = 0.1)
+  assert patternFrequencies(errors[1::2].ravel()) == pytest.approx(exactFrequencies(bad), rel = 0.1)
+
+  counts = MarkovChain.simulateEnsemble(T, Pe, 10000, seed = 1, output = "counts", blockSize = 777)
+  assert counts.shape == (400,)
+  assert np.mean(counts[0::2])/10000 == pytest.approx(exactFrequencies(good)[0], rel = 0.1)
+
+@pytest.mark.parametrize("build", chains)
+def test_patternsAddUpToOne(build):
+  chain = build()
+  patterns = np.array(list(itertools.product([0, 1], repeat = 10)))
+  assert np.sum(chain.calculateErrorPattern(patterns)) == pytest.approx(1, abs = 1e-12)
+
+@pytest.mark.parametrize("build", chains)
+def test_patternsMatchDirectProducts(build):
+  chain = build()
+  P = chain.stepMatrices()
+  patterns = np.random.default_rng(1).integers(0, 2, (200, 8))
+  patterns[:50, :5] = 1
+  expected = []
+  for pattern in patterns:
+    vector = np.asarray(chain.Π, dtype=float)
+    for bit in pattern: vector = vector @ P[bit]
+    expected.append(vector.sum())
+  assert np.allclose(chain.calculateErrorPattern(patterns), expected, rtol = 1e-12, atol = 0)
+
+def test_longPatternsDoNotUnderflow():
+  logProbability = gilbertChain().calculateErrorPattern(np.ones(5000, dtype=int), logarithmic = True)
+  assert np.isfinite(logProbability) and logProbability < -700
+
+def test_emptyPattern():
+  chain = gilbertChain()
+  assert chain.calculateErrorPattern([]) == pytest.approx(1)
+  assert np.allclose(chain.calculateErrorPattern(np.zeros((3, 0))), 1)
+
+@pytest.mark.parametrize("build", chains)
+def test_errorNumberMatchesBruteForce(build):
+  chain = build()
+  patterns = np.array(list(itertools.product([0, 1], repeat = 12)))
+  bruteForce = np.bincount(patterns.sum(axis=1), weights = chain.calculateErrorPattern(patterns), minlength = 13)
+  assert np.allclose(chain.calculateErrorNumber(12), bruteForce, rtol = 1e-12, atol = 1e-15)
+  assert np.allclose(chain.calculateErrorDistribution(12, maxErrors = 3), bruteForce[:4], rtol = 1e-12, atol = 1e-15)
+
+def test_errorNumberBroadcasting():
+  chain = gilbertChain()
+  full = chain.calculateErrorDistribution([10, 31])
+  assert chain.calculateErrorNumber(31, 2) == pytest.approx(full[1, 2])
+  assert np.allclose(chain.calculateErrorNumber([10, 31], 2), full[:, 2])
+  assert chain.calculateErrorNumber([[8], [31]], [0, 1, 2]).shape == (2, 3)
+
+def test_blockErrorProbability():
+  chain = gilbertChain()
+  distribution = chain.calculateErrorDistribution(300)
+  assert chain.calculateBlockErrorProbability(300, 2) == pytest.approx(1 - distribution[:3].sum())
+  assert chain.calculateBlockErrorProbability(31) == pytest.approx(1 - chain.calculateErrorNumber(31, 0))
+
+def test_stepMatrices():
+  chain = threeStateChain()
+  T = np.asarray(chain.T)
+  assert np.allclose(chain.getP(1), np.diag(chain.Pe) @ T)
+  assert np.allclose(chain.stepMatrices()[1], np.diag(chain.Pe) @ T.T)
+  assert np.allclose(chain.stepMatrices().sum(axis=0).sum(axis=1), 1)
+
+@pytest.mark.parametrize("n", [1, 31, 32, 33, 5000])
+def test_composeStepsMatchesSequentialComposition(n):
+  steps = np.random.default_rng(n).integers(0, 3, (n, 4, 3))
+  expected = steps.copy()
+  for t in range(1, n): expected[t] = np.take_along_axis(steps[t], expected[t - 1], axis=-1)
+  assert np.array_equal(MarkovChain.composeSteps(steps), expected)
+
+def test_ensembleOfLongTraces():
+  chain = threeStateChain()
+  T, Pe = MarkovChain.stackChains([chain, chain])
+  errors = MarkovChain.simulateEnsemble(T, Pe, 10**6, initialStates = [0, 2], seed = 4, blockSize = 300000)
+  assert patternFrequencies(errors.ravel()) == pytest.approx(exactFrequencies(chain), rel = 0.1)
@@ -0,0 +1,78 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests of the analytical BER and SER of the modulation element.
+"""
+
+import numpy as np
+import pytest
+
+configurations = [("PSK", 2), ("PSK", 8), ("DPSK", 4), ("FSK", 4), ("QAM", 16), ("QAM", 64), ("PAM", 4)]
+
+def element(modulationElement, modulation, M):
+  # DPSK and FSK do not have a komm model, the analytical formulas are reached changing the modulation of a PSK element
+  if modulation in ("DPSK", "FSK"):
+    result = modulationElement("PSK", M)
+    result.modulation = modulation
+    return result
+  return modulationElement(modulation, M)
+
+@pytest.mark.parametrize("modulation, M", configurations)
+def test_vectorizedBERMatchesScalarLoop(modulationElement, modulation, M):
+  modulationModel = element(modulationElement, modulation, M)
+  EbNo_dB = np.linspace(-5, 20, 24).reshape(4, 6)
+
+  BER = modulationModel.get_BER_from_EbNo(EbNo_dB = EbNo_dB)
+  Pe = modulationModel.get_Pe_from_EbNo(EbNo_dB = EbNo_dB)
+  assert BER.shape == EbNo_dB.shape and Pe.shape == EbNo_dB.shape
+
+  expectedBER = np.array([modulationModel.get_BER_from_EbNo(EbNo_dB = value) for value in EbNo_dB.ravel()]).reshape(EbNo_dB.shape)
+  expectedPe = np.array([modulationModel.get_Pe_from_EbNo(EbNo_dB = value) for value in EbNo_dB.ravel()]).reshape(EbNo_dB.shape)
+  assert np.array_equal(BER, expectedBER)
+  assert np.array_equal(Pe, expectedPe)
+
+  # Natural and logarithmic EbNo give the same curve, and it decreases with EbNo
+  assert np.allclose(modulationModel.get_BER_from_EbNo(EbNo = 10**(EbNo_dB/10)), BER, rtol = 1e-12)
+  assert np.all(np.diff(BER.ravel()) < 0)
+
+def test_scalarInputGivesScalar(modulationElement):
+  BER = modulationElement("QAM", 16).get_BER_from_EbNo(EbNo_dB = 10.0)
+  assert np.ndim(BER) == 0
+
+@pytest.mark.parametrize("modulation, M, EbNo_dB, expected", [
+  ("PSK", 2, 9.6, 1.0e-5),  # Q(sqrt(2*EbNo))
+  ("PSK", 4, 9.6, 1.0e-5),  # Same BER as BPSK with Gray labels
+  ("QAM", 16, 10.0, 1.8e-3),
+])
+def test_referenceValues(modulationElement, modulation, M, EbNo_dB, expected):
+  assert modulationElement(modulation, M).get_BER_from_EbNo(EbNo_dB = EbNo_dB) == pytest.approx(expected, rel = 0.1)
+
+def test_missingEbNo(modulationElement):
+  with pytest.raises(Exception):
+    modulationElement("PSK", 4).get_BER_from_EbNo()
+
+@pytest.mark.parametrize("solver", ["closedForm", "bracketed"])
+@pytest.mark.parametrize("modulation, M", configurations)
+def test_EbNoFromPeRoundTrip(modulationElement, modulation, M, solver):
+  modulationModel = element(modulationElement, modulation, M)
+  EbNo_dB = np.linspace(0, 20, 9)
+  Pe = modulationModel.get_Pe_from_EbNo(EbNo_dB = EbNo_dB)
+  assert np.allclose(modulationModel.get_EbNo_from_Pe(Pe = Pe, solver = solver), EbNo_dB, atol = 1e-6)
+
+  # The SNR goes through the same conversion as get_SNR_from_EbNo
+  SNR_dB = modulationModel.get_SNR_from_Pe(Pe = Pe, solver = solver)
+  assert np.allclose(modulationModel.get_Pe_from_SNR(SNR_dB = SNR_dB), Pe, rtol = 1e-5)
+
+@pytest.mark.parametrize("modulation, M", configurations)
+def test_unreachablePeIsNan(modulationElement, modulation, M):
+  # The largest Pe of the expressions is the one at EbNo -> 0, above it the argument of Q would be negative
+  modulationModel = element(modulationElement, modulation, M)
+  highest = modulationModel.get_Pe_from_EbNo(EbNo = 1e-12)
+  EbNo_dB = modulationModel.get_EbNo_from_Pe(Pe = np.array([1e-4, 1.01*highest]))
+  assert np.isfinite(EbNo_dB[0]) and np.isnan(EbNo_dB[1])
+
+def test_missingPe(modulationElement):
+  with pytest.raises(Exception):
+    modulationElement("PSK", 4).get_EbNo_from_Pe()
@@ -0,0 +1,100 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests of the root-raised-cosine pulse shaping and of the overlap-save filters, processing the sequences
+  in blocks of odd lengths to check the state kept between calls.
+"""
+
+import numpy as np
+import pytest
+import ComsChannelsSim.PulseShaping as PulseShaping
+
+def splitInBlocks(sequence, sizes):
+  edges = np.cumsum([0] + list(sizes))
+  return [sequence[first:last] for first, last in zip(edges[:-1], edges[1:])] + [sequence[edges[-1]:]]
+
+def randomSymbols(count, seed):
+  rng = np.random.default_rng(seed)
+  return (2*rng.integers(0, 2, count) - 1) + 1j*(2*rng.integers(0, 2, count) - 1)
+
+@pytest.mark.parametrize("rolloff", [0.25, 0.35, 0.5, 1.0])
+def test_rrcTaps(rolloff):
+  taps = PulseShaping.rrcTaps(rolloff, 10, 8)
+  assert taps.size == 81
+  assert np.sum(np.square(taps)) == pytest.approx(1.0)
+  assert np.allclose(taps, taps[::-1])
+
+  # The cascade with the matched filter is a Nyquist pulse, only the truncation leaves some ISI
+  cascade = np.convolve(taps, taps)
+  assert cascade[80] == pytest.approx(1.0)
+  assert np.max(np.abs(np.delete(cascade[0::8], 10))) < 0.05
+
+def test_rrcTapsLimits():
+  with pytest.raises(Exception):
+    PulseShaping.rrcTaps(1.5, 10, 8)
+  with pytest.raises(Exception):
+    PulseShaping.rrcTaps(0.35, 0, 8)
+
+@pytest.mark.parametrize("complexInput", [False, True])
+def test_overlapSaveMatchesConvolution(complexInput):
+  rng = np.random.default_rng(1)
+  taps = rng.standard_normal(33)
+  sequence = rng.standard_normal(5000) + (1j*rng.standard_normal(5000) if complexInput else 0)
+
+  # A small FFT and batch so every block spans several frames and batches
+  filterElement = PulseShaping.overlapSaveFilter(taps, fftSize = 128, batchSize = 512)
+  output = np.concatenate([filterElement.filter(block) for block in splitInBlocks(sequence, [1, 7, 95, 96, 1001, 3])])
+  assert output.size == sequence.size
+  assert np.allclose(output, np.convolve(sequence, taps)[:sequence.size])
+
+  filterElement.reset()
+  assert np.allclose(filterElement.filter(sequence[:300]), np.convolve(sequence[:300], taps)[:300])
+
+def test_overlapSaveFFTSize():
+  with pytest.raises(Exception):
+    PulseShaping.overlapSaveFilter(np.ones(100), fftSize = 128)
+
+def test_transmitAndReceiveReturnsTheSymbols():
+  shaper = PulseShaping.pulseShaper()
+  symbols = randomSymbols(500, 2)
+  waveform = shaper.transmit(symbols, flush = True)
+  assert waveform.size == (symbols.size + shaper.span)*shaper.samplesPerSymbol
+
+  received = shaper.receive(waveform)
+  assert received.size == symbols.size
+  assert np.max(np.abs(received - symbols)) < 0.05
+
+@pytest.mark.parametrize("samplesPerSymbol", [4, 8])
+def test_blocksOfOddLengthsMatchOneShot(samplesPerSymbol):
+  symbols = randomSymbols(777, 3)
+  shaper = PulseShaping.pulseShaper(samplesPerSymbol = samplesPerSymbol, fftSize = 256)
+  waveform = shaper.transmit(symbols, flush = True)
+  expected = shaper.receive(waveform)
+
+  # Transmitter in blocks of odd numbers of symbols, the last one with the tail of the pulses
+  shaper.reset()
+  blocks = splitInBlocks(symbols, [1, 37, 3, 201, 99])
+  blockWaveform = np.concatenate([shaper.transmit(block) for block in blocks[:-1]] + [shaper.transmit(blocks[-1], flush = True)])
+  assert np.allclose(blockWaveform, waveform)
+
+  # Receiver in blocks of odd numbers of samples, that cut the symbols anywhere
+  received = [shaper.receive(block) for block in splitInBlocks(blockWaveform, [3, 5, 41, 1, 313, 999, 77])]
+  assert shaper.receivedSamples == waveform.size
+  assert sum(block.size for block in received) == symbols.size
+  assert np.allclose(np.concatenate(received), expected)
+
+def test_spanMustBeEven():
+  with pytest.raises(Exception):
+    PulseShaping.pulseShaper(span = 9)
+
+@pytest.mark.parametrize("modulation, M", [("PSK", 4), ("QAM", 16)])
+def test_waveformRoundTrip(modulationElement, modulation, M):
+  element = modulationElement(modulation, M)
+  shaper = element.getPulseShaper(rolloff = 0.25, samplesPerSymbol = 4)
+  bits = np.random.default_rng(4).integers(0, 2, 3000*int(np.log2(M)))
+
+  chunks = np.split(bits, 3)
+  waveform = np.concatenate([element.codifyWaveform(chunk, shaper, flush = index == 2) for index, chunk in enumerate(chunks)])
+  assert np.array_equal(element.decodifyWaveform(waveform, shaper), bits)
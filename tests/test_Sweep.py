@@ -0,0 +1,38 @@
+"""
+Author: Pablo Rivero Lazaro (Pasblo)
+Contact: pasblo39@gmail.com
+Version: 1.0
+Description:
+  Tests of the parameter sweep executor, in this process and in a pool of processes.
+"""
+
+import numpy as np
+import pytest
+import ComsChannelsSim.Sweep as Sweep
+from ComsChannelsSim.ChannelElement import channelElement
+
+grid = {"transmittedPower_dB": [20.0, 30.0, 40.0], "reachProbability": [0.01, 0.05, 0.1, 0.5], "standardDeviation_dB": [4.0, 8.0]}
+fixed = {"sensitivity_dB": -100.0, "lossModel": "hataUrban", "baseHeight": 30.0, "mobileHeight": 1.5, "frequency": 900.0}
+
+def test_parameterGridOrder():
+  table = Sweep.parameterGrid({"a": [1, 2], "b": [0.5, 1.5, 2.5]})
+  assert table.dtype.names == ("a", "b")
+  assert table["a"].tolist() == [1, 1, 1, 2, 2, 2]
+  assert table["b"].tolist() == [0.5, 1.5, 2.5]*2
+
+def test_sameResultForAnyNumberOfWorkers():
+  channel = channelElement('AWGN', snr = 10)
+  channel.addGain(gain_dB = 10.0)
+  calls = []
+  single = Sweep.channelSweep(channel, "calculateDistance_reachProbability", grid, fixed = fixed, workers = 1, chunkSize = 5, progress = lambda done, total: calls.append((done, total)))
+  parallel = Sweep.channelSweep(channel, "calculateDistance_reachProbability", grid, fixed = fixed, workers = 3, chunkSize = 5)
+
+  assert np.array_equal(single, parallel)
+  assert calls[-1] == (24, 24) and len(calls) == 5
+
+  for row in single[::7]:
+    parameters = {name: row[name].item() for name in grid}
+    assert row["result"] == pytest.approx(channel.calculateDistance_reachProbability(**fixed, **parameters))
+
+def test_missingMethod():
+  with pytest.raises(Exception): Sweep.channelSweep(channelElement('AWGN', snr = 10), "calculateNothing", grid)